@@ -0,0 +1,109 @@
+"""Serialization cost of one gateway request, before and after src/json_codec.py.
+
+Replays the JSON work of a typical tool-calling request: the tool list
+round trip, converting an MCP tool result, the streamed SSE events and the
+final response body.
+
+    python benchmarks/bench_json_codec.py [--iterations 200]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import json_codec  # noqa: E402
+
+try:
+    from mcp.types import CallToolResult, TextContent
+except ImportError:
+    CallToolResult = None
+
+
+def build_request_data():
+    tools = [{
+        "type": "function",
+        "function": {
+            "name": f"tool_{i}",
+            "description": "Reads records from the service and returns them as JSON " * 3,
+            "parameters": {
+                "type": "object",
+                "properties": {f"arg_{j}": {"type": "string", "description": "An argument"} for j in range(8)},
+                "required": ["arg_0"]
+            }
+        }
+    } for i in range(30)]
+
+    records = [{
+        "id": f"18c{i:010d}",
+        "threadId": f"18c{i:010d}",
+        "subject": f"Quarterly report {i} – résumé attached",
+        "from": "sender@example.com",
+        "to": "team@example.com",
+        "date": "Mon, 2 Sep 2024 10:00:00 +0000",
+        "snippet": "Please find attached the latest figures for the quarter " * 2,
+        "labelIds": ["INBOX", "IMPORTANT", "CATEGORY_UPDATES"]
+    } for i in range(200)]
+    result_text = json.dumps(records, indent=2)
+    if CallToolResult is not None:
+        tool_result = CallToolResult(content=[TextContent(type="text", text=result_text)], isError=False)
+    else:
+        tool_result = {"content": [{"type": "text", "text": result_text}], "isError": False}
+
+    events = [{
+        "Data": f"token {i} ",
+        "Error": None,
+        "Status": True,
+        "StreamingStatus": "IN-PROGRESS",
+        "Action": "MESSAGE-DELTA"
+    } for i in range(300)]
+    return tools, tool_result, records, events
+
+
+def before(tools, tool_result, records, events):
+    parsed_tools = json.loads(json.dumps(tools))
+    result = json.loads(json.dumps(tool_result, default=lambda o: getattr(o, "__dict__", str(o))))
+    tool_text = json.dumps(records, indent=2)
+    for event in events:
+        json.dumps(event)
+    body = json.dumps({"Data": {"tools": parsed_tools, "executed_tool_calls": [result]}, "Error": None, "Status": True})
+    return len(tool_text) + len(body)
+
+
+def after(tools, tool_result, records, events):
+    parsed_tools = list(tools)
+    result = json_codec.to_jsonable(tool_result)
+    tool_text = json.dumps(records, separators=(",", ":"), ensure_ascii=False)
+    for event in events:
+        json_codec.dumps(event)
+    body = json_codec.dumps({"Data": {"tools": parsed_tools, "executed_tool_calls": [result]}, "Error": None, "Status": True})
+    return len(tool_text) + len(body)
+
+
+def measure(func, data, iterations):
+    func(*data)
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        size = func(*data)
+    return (time.perf_counter() - started_at) / iterations, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    data = build_request_data()
+    before_time, before_size = measure(before, data, args.iterations)
+    after_time, after_size = measure(after, data, args.iterations)
+
+    print(f"orjson available : {json_codec.ORJSON_AVAILABLE}")
+    print(f"before           : {before_time * 1000:8.3f} ms/request, {before_size:,} bytes")
+    print(f"after            : {after_time * 1000:8.3f} ms/request, {after_size:,} bytes")
+    print(f"speedup          : {before_time / after_time:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Local stand-in for the OpenAI, Azure OpenAI and Gemini HTTP APIs.
+
+Answers the gateway's router prompt by selecting the first tools it lists,
+asks for tool calls while the conversation has no tool results yet, and
+then answers with text. Latency and token counts are configurable, and
+streamed requests are answered as server-sent events.
+
+    python benchmarks/fake_llm_server.py --port 8100 --latency 0.2 --output-tokens 50
+
+Point the gateway at it with OPENAI_BASE_URL=http://127.0.0.1:8100/v1,
+GEMINI_BASE_URL=http://127.0.0.1:8100/v1beta, and "endpoint":
+"http://127.0.0.1:8100" in the Azure client_details.
+"""
+import re
+import json
+import asyncio
+import argparse
+
+from aiohttp import web
+
+ROUTER_PROMPT_MARKER = "<function_call>TRUE/FALSE</function_call>"
+TOOL_RESULT_MARKER = "Executed tool:"
+
+
+class FakeLlm:
+    def __init__(self, args: argparse.Namespace):
+        self.latency = args.latency
+        self.token_delay = args.token_delay
+        self.output_tokens = args.output_tokens
+        self.tools_per_turn = args.tools_per_turn
+        self.requests = 0
+
+    def plan(self, system_prompt: str, texts: list, has_tools: bool):
+        """("router", names) | ("tools", None) | ("text", None) for one request."""
+        if ROUTER_PROMPT_MARKER in system_prompt:
+            names = re.findall(r'"function_name":\s*"([^"]+)"', system_prompt)
+            return "router", names[:self.tools_per_turn]
+        if has_tools and not any(str(text).startswith(TOOL_RESULT_MARKER) for text in texts):
+            return "tools", None
+        return "text", None
+
+    def answer_tokens(self, kind: str, names):
+        if kind == "router":
+            selected = ",".join(names) if names else "none"
+            return [f"<function_call>{'TRUE' if names else 'FALSE'}</function_call><selected_tools>{selected}</selected_tools>"]
+        return [f"word{i} " for i in range(self.output_tokens)]
+
+    async def openai(self, request: web.Request) -> web.StreamResponse:
+        self.requests += 1
+        body = await request.json()
+        messages = body.get("messages", [])
+        system_prompt = messages[0].get("content", "") if messages else ""
+        tools = body.get("tools") or []
+        kind, names = self.plan(system_prompt, [m.get("content") for m in messages[1:]], bool(tools))
+        usage = {"prompt_tokens": len(json.dumps(body)) // 4, "completion_tokens": self.output_tokens}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        tool_calls = [{
+            "id": f"call_{i}",
+            "type": "function",
+            "function": {"name": tool["function"]["name"], "arguments": "{}"}
+        } for i, tool in enumerate(tools[:self.tools_per_turn])] if kind == "tools" else []
+        tokens = [] if tool_calls else self.answer_tokens(kind, names)
+
+        await asyncio.sleep(self.latency)
+        if not body.get("stream"):
+            message = {"role": "assistant", "content": "".join(tokens) if tokens else None}
+            if tool_calls:
+                message["tool_calls"] = tool_calls
+            return web.json_response({
+                "id": "chatcmpl-bench",
+                "object": "chat.completion",
+                "model": body.get("model", "fake"),
+                "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if tool_calls else "stop"}],
+                "usage": usage
+            })
+
+        response = await self.start_sse(request)
+        for token in tokens:
+            await self.send_sse(response, {"choices": [{"index": 0, "delta": {"content": token}}]})
+            await asyncio.sleep(self.token_delay)
+        for index, tool_call in enumerate(tool_calls):
+            await self.send_sse(response, {"choices": [{"index": 0, "delta": {"tool_calls": [{**tool_call, "index": index}]}}]})
+        await self.send_sse(response, {"choices": [], "usage": usage})
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+    async def gemini(self, request: web.Request) -> web.StreamResponse:
+        self.requests += 1
+        body = await request.json()
+        system_prompt = "".join(part.get("text", "") for part in body.get("system_instruction", {}).get("parts", []))
+        texts = [part.get("text", "") for content in body.get("contents", []) for part in content.get("parts", [])]
+        declarations = [d for tool in body.get("tools", []) for d in tool.get("functionDeclarations", [])]
+        kind, names = self.plan(system_prompt, texts, bool(declarations))
+        prompt_tokens = len(json.dumps(body)) // 4
+        usage = {"promptTokenCount": prompt_tokens, "candidatesTokenCount": self.output_tokens,
+                 "totalTokenCount": prompt_tokens + self.output_tokens}
+
+        if kind == "tools":
+            parts = [{"functionCall": {"name": d["name"], "args": {}}} for d in declarations[:self.tools_per_turn]]
+        else:
+            parts = [{"text": token} for token in self.answer_tokens(kind, names)]
+
+        await asyncio.sleep(self.latency)
+        if not request.path.endswith(":streamGenerateContent"):
+            if kind != "tools":
+                parts = [{"text": "".join(part["text"] for part in parts)}]
+            return web.json_response({
+                "candidates": [{"content": {"role": "model", "parts": parts}, "finishReason": "STOP", "index": 0}],
+                "usageMetadata": usage
+            })
+
+        response = await self.start_sse(request)
+        for part in parts:
+            await self.send_sse(response, {"candidates": [{"content": {"role": "model", "parts": [part]}, "index": 0}]})
+            await asyncio.sleep(self.token_delay)
+        await self.send_sse(response, {"candidates": [{"content": {"role": "model", "parts": []}, "finishReason": "STOP"}],
+                                       "usageMetadata": usage})
+        return response
+
+    @staticmethod
+    async def start_sse(request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        return response
+
+    @staticmethod
+    async def send_sse(response: web.StreamResponse, data: dict):
+        await response.write(f"data: {json.dumps(data)}\n\n".encode("utf-8"))
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response({"requests": self.requests})
+
+
+def build_app(args: argparse.Namespace) -> web.Application:
+    fake = FakeLlm(args)
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app.router.add_post("/v1/chat/completions", fake.openai)
+    app.router.add_post("/openai/deployments/{deployment}/chat/completions", fake.openai)
+    app.router.add_post("/v1beta/models/{model_action}", fake.gemini)
+    app.router.add_get("/stats", fake.stats)
+    return app
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Fake OpenAI/Azure/Gemini API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before the first byte of every answer")
+    parser.add_argument("--token-delay", type=float, default=0.005, help="seconds between streamed tokens")
+    parser.add_argument("--output-tokens", type=int, default=50)
+    parser.add_argument("--tools-per-turn", type=int, default=1)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    web.run_app(build_app(args), host=args.host, port=args.port, access_log=None, print=None)
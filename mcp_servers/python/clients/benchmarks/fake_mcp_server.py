@@ -0,0 +1,61 @@
+"""MCP stdio server with canned tools, for load tests without real backends.
+
+Every tool sleeps for --tool-latency seconds and returns a JSON list of
+records about --payload-bytes long, like a typical read tool.
+
+    python benchmarks/fake_mcp_server.py --tools 10 --tool-latency 0.05 --payload-bytes 4000
+"""
+import json
+import asyncio
+import argparse
+from collections.abc import Sequence
+
+from mcp.server import Server
+from mcp.server.stdio import stdio_server
+from mcp.types import Tool, TextContent
+
+
+def build_server(args: argparse.Namespace) -> Server:
+    app = Server("mcp-bench")
+    record = {"id": "0" * 16, "subject": "Quarterly report", "from": "sender@example.com", "snippet": "x" * 80}
+    records = [dict(record, id=f"{i:016d}") for i in range(max(1, args.payload_bytes // len(json.dumps(record))))]
+    payload = json.dumps(records)
+
+    tools = [Tool(
+        name=f"bench_tool_{i}",
+        description=f"Benchmark tool {i}, returns {len(records)} records after {args.tool_latency}s",
+        inputSchema={
+            "type": "object",
+            "properties": {"query": {"type": "string", "description": "Free text query"}},
+            "required": []
+        }
+    ) for i in range(args.tools)]
+
+    @app.list_tools()
+    async def list_tools() -> list[Tool]:
+        return tools
+
+    @app.call_tool()
+    async def call_tool(name: str, arguments: dict) -> Sequence[TextContent]:
+        await asyncio.sleep(args.tool_latency)
+        return [TextContent(type="text", text=payload)]
+
+    return app
+
+
+async def main(args: argparse.Namespace):
+    app = build_server(args)
+    async with stdio_server() as (read_stream, write_stream):
+        await app.run(read_stream, write_stream, app.create_initialization_options())
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Fake MCP stdio server")
+    parser.add_argument("--tools", type=int, default=10)
+    parser.add_argument("--tool-latency", type=float, default=0.05)
+    parser.add_argument("--payload-bytes", type=int, default=4000)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
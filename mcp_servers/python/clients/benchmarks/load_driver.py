@@ -0,0 +1,215 @@
+"""Closed-loop load driver for a running gateway.
+
+At every concurrency level, that many workers send requests back to back
+for --duration seconds. Reports requests per second, p50/p95/p99 latency
+and, for the stream endpoint, time to the first SSE event and to the first
+answer token (MESSAGE-DELTA).
+
+    python benchmarks/load_driver.py --gateway http://127.0.0.1:5001 --concurrency 1,8,32 --mode both
+
+--output writes the results as JSON; --baseline compares them against an
+earlier --output file and exits with status 1 when p95 latency or RPS
+regressed by more than --max-regression.
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import itertools
+from typing import Dict, List, Any, Optional
+
+import httpx
+
+PROCESS_MESSAGE_PATH = "/api/v1/mcp/process_message"
+STREAM_PATH = "/api/v1/mcp/process_message_stream"
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def build_payload(args: argparse.Namespace, sequence: int) -> Dict[str, Any]:
+    client_details = {
+        "api_key": "bench",
+        "temperature": 0.1,
+        "max_tokens": 1000,
+        "prompt": "You are a helpful assistant.",
+        # A distinct input per request keeps the router cache out of the measurement
+        "input": f"{args.input} ({sequence})" if args.distinct_inputs else args.input,
+        "chat_history": []
+    }
+    if args.client == "MCP_CLIENT_AZURE_AI":
+        client_details.update({"endpoint": args.azure_endpoint, "deployment_id": "bench", "api_version": "2024-06-01"})
+    else:
+        client_details["chat_model"] = args.model
+    return {
+        "selected_client": args.client,
+        "selected_servers": [args.server],
+        "selected_server_credentials": {args.server: {"token": "bench"}},
+        "client_details": client_details
+    }
+
+
+async def send_process_message(client: httpx.AsyncClient, payload: Dict[str, Any]) -> Dict[str, Any]:
+    started_at = time.perf_counter()
+    resp = await client.post(PROCESS_MESSAGE_PATH, json=payload)
+    latency = time.perf_counter() - started_at
+    ok = resp.status_code == 200 and resp.json().get("Status") is True
+    return {"ok": ok, "latency": latency}
+
+
+async def send_stream(client: httpx.AsyncClient, payload: Dict[str, Any]) -> Dict[str, Any]:
+    started_at = time.perf_counter()
+    first_event = first_token = None
+    ok = False
+    async with client.stream("POST", STREAM_PATH, json=payload) as resp:
+        async for line in resp.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            now = time.perf_counter() - started_at
+            if first_event is None:
+                first_event = now
+            event = json.loads(line[5:])
+            if event.get("Status") is False or "error" in event:
+                ok = False
+                break
+            if event.get("Action") == "MESSAGE-DELTA" and first_token is None:
+                first_token = now
+            if event.get("Action") == "AI-RESPONSE":
+                ok = True
+    return {"ok": ok and resp.status_code == 200, "latency": time.perf_counter() - started_at,
+            "first_event": first_event, "first_token": first_token}
+
+
+async def run_level(args: argparse.Namespace, mode: str, concurrency: int, sequence: itertools.count) -> Dict[str, Any]:
+    send = send_stream if mode == "stream" else send_process_message
+    samples: List[Dict[str, Any]] = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=args.gateway, timeout=args.timeout, limits=limits) as client:
+        # Warm up pools and connections outside the measured window
+        await asyncio.gather(*[send(client, build_payload(args, next(sequence))) for _ in range(min(concurrency, 4))])
+
+        deadline = time.perf_counter() + args.duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                try:
+                    samples.append(await send(client, build_payload(args, next(sequence))))
+                except Exception as err:
+                    samples.append({"ok": False, "latency": None, "error": str(err)})
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started_at
+
+    succeeded = [sample for sample in samples if sample["ok"]]
+    latencies = [sample["latency"] for sample in succeeded]
+    result = {
+        "mode": mode,
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "errors": len(samples) - len(succeeded),
+        "rps": len(succeeded) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99)
+    }
+    if mode == "stream":
+        first_events = [sample["first_event"] for sample in succeeded if sample.get("first_event") is not None]
+        first_tokens = [sample["first_token"] for sample in succeeded if sample.get("first_token") is not None]
+        result["first_event_p50"] = percentile(first_events, 0.50)
+        result["first_event_p95"] = percentile(first_events, 0.95)
+        result["first_token_p50"] = percentile(first_tokens, 0.50)
+        result["first_token_p95"] = percentile(first_tokens, 0.95)
+    return result
+
+
+def format_ms(value: Optional[float]) -> str:
+    return f"{value * 1000:9.1f}" if value is not None else f"{'-':>9}"
+
+
+def print_results(results: List[Dict[str, Any]]):
+    print(f"{'mode':<16}{'conc':>5}{'reqs':>7}{'errs':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'1st evt p50':>12}{'1st tok p50':>12}")
+    for r in results:
+        print(f"{r['mode']:<16}{r['concurrency']:>5}{r['requests']:>7}{r['errors']:>6}{r['rps']:>9.1f}"
+              f"{format_ms(r['p50'])} {format_ms(r['p95'])} {format_ms(r['p99'])}"
+              f"  {format_ms(r.get('first_event_p50'))}   {format_ms(r.get('first_token_p50'))}")
+
+
+def compare_with_baseline(results: List[Dict[str, Any]], baseline_path: str, max_regression: float) -> List[str]:
+    """Regressions of p95 latency and RPS against a saved run, per (mode, concurrency)."""
+    with open(baseline_path) as baseline_file:
+        baseline = {(r["mode"], r["concurrency"]): r for r in json.load(baseline_file)["results"]}
+    regressions = []
+    for r in results:
+        before = baseline.get((r["mode"], r["concurrency"]))
+        if not before:
+            continue
+        label = f"{r['mode']} @ {r['concurrency']}"
+        if before.get("p95") and r.get("p95") and r["p95"] > before["p95"] * (1 + max_regression):
+            regressions.append(f"{label}: p95 {before['p95'] * 1000:.1f} ms -> {r['p95'] * 1000:.1f} ms")
+        if before.get("rps") and r["rps"] < before["rps"] * (1 - max_regression):
+            regressions.append(f"{label}: rps {before['rps']:.1f} -> {r['rps']:.1f}")
+        if r["errors"] > before.get("errors", 0):
+            regressions.append(f"{label}: errors {before.get('errors', 0)} -> {r['errors']}")
+    return regressions
+
+
+async def run_all(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    modes = ["process_message", "stream"] if args.mode == "both" else [args.mode]
+    sequence = itertools.count()
+    results = []
+    for mode in modes:
+        for concurrency in args.concurrency:
+            result = await run_level(args, mode, concurrency, sequence)
+            print(f"{mode} @ {concurrency}: {result['rps']:.1f} rps, p95 {format_ms(result['p95']).strip()} ms, {result['errors']} errors")
+            results.append(result)
+    return results
+
+
+def add_load_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--gateway", default="http://127.0.0.1:5001")
+    parser.add_argument("--mode", choices=["process_message", "stream", "both"], default="both")
+    parser.add_argument("--concurrency", type=lambda value: [int(c) for c in value.split(",")], default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per concurrency level")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--client", default="MCP_CLIENT_OPENAI")
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--azure-endpoint", default="http://127.0.0.1:8100")
+    parser.add_argument("--server", default="MCP-BENCH")
+    parser.add_argument("--input", default="List my latest records")
+    parser.add_argument("--distinct-inputs", action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="results JSON of an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.10)
+
+
+def report(args: argparse.Namespace, results: List[Dict[str, Any]]) -> int:
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump({"args": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")}, "results": results}, output_file, indent=2)
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gateway load driver")
+    add_load_arguments(parser)
+    args = parser.parse_args()
+    results = asyncio.run(run_all(args))
+    sys.exit(report(args, results))
+
+
+if __name__ == "__main__":
+    main()
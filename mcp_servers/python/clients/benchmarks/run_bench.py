@@ -0,0 +1,126 @@
+"""Offline end-to-end benchmark of the gateway on one machine.
+
+Starts the fake LLM server, points the gateway at it and at fake MCP
+stdio servers (MCP_SERVERS_CONFIG, OPENAI_BASE_URL, GEMINI_BASE_URL,
+MCP_GATEWAY_PORT), runs the load driver and stops everything again.
+
+    python benchmarks/run_bench.py --concurrency 1,8,32 --duration 10 --output results.json
+    python benchmarks/run_bench.py --baseline results.json    # exits 1 on regressions
+
+Run it from the clients directory, with the gateway's requirements and
+aiohttp installed.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+import httpx
+
+from load_driver import add_load_arguments, run_all, report
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CLIENTS_DIR = os.path.dirname(BENCH_DIR)
+
+
+def write_servers_config(args: argparse.Namespace, path: str):
+    servers = [{
+        "server_name": args.server,
+        "command": sys.executable,
+        "args": [
+            os.path.join(BENCH_DIR, "fake_mcp_server.py"),
+            "--tools", str(args.tools),
+            "--tool-latency", str(args.tool_latency),
+            "--payload-bytes", str(args.payload_bytes)
+        ],
+        "startup_timeout": 30,
+        "max_concurrent_tool_calls": args.max_concurrent_tool_calls,
+        "pool_size": args.pool_size,
+        "health_check_interval": 30
+    }]
+    with open(path, "w") as config_file:
+        json.dump(servers, config_file, indent=2)
+
+
+def wait_until_up(url: str, process: subprocess.Popen, timeout: float):
+    """Poll url until it answers at all; any HTTP status counts as up."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{process.args[1]} exited with status {process.returncode}")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def stop(process: subprocess.Popen):
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline gateway benchmark")
+    add_load_arguments(parser)
+    parser.add_argument("--llm-port", type=int, default=8100)
+    parser.add_argument("--gateway-port", type=int, default=5099)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--token-delay", type=float, default=0.005)
+    parser.add_argument("--output-tokens", type=int, default=50)
+    parser.add_argument("--tools", type=int, default=10)
+    parser.add_argument("--tool-latency", type=float, default=0.05)
+    parser.add_argument("--payload-bytes", type=int, default=4000)
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--max-concurrent-tool-calls", type=int, default=4)
+    parser.add_argument("--gateway-log", default=os.devnull, help="file for the gateway's output")
+    args = parser.parse_args()
+
+    llm_url = f"http://127.0.0.1:{args.llm_port}"
+    args.gateway = f"http://127.0.0.1:{args.gateway_port}"
+    args.azure_endpoint = llm_url
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        servers_config_path = os.path.join(temp_dir, "servers.json")
+        write_servers_config(args, servers_config_path)
+
+        env = dict(
+            os.environ,
+            MCP_SERVERS_CONFIG=servers_config_path,
+            OPENAI_BASE_URL=f"{llm_url}/v1",
+            GEMINI_BASE_URL=f"{llm_url}/v1beta",
+            MCP_GATEWAY_PORT=str(args.gateway_port),
+            PYTHONUNBUFFERED="1"
+        )
+        fake_llm = subprocess.Popen([
+            sys.executable, os.path.join(BENCH_DIR, "fake_llm_server.py"),
+            "--port", str(args.llm_port),
+            "--latency", str(args.llm_latency),
+            "--token-delay", str(args.token_delay),
+            "--output-tokens", str(args.output_tokens)
+        ])
+        with open(args.gateway_log, "w") as gateway_log:
+            gateway = subprocess.Popen([sys.executable, "run.py"], cwd=CLIENTS_DIR, env=env,
+                                       stdout=gateway_log, stderr=subprocess.STDOUT)
+            try:
+                wait_until_up(f"{llm_url}/stats", fake_llm, 30)
+                wait_until_up(args.gateway, gateway, 60)
+                results = asyncio.run(run_all(args))
+            finally:
+                stop(gateway)
+                stop(fake_llm)
+
+    sys.exit(report(args, results))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,5 @@
 from quart import Quart, request, jsonify, make_response, Response
 from quart_cors import cors
-import json
 import asyncio
 import sys
 import os
@@ -14,8 +13,13 @@ from hypercorn.config import Config
 from contextlib import AsyncExitStack
 from src.llm.azureopenai import azure_openai_processor
 from src.server_connection import initialize_all_mcp, MCPServers
+from src.llm.http_client import close_http_clients
 from src.client_and_server_validation import client_and_server_validation
 from src.client_and_server_execution import client_and_server_execution
+from src import json_codec
+from src import metrics
+from src import tracing
+from src.tool_result_compaction import load_encoding
 import logging
 
 
@@ -37,18 +41,32 @@ app = cors(app, allow_origin="*")
 @app.before_request
 async def log_request_start():
     request.start_time = time.time()
+    request.counted_in_flight = True
+    metrics.HTTP_REQUESTS_IN_FLIGHT.inc()
 
 # Clean response logging middleware
 @app.after_request
 async def log_request_complete(response):
     request_time = time.time() - request.start_time
     logger.info(f"{request.method} {request.path} - {response.status_code} - {request_time:.3f}s")
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.HTTP_REQUEST_SECONDS.labels(request.method, route, str(response.status_code)).observe(request_time)
     return response
 
+# Runs after errors too, unlike after_request
+@app.teardown_request
+async def count_request_end(exc):
+    if getattr(request, "counted_in_flight", False):
+        request.counted_in_flight = False
+        metrics.HTTP_REQUESTS_IN_FLIGHT.dec()
+
 app.mcp_exit_stack = None
 # Initialize the clients when the app starts
 @app.before_serving
 async def startup():
+    metrics.start_event_loop_monitor()
+    tracing.init_tracing()
+    await load_encoding()
     try:
         app.mcp_exit_stack = AsyncExitStack()
         await app.mcp_exit_stack.__aenter__()
@@ -64,7 +82,16 @@ async def startup():
         print(f"Error initializing MCP clients =========>>>> {err}")
 
 
+@app.route("/metrics", methods=["GET"])
+async def prometheus_metrics():
+    if not metrics.metrics_enabled():
+        return jsonify({"Error": "Metrics are disabled or prometheus_client is not installed"}), 404
+    body, content_type = metrics.render_metrics()
+    return Response(body, content_type=content_type)
+
+
 @app.route("/api/v1/mcp/process_message", methods=["POST"])
+@tracing.traced("gateway.process_message", server=True)
 async def process_message():
     try:
         data = await request.get_json()
@@ -96,7 +123,8 @@ async def process_message():
             "Error": execution_response.Error,
             "Status": execution_response.Status
         }
-        return jsonify(response_dict), 200
+        # Data carries every LLM response and tool result, encode it with the fast codec
+        return Response(json_codec.dumps(response_dict), status=200, mimetype="application/json")
     
     except Exception as error:
         print(f"Error ========>>>>> {error}")
@@ -124,31 +152,35 @@ class CustomStreamHandler:
             "StreamingStatus": "COMPLETED",
             "Action": "NO-ACTION"
         }
-        await self.response_queue.put(f"data: {json.dumps(completion_data)}\n\n")
+        await self.response_queue.put(f"data: {json_codec.dumps(completion_data)}\n\n")
         await self.response_queue.put(None)  # Signal end of stream
     
     async def on_error(self, error: Exception):
         """Send error message and end the stream"""
         print(f"Streaming Error: {error}")
         error_data = {"error": str(error)}
-        await self.response_queue.put(f"data: {json.dumps(error_data)}\n\n")
+        await self.response_queue.put(f"data: {json_codec.dumps(error_data)}\n\n")
         await self.response_queue.put(None)  # Signal end of stream
 
 async def stream_generator(response_queue: asyncio.Queue):
     """Generator function for streaming responses"""
-    while True:
-        try:
-            # Wait for data with a timeout to prevent hanging
-            data = await asyncio.wait_for(response_queue.get(), timeout=30.0)
-            if data is None:  # End of stream signal
+    metrics.SSE_STREAMS_ACTIVE.inc()
+    try:
+        while True:
+            try:
+                # Wait for data with a timeout to prevent hanging
+                data = await asyncio.wait_for(response_queue.get(), timeout=30.0)
+                if data is None:  # End of stream signal
+                    break
+                yield data
+            except asyncio.TimeoutError:
+                # Send keepalive or break on timeout
+                break
+            except Exception as e:
+                print(f"Stream generator error: {e}")
                 break
-            yield data
-        except asyncio.TimeoutError:
-            # Send keepalive or break on timeout
-            break
-        except Exception as e:
-            print(f"Stream generator error: {e}")
-            break
+    finally:
+        metrics.SSE_STREAMS_ACTIVE.dec()
 
 @app.route('/api/v1/mcp/process_message_stream', methods=['POST'])
 async def process_message_stream():
@@ -162,12 +194,13 @@ async def process_message_stream():
         if not data:
             data = {}
         
-        # Modify client details
+        # Stream LLM tokens through the custom stream handler
         if 'client_details' not in data:
             data['client_details'] = {}
-        data['client_details']['is_stream'] = False
+        data['client_details']['is_stream'] = True
         
         # Start streaming response
+        @tracing.traced("gateway.process_message_stream", server=True)
         async def generate_response():
             try:
                 # Send initial status
@@ -178,7 +211,7 @@ async def process_message_stream():
                     "StreamingStatus": "STARTED",
                     "Action": "NO-ACTION"
                 }
-                await custom_stream_handler.on_data(json.dumps(start_data))
+                await custom_stream_handler.on_data(json_codec.dumps(start_data))
                 
                 # =========================================== validation check start =============================================================
                 validation_result = await client_and_server_validation(data, {"streamCallbacks": custom_stream_handler, "is_stream": True})
@@ -191,7 +224,7 @@ async def process_message_stream():
                         "StreamingStatus": "ERROR",
                         "Action": "ERROR"
                     }
-                    await custom_stream_handler.on_data(json.dumps(error_data))
+                    await custom_stream_handler.on_data(json_codec.dumps(error_data))
                     await custom_stream_handler.on_end()
                     return
                 # =========================================== validation check end =============================================================
@@ -209,7 +242,7 @@ async def process_message_stream():
                         "StreamingStatus": "ERROR",
                         "Action": "ERROR"
                     }
-                    await custom_stream_handler.on_data(json.dumps(error_data))
+                    await custom_stream_handler.on_data(json_codec.dumps(error_data))
                     await custom_stream_handler.on_end()
                     return
                 
@@ -221,7 +254,7 @@ async def process_message_stream():
                     "StreamingStatus": "IN-PROGRESS",
                     "Action": "AI-RESPONSE"
                 }
-                await custom_stream_handler.on_data(json.dumps(success_data))
+                await custom_stream_handler.on_data(json_codec.dumps(success_data))
                 await custom_stream_handler.on_end()
                 
             except Exception as error:
@@ -233,7 +266,7 @@ async def process_message_stream():
                     "StreamingStatus": "ERROR",
                     "Action": "ERROR"
                 }
-                await custom_stream_handler.on_data(json.dumps(error_data))
+                await custom_stream_handler.on_data(json_codec.dumps(error_data))
                 await custom_stream_handler.on_end()
         
         # Start the response generation in the background
@@ -264,7 +297,7 @@ async def process_message_stream():
         }
         
         async def error_generator():
-            yield f"data: {json.dumps(error_data)}\n\n"
+            yield f"data: {json_codec.dumps(error_data)}\n\n"
         
         return Response(
             error_generator(),
@@ -278,6 +311,9 @@ async def process_message_stream():
 
 @app.after_serving
 async def shutdown():
+    await metrics.stop_event_loop_monitor()
+    await close_http_clients()
+    tracing.shutdown_tracing()
     if app.mcp_exit_stack:
         await app.mcp_exit_stack.__aexit__(None, None, None)
         app.mcp_exit_stack = None
@@ -287,7 +323,8 @@ if __name__ == "__main__":
     # Create a config instance
     config = Config()
     # Configure bind address and port 
-    config.bind = [f"0.0.0.0:5001"]
+    port = os.getenv("MCP_GATEWAY_PORT", "5001")
+    config.bind = [f"0.0.0.0:{port}"]
 
     # Print welcome banner
     print("╔═══════════════════════════════════════════════════════════════════════════════════════════╗")
@@ -296,7 +333,7 @@ if __name__ == "__main__":
     print("║                                                                                           ║")
     print("║  🎉 Welcome to the MCP(Model Context Protocol) Server Integration Hackathon 2k25 !! 🎉    ║")
     print("║                                                                                           ║")
-    print("║  ✅ Server running on http://0.0.0.0:5001 ✅                                              ║")
+    print(f"║  ✅ Server running on http://0.0.0.0:{port:<5} ✅                                             ║")
     print("║                                                                                           ║") 
     print("╚═══════════════════════════════════════════════════════════════════════════════════════════╝")
 
@@ -1,3 +1,6 @@
+import os
+import json
+
 ClientsConfig =[
     "MCP_CLIENT_AZURE_AI",
     "MCP_CLIENT_OPENAI",
@@ -12,7 +15,11 @@ ServersConfig = [
 			"mcp_servers/python/servers/MCP-GSUITE/mcp-gsuite",
 			"run",
 			"mcp-gsuite"
-		]
+		],
+		"startup_timeout": 60,
+		"max_concurrent_tool_calls": 4,
+		"pool_size": 1,
+		"health_check_interval": 30
 	},
 	{
 		"server_name": "MCP-APPSIGNAL",
@@ -22,7 +29,11 @@ ServersConfig = [
 			"mcp_servers/python/servers/MCP-APPSIGNAL/mcp-appsignal",
 			"run",
 			"mcp-appsignal"
-		]
+		],
+		"startup_timeout": 60,
+		"max_concurrent_tool_calls": 4,
+		"pool_size": 1,
+		"health_check_interval": 30
 	},
 	{
     "server_name": "MCP-STOCKANALYZER",
@@ -32,7 +43,147 @@ ServersConfig = [
         "mcp_servers/python/servers/MCP-STOCKANALYZER/mcp-stockanalyzer",
         "run",
         "mcp-stockanalyzer"
-    ]
+    ],
+    "startup_timeout": 60,
+    "max_concurrent_tool_calls": 4,
+    "pool_size": 1,
+    "health_check_interval": 30
 }
 
 ]
+
+# A JSON file with a replacement server list, e.g. the stand-in servers of benchmarks/
+if os.getenv("MCP_SERVERS_CONFIG"):
+	with open(os.getenv("MCP_SERVERS_CONFIG")) as servers_config_file:
+		ServersConfig = json.load(servers_config_file)
+
+# Shared async HTTP transport settings for the LLM providers.
+# Every provider gets its own keep-alive connection pool with these limits.
+LlmHttpConfig = {
+	"MCP_CLIENT_AZURE_AI": {
+		"http2": True,
+		"max_connections": 100,
+		"max_keepalive_connections": 20,
+		"keepalive_expiry": 30,
+		"timeout": 60
+	},
+	"MCP_CLIENT_OPENAI": {
+		"base_url": os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"),
+		"http2": True,
+		"max_connections": 100,
+		"max_keepalive_connections": 20,
+		"keepalive_expiry": 30,
+		"timeout": 60
+	},
+	"MCP_CLIENT_GEMINI": {
+		"base_url": os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta"),
+		"http2": True,
+		"max_connections": 100,
+		"max_keepalive_connections": 20,
+		"keepalive_expiry": 30,
+		"timeout": 60
+	}
+}
+
+# Cache of router (tool selection) LLM decisions, see src/router_cache.py
+RouterCacheConfig = {
+	"enabled": True,
+	"ttl": 600,
+	"max_entries": 1024,
+	"history_messages": 4
+}
+
+# Compaction of tool results before they are added to chat_history,
+# see src/tool_result_compaction.py. executed_tool_calls keeps the full results.
+ToolResultCompactionConfig = {
+	"enabled": True,
+	# Token budget shared by all tool results of one LLM turn
+	"turn_token_budget": 8000,
+	"min_tokens_per_result": 500,
+	# Turns whose tool results have more text than this are compacted on a worker thread
+	"thread_threshold_chars": 20000,
+	# Records of these tools keep only the listed fields
+	"tool_fields": {
+		"query_gmail_emails": ["id", "threadId", "subject", "from", "to", "cc", "date", "snippet", "labelIds"],
+		"get_calendar_events": ["id", "summary", "start", "end", "status", "location", "attendees", "hangoutLink", "organizer"],
+		"get_all_meet_meetings": ["id", "summary", "start", "end", "status", "attendees", "hangoutLink"],
+		"get_appsignal_all_errors": ["id", "number", "count", "lastOccurredAt", "exceptionName", "namespace", "severity"],
+		"get_appsignal_all_incidents": ["id", "number", "lastOccurredAt", "severity", "description", "namespace"]
+	}
+}
+
+# Per-request limits of the tool loop, see src/execution_budget.py.
+# None disables a limit; requests may lower them with client_details["budget"].
+ExecutionBudgetConfig = {
+	"max_llm_calls": 10,
+	"max_tool_calls": 25,
+	"max_total_tokens": 200000,
+	# Seconds for the whole request, in-flight calls are cancelled after it
+	"timeout": 300
+}
+
+# Failover and hedging between LLM endpoints, see src/llm/routing.py.
+# Requests list their fallback endpoints in client_details["fallbacks"].
+RoutingConfig = {
+	# Hedge requests that have fallbacks unless client_details["hedge"] says otherwise
+	"hedge": False,
+	# Start the hedged request once the primary is slower than this latency percentile
+	"hedge_percentile": 95,
+	"hedge_min_samples": 20,
+	# Hedge delay in seconds while an endpoint has fewer samples
+	"hedge_default_delay": 10,
+	"latency_window": 200,
+	"failover_status_codes": [408, 429, 500, 502, 503, 504],
+	# Consecutive failures that open an endpoint's circuit, and seconds it stays open
+	"failure_threshold": 5,
+	"recovery_time": 30
+}
+
+# Client-side rate limits and retries per LLM endpoint (provider, API key, model),
+# see src/llm/rate_limiter.py. None leaves a limit to the provider.
+LlmRateLimitConfig = {
+	"MCP_CLIENT_AZURE_AI": {
+		"requests_per_minute": None,
+		"tokens_per_minute": None,
+		"max_retries": 3,
+		"backoff_base": 0.5,
+		"backoff_max": 30,
+		# Longer Retry-After values are returned as errors instead of waited out
+		"max_retry_after": 60
+	},
+	"MCP_CLIENT_OPENAI": {
+		"requests_per_minute": None,
+		"tokens_per_minute": None,
+		"max_retries": 3,
+		"backoff_base": 0.5,
+		"backoff_max": 30,
+		"max_retry_after": 60
+	},
+	"MCP_CLIENT_GEMINI": {
+		"requests_per_minute": None,
+		"tokens_per_minute": None,
+		"max_retries": 3,
+		"backoff_base": 0.5,
+		"backoff_max": 30,
+		"max_retry_after": 60
+	}
+}
+
+# Prometheus metrics served on /metrics, see src/metrics.py. Needs prometheus_client.
+MetricsConfig = {
+	"enabled": True,
+	# Seconds between event loop lag samples
+	"event_loop_lag_interval": 0.5
+}
+
+# OpenTelemetry tracing, see src/tracing.py. Needs opentelemetry-sdk, and for "otlp"
+# opentelemetry-exporter-otlp-proto-http, which reads OTEL_EXPORTER_OTLP_ENDPOINT.
+# The MCP servers are started with the same MCP_TRACING_* and OTEL_* variables.
+TracingConfig = {
+	# "none", "file" (JSON lines) or "otlp"
+	"exporter": os.getenv("MCP_TRACING_EXPORTER", "none"),
+	"file_path": os.getenv("MCP_TRACING_FILE", "traces.jsonl"),
+	# Share of new traces that are recorded, calls from sampled traces are always recorded
+	"sample_ratio": float(os.getenv("MCP_TRACING_SAMPLE_RATIO", "0.1")),
+	"service_name": "mcp-gateway"
+}
@@ -1,12 +1,23 @@
-import json
+import asyncio
 import logging
 from typing import Any, Dict, List, Optional
 
 # Assuming these are your imported modules/classes for MCP clients and Azure LLM calls
-from src.llm.azureopenai import azure_openai_processor  # your async LLM call function
-from src.llm.openai import openai_processor  # your async LLM call function
+from src.llm.adapters import ProviderAdapter, get_provider_adapter
+from src.llm.routing import call_llm
 from src.server_connection import MCPServers  # MCP clients dict or class with call_tool method
-from src.llm.gemini import gemini_processor 
+from src.tool_catalog import get_tool_name, get_tool_description
+from src.client_and_server_config import ServersConfig
+from src.router_cache import router_cache_key, get_router_decision, set_router_decision
+from src import json_codec
+from src.tool_result_compaction import compact_tool_results_async
+from src.execution_budget import ExecutionBudget
+from src import tracing
+
+DEFAULT_MAX_CONCURRENT_TOOL_CALLS = 4
+
+# Per-server caps on tool calls running at the same time
+_tool_call_semaphores: Dict[str, asyncio.Semaphore] = {}
 
 
 class ClientAndServerExecutionResponse:
@@ -20,42 +31,79 @@ class ClientAndServerExecutionResponse:
             "llm_responses_arr": [],
             "messages": [],
             "output_type": "text",
-            "executed_tool_calls": []
+            "executed_tool_calls": [],
+            "router_cache_hit": False
         }
         self.Error: Optional[str] = None
         self.Status: bool = False
 
 
+@tracing.traced("gateway.execution")
 async def client_and_server_execution(payload: Dict[str, Any], streaming_callback: Optional[Any] = None) -> ClientAndServerExecutionResponse:
     try:
         result = ClientAndServerExecutionResponse()
+        budget = ExecutionBudget((payload.get("client_details") or {}).get("budget"))
 
-        selected_server_credentials = payload.get("selected_server_credentials")
-        client_details = payload.get("client_details", {})
-        selected_client = payload.get("selected_client", "")
-        selected_servers = payload.get("selected_servers", [])
-        selected_server = selected_servers[0] if selected_servers else ""
-        # Prepare chat history
-        input_content = client_details.get("input", "")
-        if "chat_history" in client_details:
-            client_details["chat_history"].append({"role": "user", "content": input_content})
-        else:
-            client_details["chat_history"] = [{"role": "user", "content": input_content}]
-
-        temp_tools = json.dumps(client_details.get("tools", []))
-        temp_prompt = client_details.get("prompt", "")
-
-        # Extract tool call details for prompt
-        tool_call_details_arr = []
-        for tool in client_details.get("tools", []):
-            tool_call_details_arr.append({
-                "function_name": tool.get("function", {}).get("name", ""),
-                "function_description": tool.get("function", {}).get("description", ""),
-            })
+        try:
+            # Cancels the in-flight LLM or tool calls when the deadline passes
+            await asyncio.wait_for(run_execution(payload, result, budget, streaming_callback), timeout=budget.remaining_time())
+        except asyncio.TimeoutError:
+            budget.exhausted = "timeout"
+
+        if budget.exhausted:
+            # Keep the usage and tool results gathered so far
+            result.Error = f"Execution budget exhausted: {budget.exhausted}"
+            result.Status = False
+        result.Data["budget"] = budget.usage(result.Data)
+        return result
+
+    except Exception as e:
+        logging.error(f"Exception in client_and_server_execution: {e}")
+        res = ClientAndServerExecutionResponse()
+        res.Error = str(e)
+        res.Status = False
+        return res
+
+
+async def run_execution(
+    payload: Dict[str, Any],
+    result: ClientAndServerExecutionResponse,
+    budget: ExecutionBudget,
+    streaming_callback: Optional[Any] = None
+) -> ClientAndServerExecutionResponse:
+    """Router call, then a plain answer or the tool loop; fills result as it goes."""
+    selected_server_credentials = payload.get("selected_server_credentials")
+    client_details = payload.get("client_details", {})
+    selected_client = payload.get("selected_client", "")
+    selected_servers = payload.get("selected_servers", [])
+    selected_server = selected_servers[0] if selected_servers else ""
+
+    adapter = get_provider_adapter(selected_client)
+    if adapter is None:
+        result.Error = f"Unsupported client: {selected_client}"
+        return result
 
-        tools_getting_agent_prompt = f"""
+    # Prepare chat history
+    input_content = client_details.get("input", "")
+    if "chat_history" in client_details:
+        client_details["chat_history"].append({"role": "user", "content": input_content})
+    else:
+        client_details["chat_history"] = [{"role": "user", "content": input_content}]
+
+    original_tools = list(client_details.get("tools", []))
+    temp_prompt = client_details.get("prompt", "")
+
+    # Extract tool call details for prompt
+    tool_call_details_arr = []
+    for tool in client_details.get("tools", []):
+        tool_call_details_arr.append({
+            "function_name": get_tool_name(tool),
+            "function_description": get_tool_description(tool),
+        })
+
+    tools_getting_agent_prompt = f"""
         You are an {selected_server} AI assistant that analyzes user requests and determines the require tool calls from available tools.
-        Available tools: {json.dumps(tool_call_details_arr)}
+        Available tools: {json_codec.dumps(tool_call_details_arr)}
         Analyze each request to determine if it matches available tool capabilities or needs clarification.
         Return TRUE for tool calls when the request clearly maps to available tools without checking the required parameters.
         Return FALSE when the request is ambiguous, missing parameters, or requires more information.
@@ -65,798 +113,192 @@ async def client_and_server_execution(payload: Dict[str, Any], streaming_callbac
         Use exact tool names from available tools. List all relevant tools ordered by relevance.
         """
 
-        client_details["prompt"] = tools_getting_agent_prompt
+    client_details["prompt"] = tools_getting_agent_prompt
+    client_details["tools"] = []
+
+    # Initial LLM call, not streamed since it only selects tools
+    extracted_result = await select_tools(adapter, selected_client, selected_servers, client_details, tool_call_details_arr, result, streaming_callback)
+    if extracted_result is None:
+        return result
+
+    if not extracted_result["isFunctionCall"]:
+        # No function call, normal response case
+        client_details["prompt"] = f"{temp_prompt}. Available tools: {json_codec.dumps(tool_call_details_arr)}"
         client_details["tools"] = []
 
-        if selected_client == "MCP_CLIENT_AZURE_AI":
-
-            # Initial LLM call
-            initial_llm_response = await azure_openai_processor(client_details)
-            if not initial_llm_response.Status:
-                result.Error = initial_llm_response.Error
-                result.Status = initial_llm_response.Status
-                return result
-            extracted_result = extract_data_from_response(initial_llm_response.Data.get("messages", [{}])[0] if initial_llm_response.Data else "")
-            
-            result.Data["total_llm_calls"] += 1
-            result.Data["total_tokens"] += initial_llm_response.Data.get("total_tokens", 0)
-            result.Data["total_input_tokens"] += initial_llm_response.Data.get("total_input_tokens", 0)
-            result.Data["total_output_tokens"] += initial_llm_response.Data.get("total_output_tokens", 0)
-            result.Data["final_llm_response"] = initial_llm_response.Data.get("final_llm_response")
-            result.Data["llm_responses_arr"].append(initial_llm_response.Data.get("final_llm_response"))
+        if budget.check(result.Data):
+            return result
 
-            if streaming_callback and streaming_callback.get("is_stream"):
-                await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                    "Data": "Optimized Token LLM call Successfully Completed",
-                    "Error": None,
-                    "Status": True,
-                    "StreamingStatus": "IN-PROGRESS",
-                    "Action": "NOTIFICATION"
-                }))
-            
-            if extracted_result["isFunctionCall"]:
-                final_tool_calls = []
-                selected_tools = extracted_result["selectedTools"]
-                parsed_tools = json.loads(temp_tools)
-
-                for tool_name in selected_tools:
-                    matching_tool = next((t for t in parsed_tools if t.get("function", {}).get("name") == tool_name), None)
-                    if matching_tool:
-                        final_tool_calls.append(matching_tool)
-
-                client_details["prompt"] = temp_prompt
-                client_details["tools"] = final_tool_calls
-                
-
-                # Loop to handle multiple LLM calls and tool executions
-                while True:
-                    response = await azure_openai_processor(client_details)
-                    if not response.Status:
-                        result.Error = response.Error
-                        result.Status = response.Status
-                        return result
-
-                    result.Data["total_llm_calls"] += 1
-                    result.Data["total_tokens"] += response.Data.get("total_tokens", 0)
-                    result.Data["total_input_tokens"] += response.Data.get("total_input_tokens", 0)
-                    result.Data["total_output_tokens"] += response.Data.get("total_output_tokens", 0)
-                    result.Data["final_llm_response"] = response.Data.get("final_llm_response")
-                    result.Data["llm_responses_arr"].append(response.Data.get("final_llm_response"))
-
-                    if response.Data.get("output_type") == "text":
-                        result.Data["messages"].extend(response.Data.get("messages", []))
-                        result.Data["output_type"] = response.Data.get("output_type", "")
-                        result.Error = response.Error
-                        result.Status = response.Status
-
-                        for message in response.Data.get("messages", []):
-                            if streaming_callback and streaming_callback.get("is_stream"):
-                                await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                    "Data": message,
-                                    "Error": None,
-                                    "Status": True,
-                                    "StreamingStatus": "IN-PROGRESS",
-                                    "Action": "MESSAGE"
-                                }))
-                        return result
-
-                    if streaming_callback and streaming_callback.get("is_stream"):
-                        await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                            "Data": "Tool Calls Started",
-                            "Error": None,
-                            "Status": True,
-                            "StreamingStatus": "IN-PROGRESS",
-                            "Action": "NOTIFICATION"
-                        }))
-
-                    for tool in response.Data.get("final_llm_response", {}).get("choices", [{}])[0].get("message", {}).get("tool_calls", []):
-                        
-                        tool_name = tool.get("function", {}).get("name")
-                        args = json.loads(tool.get("function", {}).get("arguments", "{}"))
-
-
-                        if streaming_callback and streaming_callback.get("is_stream"):
-                            await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                "Data": f"{selected_server} MCP server {tool_name} call initiated",
-                                "Error": None,
-                                "Status": True,
-                                "StreamingStatus": "IN-PROGRESS",
-                                "Action": "NOTIFICATION"
-                            }))
-
-                        tool_call_result = await call_and_execute_tool(selected_server, selected_server_credentials, tool_name, args)
-
-                        if streaming_callback and streaming_callback.get("is_stream"):
-                            await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                "Data": f"{selected_server} MCP server {tool_name} call result  : {json.dumps(tool_call_result)}",
-                                "Error": None,
-                                "Status": True,
-                                "StreamingStatus": "IN-PROGRESS",
-                                "Action": "NOTIFICATION"
-                            }))
-
-                        result.Data["executed_tool_calls"].append({
-                            "id": tool.get("id"),
-                            "name": tool_name,
-                            "arguments": args,
-                            "result": tool_call_result,
-                        })
-
-                        tool_call_content_data = f"Executed tool: {tool_name} and the result is: {json.dumps(tool_call_result)}"
-                        client_details["chat_history"].append({
-                            "role": "assistant",
-                            "content": tool_call_content_data,
-                        })
-
-            else:
-                # No function call, normal response case
-                client_details["prompt"] = f"{temp_prompt}. Available tools: {json.dumps(tool_call_details_arr)}"
-                client_details["tools"] = []
-
-                normal_response = await azure_openai_processor(client_details)
-                result.Data["total_llm_calls"] += 1
-                result.Data["total_tokens"] += normal_response.Data.get("total_tokens", 0)
-                result.Data["total_input_tokens"] += normal_response.Data.get("total_input_tokens", 0)
-                result.Data["total_output_tokens"] += normal_response.Data.get("total_output_tokens", 0)
-                result.Data["final_llm_response"] = normal_response.Data.get("final_llm_response")
-                result.Data["llm_responses_arr"].append(normal_response.Data.get("final_llm_response"))
-
-                result.Data["output_type"] = normal_response.Data.get("output_type", "")
-                result.Error = normal_response.Error
-                result.Status = normal_response.Status
-
-                content = normal_response.Data.get("final_llm_response", {}).get("choices", [{}])[0].get("message", {}).get("content")
-                if not normal_response.Status or (content is not None and content != ""):
-                    result.Data["messages"] = normal_response.Data.get("messages", [])
-                    for message in normal_response.Data.get("messages", []):
-                        if streaming_callback and streaming_callback.get("is_stream"):
-                            await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                "Data": message,
-                                "Error": None,
-                                "Status": True,
-                                "StreamingStatus": "IN-PROGRESS",
-                                "Action": "MESSAGE"
-                            }))
-                    return result
-
-                if len(normal_response.Data.get("final_llm_response", {}).get("choices", [{}])[0].get("message", {}).get("tool_calls", [])) > 0:
-                    # Repeat the tool calling loop as in the TS code
-                    final_tool_calls = []
-                    selected_tools = extracted_result["selectedTools"]
-                    parsed_tools = json.loads(temp_tools)
-                    for tool_name in selected_tools:
-                        matching_tool = next((t for t in parsed_tools if t.get("function", {}).get("name") == tool_name), None)
-                        if matching_tool:
-                            final_tool_calls.append(matching_tool)
-
-                    client_details["prompt"] = temp_prompt
-                    client_details["tools"] = final_tool_calls
-
-                    while True:
-                        response = await azure_openai_processor(client_details)
-                        if not response.Status:
-                            result.Error = response.Error
-                            result.Status = response.Status
-                            return result
-
-                        result.Data["total_llm_calls"] += 1
-                        result.Data["total_tokens"] += response.Data.get("total_tokens", 0)
-                        result.Data["total_input_tokens"] += response.Data.get("total_input_tokens", 0)
-                        result.Data["total_output_tokens"] += response.Data.get("total_output_tokens", 0)
-                        result.Data["final_llm_response"] = response.Data.get("final_llm_response")
-                        result.Data["llm_responses_arr"].append(response.Data.get("final_llm_response"))
-
-                        if response.Data.get("output_type") == "text":
-                            result.Data["messages"].extend(response.Data.get("messages", []))
-                            result.Data["output_type"] = response.Data.get("output_type", "")
-                            result.Error = response.Error
-                            result.Status = response.Status
-
-                            for message in response.Data.get("messages", []):
-                                if streaming_callback and streaming_callback.get("is_stream"):
-                                    await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                        "Data": message,
-                                        "Error": None,
-                                        "Status": True,
-                                        "StreamingStatus": "IN-PROGRESS",
-                                        "Action": "MESSAGE"
-                                    }))
-                            return result
-
-                        if streaming_callback and streaming_callback.get("is_stream"):
-                            await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                "Data": "Tool Calls Started",
-                                "Error": None,
-                                "Status": True,
-                                "StreamingStatus": "IN-PROGRESS",
-                                "Action": "NOTIFICATION"
-                            }))
-
-                        for tool in response.Data.get("final_llm_response", {}).get("choices", [{}])[0].get("message", {}).get("tool_calls", []):
-                            tool_name = tool.get("function", {}).get("name")
-                            args = json.loads(tool.get("function", {}).get("arguments", "{}"))
-
-                            if streaming_callback and streaming_callback.get("is_stream"):
-                                await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                    "Data": f"{selected_server} MCP server {tool_name} call initiated",
-                                    "Error": None,
-                                    "Status": True,
-                                    "StreamingStatus": "IN-PROGRESS",
-                                    "Action": "NOTIFICATION"
-                                }))
-
-                            tool_call_result = await call_and_execute_tool(selected_server, selected_server_credentials, tool_name, args)
-
-                            if streaming_callback and streaming_callback.get("is_stream"):
-                                await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                    "Data": f"{selected_server} MCP server {tool_name} call result  : {json.dumps(tool_call_result)}",
-                                    "Error": None,
-                                    "Status": True,
-                                    "StreamingStatus": "IN-PROGRESS",
-                                    "Action": "NOTIFICATION"
-                                }))
-
-                            result.Data["executed_tool_calls"].append({
-                                "id": tool.get("id"),
-                                "name": tool_name,
-                                "arguments": args,
-                                "result": tool_call_result,
-                            })
-
-                            tool_call_content_data = f"Executed tool: {tool_name} and the result is: {json.dumps(tool_call_result)}"
-                            client_details["chat_history"].append({
-                                "role": "assistant",
-                                "content": tool_call_content_data,
-                            })
-        
-        elif selected_client == "MCP_CLIENT_OPENAI":
-
-            # Initial LLM call
-            initial_llm_response = await openai_processor(client_details)
-            if not initial_llm_response.Status:
-                result.Error = initial_llm_response.Error
-                result.Status = initial_llm_response.Status
-                return result
-            extracted_result = extract_data_from_response(initial_llm_response.Data.get("messages", [{}])[0] if initial_llm_response.Data else "")
-            
-            result.Data["total_llm_calls"] += 1
-            result.Data["total_tokens"] += initial_llm_response.Data.get("total_tokens", 0)
-            result.Data["total_input_tokens"] += initial_llm_response.Data.get("total_input_tokens", 0)
-            result.Data["total_output_tokens"] += initial_llm_response.Data.get("total_output_tokens", 0)
-            result.Data["final_llm_response"] = initial_llm_response.Data.get("final_llm_response")
-            result.Data["llm_responses_arr"].append(initial_llm_response.Data.get("final_llm_response"))
+        normal_response, response_adapter = await call_llm(adapter, client_details, streaming_callback)
+        if not normal_response.Status:
+            result.Error = normal_response.Error
+            result.Status = normal_response.Status
+            return result
 
-            if streaming_callback and streaming_callback.get("is_stream"):
-                await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                    "Data": "Optimized Token LLM call Successfully Completed",
-                    "Error": None,
-                    "Status": True,
-                    "StreamingStatus": "IN-PROGRESS",
-                    "Action": "NOTIFICATION"
-                }))
-            
-            if extracted_result["isFunctionCall"]:
-                final_tool_calls = []
-                selected_tools = extracted_result["selectedTools"]
-                parsed_tools = json.loads(temp_tools)
-
-                for tool_name in selected_tools:
-                    matching_tool = next((t for t in parsed_tools if t.get("function", {}).get("name") == tool_name), None)
-                    if matching_tool:
-                        final_tool_calls.append(matching_tool)
-
-                client_details["prompt"] = temp_prompt
-                client_details["tools"] = final_tool_calls
-                
-
-                # Loop to handle multiple LLM calls and tool executions
-                while True:
-                    response = await openai_processor(client_details)
-                    if not response.Status:
-                        result.Error = response.Error
-                        result.Status = response.Status
-                        return result
-
-                    result.Data["total_llm_calls"] += 1
-                    result.Data["total_tokens"] += response.Data.get("total_tokens", 0)
-                    result.Data["total_input_tokens"] += response.Data.get("total_input_tokens", 0)
-                    result.Data["total_output_tokens"] += response.Data.get("total_output_tokens", 0)
-                    result.Data["final_llm_response"] = response.Data.get("final_llm_response")
-                    result.Data["llm_responses_arr"].append(response.Data.get("final_llm_response"))
-
-                    if response.Data.get("output_type") == "text":
-                        result.Data["messages"].extend(response.Data.get("messages", []))
-                        result.Data["output_type"] = response.Data.get("output_type", "")
-                        result.Error = response.Error
-                        result.Status = response.Status
-
-                        for message in response.Data.get("messages", []):
-                            if streaming_callback and streaming_callback.get("is_stream"):
-                                await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                    "Data": message,
-                                    "Error": None,
-                                    "Status": True,
-                                    "StreamingStatus": "IN-PROGRESS",
-                                    "Action": "MESSAGE"
-                                }))
-                        return result
-
-                    if streaming_callback and streaming_callback.get("is_stream"):
-                        await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                            "Data": "Tool Calls Started",
-                            "Error": None,
-                            "Status": True,
-                            "StreamingStatus": "IN-PROGRESS",
-                            "Action": "NOTIFICATION"
-                        }))
-
-                    for tool in response.Data.get("final_llm_response", {}).get("choices", [{}])[0].get("message", {}).get("tool_calls", []):
-                        
-                        tool_name = tool.get("function", {}).get("name")
-                        args = json.loads(tool.get("function", {}).get("arguments", "{}"))
-
-
-                        if streaming_callback and streaming_callback.get("is_stream"):
-                            await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                "Data": f"{selected_server} MCP server {tool_name} call initiated",
-                                "Error": None,
-                                "Status": True,
-                                "StreamingStatus": "IN-PROGRESS",
-                                "Action": "NOTIFICATION"
-                            }))
-
-                        tool_call_result = await call_and_execute_tool(selected_server, selected_server_credentials, tool_name, args)
-
-                        if streaming_callback and streaming_callback.get("is_stream"):
-                            await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                "Data": f"{selected_server} MCP server {tool_name} call result  : {json.dumps(tool_call_result)}",
-                                "Error": None,
-                                "Status": True,
-                                "StreamingStatus": "IN-PROGRESS",
-                                "Action": "NOTIFICATION"
-                            }))
-
-                        result.Data["executed_tool_calls"].append({
-                            "id": tool.get("id"),
-                            "name": tool_name,
-                            "arguments": args,
-                            "result": tool_call_result,
-                        })
-
-                        tool_call_content_data = f"Executed tool: {tool_name} and the result is: {json.dumps(tool_call_result)}"
-                        client_details["chat_history"].append({
-                            "role": "assistant",
-                            "content": tool_call_content_data,
-                        })
-
-            else:
-                # No function call, normal response case
-                client_details["prompt"] = f"{temp_prompt}. Available tools: {json.dumps(tool_call_details_arr)}"
-                client_details["tools"] = []
-
-                normal_response = await openai_processor(client_details)
-                result.Data["total_llm_calls"] += 1
-                result.Data["total_tokens"] += normal_response.Data.get("total_tokens", 0)
-                result.Data["total_input_tokens"] += normal_response.Data.get("total_input_tokens", 0)
-                result.Data["total_output_tokens"] += normal_response.Data.get("total_output_tokens", 0)
-                result.Data["final_llm_response"] = normal_response.Data.get("final_llm_response")
-                result.Data["llm_responses_arr"].append(normal_response.Data.get("final_llm_response"))
-
-                result.Data["output_type"] = normal_response.Data.get("output_type", "")
-                result.Error = normal_response.Error
-                result.Status = normal_response.Status
-
-                content = normal_response.Data.get("final_llm_response", {}).get("choices", [{}])[0].get("message", {}).get("content")
-                if not normal_response.Status or (content is not None and content != ""):
-                    result.Data["messages"] = normal_response.Data.get("messages", [])
-                    for message in normal_response.Data.get("messages", []):
-                        if streaming_callback and streaming_callback.get("is_stream"):
-                            await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                "Data": message,
-                                "Error": None,
-                                "Status": True,
-                                "StreamingStatus": "IN-PROGRESS",
-                                "Action": "MESSAGE"
-                            }))
-                    return result
-
-                if len(normal_response.Data.get("final_llm_response", {}).get("choices", [{}])[0].get("message", {}).get("tool_calls", [])) > 0:
-                    # Repeat the tool calling loop as in the TS code
-                    final_tool_calls = []
-                    selected_tools = extracted_result["selectedTools"]
-                    parsed_tools = json.loads(temp_tools)
-                    for tool_name in selected_tools:
-                        matching_tool = next((t for t in parsed_tools if t.get("function", {}).get("name") == tool_name), None)
-                        if matching_tool:
-                            final_tool_calls.append(matching_tool)
-
-                    client_details["prompt"] = temp_prompt
-                    client_details["tools"] = final_tool_calls
-
-                    while True:
-                        response = await openai_processor(client_details)
-                        if not response.Status:
-                            result.Error = response.Error
-                            result.Status = response.Status
-                            return result
-
-                        result.Data["total_llm_calls"] += 1
-                        result.Data["total_tokens"] += response.Data.get("total_tokens", 0)
-                        result.Data["total_input_tokens"] += response.Data.get("total_input_tokens", 0)
-                        result.Data["total_output_tokens"] += response.Data.get("total_output_tokens", 0)
-                        result.Data["final_llm_response"] = response.Data.get("final_llm_response")
-                        result.Data["llm_responses_arr"].append(response.Data.get("final_llm_response"))
-
-                        if response.Data.get("output_type") == "text":
-                            result.Data["messages"].extend(response.Data.get("messages", []))
-                            result.Data["output_type"] = response.Data.get("output_type", "")
-                            result.Error = response.Error
-                            result.Status = response.Status
-
-                            for message in response.Data.get("messages", []):
-                                if streaming_callback and streaming_callback.get("is_stream"):
-                                    await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                        "Data": message,
-                                        "Error": None,
-                                        "Status": True,
-                                        "StreamingStatus": "IN-PROGRESS",
-                                        "Action": "MESSAGE"
-                                    }))
-                            return result
-
-                        if streaming_callback and streaming_callback.get("is_stream"):
-                            await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                "Data": "Tool Calls Started",
-                                "Error": None,
-                                "Status": True,
-                                "StreamingStatus": "IN-PROGRESS",
-                                "Action": "NOTIFICATION"
-                            }))
-
-                        for tool in response.Data.get("final_llm_response", {}).get("choices", [{}])[0].get("message", {}).get("tool_calls", []):
-                            tool_name = tool.get("function", {}).get("name")
-                            args = json.loads(tool.get("function", {}).get("arguments", "{}"))
-
-                            if streaming_callback and streaming_callback.get("is_stream"):
-                                await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                    "Data": f"{selected_server} MCP server {tool_name} call initiated",
-                                    "Error": None,
-                                    "Status": True,
-                                    "StreamingStatus": "IN-PROGRESS",
-                                    "Action": "NOTIFICATION"
-                                }))
-
-                            tool_call_result = await call_and_execute_tool(selected_server, selected_server_credentials, tool_name, args)
-
-                            if streaming_callback and streaming_callback.get("is_stream"):
-                                await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                    "Data": f"{selected_server} MCP server {tool_name} call result  : {json.dumps(tool_call_result)}",
-                                    "Error": None,
-                                    "Status": True,
-                                    "StreamingStatus": "IN-PROGRESS",
-                                    "Action": "NOTIFICATION"
-                                }))
-
-                            result.Data["executed_tool_calls"].append({
-                                "id": tool.get("id"),
-                                "name": tool_name,
-                                "arguments": args,
-                                "result": tool_call_result,
-                            })
-
-                            tool_call_content_data = f"Executed tool: {tool_name} and the result is: {json.dumps(tool_call_result)}"
-                            client_details["chat_history"].append({
-                                "role": "assistant",
-                                "content": tool_call_content_data,
-                            })
-        
-        elif selected_client == "MCP_CLIENT_GEMINI":
-
-            # Initial LLM call
-            initial_llm_response = await gemini_processor(client_details)
-            print("Initial LLM response:", initial_llm_response)
-            if not initial_llm_response.Status:
-                result.Error = initial_llm_response.Error
-                result.Status = initial_llm_response.Status
-                return result
-            extracted_result = extract_data_from_response(initial_llm_response.Data.get("messages", [{}])[0] if initial_llm_response.Data else "")
-            result.Data["total_llm_calls"] += 1
-            result.Data["total_tokens"] += initial_llm_response.Data.get("total_tokens", 0)
-            result.Data["total_input_tokens"] += initial_llm_response.Data.get("total_input_tokens", 0)
-            result.Data["total_output_tokens"] += initial_llm_response.Data.get("total_output_tokens", 0)
-            result.Data["final_llm_response"] = initial_llm_response.Data.get("final_llm_response")
-            result.Data["llm_responses_arr"].append(initial_llm_response.Data.get("final_llm_response"))
+        record_llm_response(response_adapter, result, normal_response)
+        result.Data["output_type"] = normal_response.Data.get("output_type", "")
+        result.Error = normal_response.Error
+        result.Status = normal_response.Status
 
-            if streaming_callback and streaming_callback.get("is_stream"):
-                await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                    "Data": "Optimized Token LLM call Successfully Completed",
-                    "Error": None,
-                    "Status": True,
-                    "StreamingStatus": "IN-PROGRESS",
-                    "Action": "NOTIFICATION"
-                }))
-            
-            if extracted_result["isFunctionCall"]:
-                final_tool_calls = []
-                selected_tools = extracted_result["selectedTools"]
-                parsed_tools = json.loads(temp_tools)
-
-                for tool_name in selected_tools:
-                    matching_tool = next((t for t in parsed_tools if t.get("function", {}).get("name") == tool_name), None)
-                    if matching_tool:
-                        final_tool_calls.append(matching_tool)
-
-                client_details["prompt"] = temp_prompt
-                client_details["tools"] = final_tool_calls
-
-                # Loop to handle multiple LLM calls and tool executions
-                count=1
-                while True:
-                    if count==3:
-                        result.Error = "Maximum LLM calls went into halucination"
-                        result.Status = response.Status
-                        return result
-                    
-                    if count != 1:
-                         client_details["tools"] = []
-                    
-                    response = await gemini_processor(client_details)
-                    print(response)
-                    if not response.Status:
-                        result.Error = response.Error
-                        result.Status = response.Status
-                        return result
-
-                    result.Data["total_llm_calls"] += 1
-                    result.Data["total_tokens"] += response.Data.get("total_tokens", 0)
-                    result.Data["total_input_tokens"] += response.Data.get("total_input_tokens", 0)
-                    result.Data["total_output_tokens"] += response.Data.get("total_output_tokens", 0)
-                    result.Data["final_llm_response"] = response.Data.get("final_llm_response")
-                    result.Data["llm_responses_arr"].append(response.Data.get("final_llm_response"))
-
-                    if response.Data.get("output_type") == "text":
-                        result.Data["messages"].extend(response.Data.get("messages", []))
-                        result.Data["output_type"] = response.Data.get("output_type", "")
-                        result.Error = response.Error
-                        result.Status = response.Status
-
-                        for message in response.Data.get("messages", []):
-                            if streaming_callback and streaming_callback.get("is_stream"):
-                                await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                    "Data": message,
-                                    "Error": None,
-                                    "Status": True,
-                                    "StreamingStatus": "IN-PROGRESS",
-                                    "Action": "MESSAGE"
-                                }))
-                        return result
-
-                    if streaming_callback and streaming_callback.get("is_stream"):
-                        await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                            "Data": "Tool Calls Started",
-                            "Error": None,
-                            "Status": True,
-                            "StreamingStatus": "IN-PROGRESS",
-                            "Action": "NOTIFICATION"
-                        }))
-
-                    final_llm_response = response.Data.get("final_llm_response") if response.Data else None
-                    candidates = final_llm_response.get("candidates", []) if final_llm_response else []
-                    first_candidate = candidates[0] if candidates and len(candidates) > 0 else {}
-                    content = first_candidate.get("content", {}) if isinstance(first_candidate, dict) else {}
-                    parts = content.get("parts", []) if isinstance(content, dict) else []
-                    
-                    for tool in parts:
-
-                        tool_name = tool.get("functionCall", {}).get("name")
-                        args_raw = tool.get("functionCall", {}).get("args", {})
-
-                        if isinstance(args_raw, str):
-                            try:
-                                 args = json.loads(args_raw)
-                            except json.JSONDecodeError as e:
-                                 args = {}
-                        else:
-                            args = args_raw
-
-                        if streaming_callback and streaming_callback.get("is_stream"):
-                            await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                "Data": f"{selected_server} MCP server {tool_name} call initiated",
-                                "Error": None,
-                                "Status": True,
-                                "StreamingStatus": "IN-PROGRESS",
-                                "Action": "NOTIFICATION"
-                            }))
-                        tool_call_result = await call_and_execute_tool(selected_server, selected_server_credentials, tool_name, args)
-
-                        if streaming_callback and streaming_callback.get("is_stream"):
-                            await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                "Data": f"{selected_server} MCP server {tool_name} call result  : {json.dumps(tool_call_result)}",
-                                "Error": None,
-                                "Status": True,
-                                "StreamingStatus": "IN-PROGRESS",
-                                "Action": "NOTIFICATION"
-                            }))
-
-
-                        result.Data["executed_tool_calls"].append({
-                            "id": tool.get("id"),
-                            "name": tool_name,
-                            "arguments": args,
-                            "result": tool_call_result,
-                        })
-
-                        tool_call_content_data = f"Executed tool: {tool_name} and the result is: {json.dumps(tool_call_result)}"
-                        client_details["chat_history"].append({
-                            "role": "model",
-                            "content": tool_call_content_data,
-                        })
-
-                    count+=1
-            else:
-                # No function call, normal response case
-                client_details["prompt"] = f"{temp_prompt}. Available tools: {json.dumps(tool_call_details_arr)}"
-                client_details["tools"] = []
-
-                normal_response = await gemini_processor(client_details)
-                result.Data["total_llm_calls"] += 1
-                result.Data["total_tokens"] += normal_response.Data.get("total_tokens", 0)
-                result.Data["total_input_tokens"] += normal_response.Data.get("total_input_tokens", 0)
-                result.Data["total_output_tokens"] += normal_response.Data.get("total_output_tokens", 0)
-                result.Data["final_llm_response"] = normal_response.Data.get("final_llm_response")
-                result.Data["llm_responses_arr"].append(normal_response.Data.get("final_llm_response"))
-
-                result.Data["output_type"] = normal_response.Data.get("output_type", "")
-                result.Error = normal_response.Error
-                result.Status = normal_response.Status
-
-                final_llm_response = normal_response.Data.get("final_llm_response") if normal_response.Data else None
-                candidates = final_llm_response.get("candidates", []) if final_llm_response else []
-                first_candidate = candidates[0] if candidates and len(candidates) > 0 else {}
-                content = first_candidate.get("content", {}) if isinstance(first_candidate, dict) else {}
-                parts = content.get("parts", []) if isinstance(content, dict) else []
-
-                text_content = content.get("text")
-
-                if not normal_response.Status or (text_content is not None and text_content != ""):
-                    result.Data["messages"] = normal_response.Data.get("messages", [])
-                    for message in normal_response.Data.get("messages", []):
-                        if streaming_callback and streaming_callback.get("is_stream"):
-                            await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                "Data": message,
-                                "Error": None,
-                                "Status": True,
-                                "StreamingStatus": "IN-PROGRESS",
-                                "Action": "MESSAGE"
-                            }))
-                    return result
-
-                if len(parts) > 0:
-                    # Repeat the tool calling loop as in the TS code
-                    final_tool_calls = []
-                    selected_tools = extracted_result["selectedTools"]
-                    parsed_tools = json.loads(temp_tools)
-                    for tool_name in selected_tools:
-                        matching_tool = next((t for t in parsed_tools if t.get("function", {}).get("name") == tool_name), None)
-                        if matching_tool:
-                            final_tool_calls.append(matching_tool)
-
-                    client_details["prompt"] = temp_prompt
-                    client_details["tools"] = final_tool_calls
-
-                    count=1
-                    while True:
-                        if count==3:
-                            result.Error = "Maximum LLM calls went into halucination"
-                            result.Status = False
-                            return result
-                    
-                        if count != 1:
-                            client_details["tools"] = []
-
-                        response = await gemini_processor(client_details)
-                        if not response.Status:
-                            result.Error = response.Error
-                            result.Status = response.Status
-                            return result
-
-                        result.Data["total_llm_calls"] += 1
-                        result.Data["total_tokens"] += response.Data.get("total_tokens", 0)
-                        result.Data["total_input_tokens"] += response.Data.get("total_input_tokens", 0)
-                        result.Data["total_output_tokens"] += response.Data.get("total_output_tokens", 0)
-                        result.Data["final_llm_response"] = response.Data.get("final_llm_response")
-                        result.Data["llm_responses_arr"].append(response.Data.get("final_llm_response"))
-
-                        if response.Data.get("output_type") == "text":
-                            result.Data["messages"].extend(response.Data.get("messages", []))
-                            result.Data["output_type"] = response.Data.get("output_type", "")
-                            result.Error = response.Error
-                            result.Status = response.Status
-
-                            for message in response.Data.get("messages", []):
-                                if streaming_callback and streaming_callback.get("is_stream"):
-                                    await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                        "Data": message,
-                                        "Error": None,
-                                        "Status": True,
-                                        "StreamingStatus": "IN-PROGRESS",
-                                        "Action": "MESSAGE"
-                                    }))
-                            return result
-
-                        if streaming_callback and streaming_callback.get("is_stream"):
-                            await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                "Data": "Tool Calls Started",
-                                "Error": None,
-                                "Status": True,
-                                "StreamingStatus": "IN-PROGRESS",
-                                "Action": "NOTIFICATION"
-                            }))
-
-                        final_llm_response = response.Data.get("final_llm_response") if response.Data else None
-                        candidates = final_llm_response.get("candidates", []) if final_llm_response else []
-                        first_candidate = candidates[0] if candidates and len(candidates) > 0 else {}
-                        content = first_candidate.get("content", {}) if isinstance(first_candidate, dict) else {}
-                        parts = content.get("parts", []) if isinstance(content, dict) else []
-
-                        for tool in parts:
-
-                            tool_name = tool.get("functionCall", {}).get("name")
-                            args_raw = tool.get("functionCall", {}).get("args", {})
-
-                            if isinstance(args_raw, str):
-                                try:
-                                    args = json.loads(args_raw)
-                                except json.JSONDecodeError as e:
-                                    args = {}
-                            else:
-                                args = args_raw
-
-                            if streaming_callback and streaming_callback.get("is_stream"):
-                                await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                    "Data": f"{selected_server} MCP server {tool_name} call initiated",
-                                    "Error": None,
-                                    "Status": True,
-                                    "StreamingStatus": "IN-PROGRESS",
-                                    "Action": "NOTIFICATION"
-                                }))
-
-                            tool_call_result = await call_and_execute_tool(selected_server, selected_server_credentials, tool_name, args)
-
-                            if streaming_callback and streaming_callback.get("is_stream"):
-                                await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                    "Data": f"{selected_server} MCP server {tool_name} call result  : {json.dumps(tool_call_result)}",
-                                    "Error": None,
-                                    "Status": True,
-                                    "StreamingStatus": "IN-PROGRESS",
-                                    "Action": "NOTIFICATION"
-                                }))
-
-
-                            result.Data["executed_tool_calls"].append({
-                                "id": tool.get("id"),
-                                "name": tool_name,
-                                "arguments": args,
-                                "result": tool_call_result,
-                            })
-
-                            tool_call_content_data = f"Executed tool: {tool_name} and the result is: {json.dumps(tool_call_result)}"
-                            client_details["chat_history"].append({
-                                "role": "model",
-                                "content": tool_call_content_data,
-                            })
-
-                        count+=1    
-
-        result.Status = True
-        return result
+        final_llm_response = normal_response.Data.get("final_llm_response")
+        if response_adapter.get_text(final_llm_response):
+            result.Data["messages"] = normal_response.Data.get("messages", [])
+            await stream_messages(result.Data["messages"], streaming_callback)
+            return result
+
+        if not response_adapter.get_tool_calls(final_llm_response):
+            return result
+
+        # The model asked for tools anyway, repeat with the tool calling loop
+
+    tools_by_name = {get_tool_name(tool): tool for tool in reversed(original_tools)}
+    final_tool_calls = [tools_by_name[name] for name in extracted_result["selectedTools"] if name in tools_by_name]
+
+    client_details["prompt"] = temp_prompt
+    client_details["tools"] = final_tool_calls
+
+    return await run_tool_loop(adapter, client_details, selected_server, selected_server_credentials, result, budget, streaming_callback)
 
-    except Exception as e:
-        logging.error(f"Exception in client_and_server_execution: {e}")
-        res = ClientAndServerExecutionResponse()
-        res.Error = str(e)
-        res.Status = False
-        return res
+
+async def run_tool_loop(
+    adapter: ProviderAdapter,
+    client_details: Dict[str, Any],
+    selected_server: str,
+    credentials: Any,
+    result: ClientAndServerExecutionResponse,
+    budget: ExecutionBudget,
+    streaming_callback: Optional[Any] = None
+) -> ClientAndServerExecutionResponse:
+    """LLM call -> tool calls -> LLM call ... until the model answers with text
+    or the request budget runs out."""
+    llm_calls = 0
+    while True:
+        if budget.check(result.Data):
+            return result
+
+        if adapter.max_tool_loop_llm_calls is not None and llm_calls >= adapter.max_tool_loop_llm_calls:
+            result.Error = "Maximum LLM calls went into halucination"
+            result.Status = False
+            return result
+
+        if adapter.tools_on_first_call_only and llm_calls > 0:
+            client_details["tools"] = []
+
+        response, response_adapter = await call_llm(adapter, client_details, streaming_callback)
+        llm_calls += 1
+        if not response.Status:
+            result.Error = response.Error
+            result.Status = response.Status
+            return result
+
+        record_llm_response(response_adapter, result, response)
+
+        if response.Data.get("output_type") == "text":
+            result.Data["messages"].extend(response.Data.get("messages", []))
+            result.Data["output_type"] = response.Data.get("output_type", "")
+            result.Error = response.Error
+            result.Status = response.Status
+            await stream_messages(response.Data.get("messages", []), streaming_callback)
+            return result
+
+        if streaming_callback and streaming_callback.get("is_stream"):
+            await streaming_callback["streamCallbacks"].on_data(json_codec.dumps({
+                "Data": "Tool Calls Started",
+                "Error": None,
+                "Status": True,
+                "StreamingStatus": "IN-PROGRESS",
+                "Action": "NOTIFICATION"
+            }))
+
+        tool_calls = response_adapter.get_tool_calls(response.Data.get("final_llm_response"))
+        remaining_tool_calls = budget.remaining_tool_calls(result.Data)
+        if remaining_tool_calls is not None and len(tool_calls) > remaining_tool_calls:
+            # Run what still fits, the next turn stops the loop
+            tool_calls = tool_calls[:remaining_tool_calls]
+            budget.exhausted = "max_tool_calls"
+
+        executed_tool_calls = await execute_tool_calls(selected_server, credentials, tool_calls, streaming_callback)
+        for executed_tool_call, compacted_result in await compact_tool_results_async(executed_tool_calls):
+            result.Data["executed_tool_calls"].append(executed_tool_call)
+
+            tool_call_content_data = f"Executed tool: {executed_tool_call['name']} and the result is: {compacted_result}"
+            client_details["chat_history"].append({
+                "role": adapter.history_role,
+                "content": tool_call_content_data,
+            })
+
+
+def record_llm_response(adapter: ProviderAdapter, result: ClientAndServerExecutionResponse, response: Any):
+    """Add one successful LLM call to the usage totals and response history."""
+    usage = adapter.get_usage(response.Data)
+    result.Data["total_llm_calls"] += 1
+    result.Data["total_tokens"] += usage["total_tokens"]
+    result.Data["total_input_tokens"] += usage["total_input_tokens"]
+    result.Data["total_output_tokens"] += usage["total_output_tokens"]
+    result.Data["final_llm_response"] = response.Data.get("final_llm_response")
+    result.Data["llm_responses_arr"].append(response.Data.get("final_llm_response"))
+
+
+async def stream_messages(messages: List[Any], streaming_callback: Optional[Any] = None):
+    if not (streaming_callback and streaming_callback.get("is_stream")):
+        return
+    for message in messages:
+        await streaming_callback["streamCallbacks"].on_data(json_codec.dumps({
+            "Data": message,
+            "Error": None,
+            "Status": True,
+            "StreamingStatus": "IN-PROGRESS",
+            "Action": "MESSAGE"
+        }))
+
+
+@tracing.traced("llm.router")
+async def select_tools(
+    adapter: ProviderAdapter,
+    selected_client: str,
+    selected_servers: List[str],
+    client_details: Dict[str, Any],
+    tool_call_details_arr: List[Dict[str, Any]],
+    result: ClientAndServerExecutionResponse,
+    streaming_callback: Optional[Any] = None
+) -> Optional[Dict[str, Any]]:
+    """Router LLM call choosing the tools for a request, skipped on a router cache hit.
+
+    Returns the extracted decision, or None after recording the LLM error in result.
+    """
+    cache_key = router_cache_key(selected_client, selected_servers, client_details, [t["function_name"] for t in tool_call_details_arr])
+    extracted_result = get_router_decision(cache_key)
+    if extracted_result is not None:
+        result.Data["router_cache_hit"] = True
+        if streaming_callback and streaming_callback.get("is_stream"):
+            await streaming_callback["streamCallbacks"].on_data(json_codec.dumps({
+                "Data": "Tool selection served from cache",
+                "Error": None,
+                "Status": True,
+                "StreamingStatus": "IN-PROGRESS",
+                "Action": "NOTIFICATION"
+            }))
+        return extracted_result
+
+    initial_llm_response, response_adapter = await call_llm(adapter, client_details)
+    if not initial_llm_response.Status:
+        result.Error = initial_llm_response.Error
+        result.Status = initial_llm_response.Status
+        return None
+    extracted_result = extract_data_from_response(initial_llm_response.Data.get("messages", [{}])[0] if initial_llm_response.Data else "")
+    set_router_decision(cache_key, extracted_result)
+
+    record_llm_response(response_adapter, result, initial_llm_response)
+
+    if streaming_callback and streaming_callback.get("is_stream"):
+        await streaming_callback["streamCallbacks"].on_data(json_codec.dumps({
+            "Data": "Optimized Token LLM call Successfully Completed",
+            "Error": None,
+            "Status": True,
+            "StreamingStatus": "IN-PROGRESS",
+            "Action": "NOTIFICATION"
+        }))
+    return extracted_result
 
 
 def extract_data_from_response(message: Any) -> Dict[str, Any]:
@@ -886,6 +328,61 @@ def extract_data_from_response(message: Any) -> Dict[str, Any]:
     }
 
 
+def get_tool_call_semaphore(selected_server: str) -> asyncio.Semaphore:
+    semaphore = _tool_call_semaphores.get(selected_server)
+    if semaphore is None:
+        server_config = next((s for s in ServersConfig if s["server_name"] == selected_server), {})
+        semaphore = asyncio.Semaphore(server_config.get("max_concurrent_tool_calls", DEFAULT_MAX_CONCURRENT_TOOL_CALLS))
+        _tool_call_semaphores[selected_server] = semaphore
+    return semaphore
+
+
+async def execute_tool_calls(
+    selected_server: str,
+    credentials: Any,
+    tool_calls: List[Dict[str, Any]],
+    streaming_callback: Optional[Any] = None
+) -> List[Dict[str, Any]]:
+    """Run the tool calls of one LLM turn concurrently, capped per server.
+
+    Each call is reported on the stream as it starts and finishes; the
+    returned list keeps the order in which the model emitted the calls.
+    """
+    semaphore = get_tool_call_semaphore(selected_server)
+
+    async def run_tool_call(tool_call: Dict[str, Any]) -> Dict[str, Any]:
+        tool_name = tool_call["name"]
+        async with semaphore:
+            if streaming_callback and streaming_callback.get("is_stream"):
+                await streaming_callback["streamCallbacks"].on_data(json_codec.dumps({
+                    "Data": f"{selected_server} MCP server {tool_name} call initiated",
+                    "Error": None,
+                    "Status": True,
+                    "StreamingStatus": "IN-PROGRESS",
+                    "Action": "NOTIFICATION"
+                }))
+
+            tool_call_result = await call_and_execute_tool(selected_server, credentials, tool_name, tool_call["arguments"])
+
+            if streaming_callback and streaming_callback.get("is_stream"):
+                await streaming_callback["streamCallbacks"].on_data(json_codec.dumps({
+                    "Data": f"{selected_server} MCP server {tool_name} call result  : {json_codec.dumps(tool_call_result)}",
+                    "Error": None,
+                    "Status": True,
+                    "StreamingStatus": "IN-PROGRESS",
+                    "Action": "NOTIFICATION"
+                }))
+
+        return {
+            "id": tool_call.get("id"),
+            "name": tool_name,
+            "arguments": tool_call["arguments"],
+            "result": tool_call_result,
+        }
+
+    return list(await asyncio.gather(*[run_tool_call(tool_call) for tool_call in tool_calls]))
+
+
 async def call_and_execute_tool(
     selected_server: str,
     credentials: Any,
@@ -933,15 +430,14 @@ async def call_and_execute_tool(
 
     try:
         # perform the tool call
-        raw_result = await client.call_tool(tool_name, args)
+        with tracing.span("mcp.call_tool", {"mcp.server": selected_server, "mcp.tool": tool_name}) as tool_span:
+            raw_result = await client.call_tool(tool_name, args)
+            if getattr(raw_result, "isError", False):
+                tracing.set_error(tool_span, "Tool returned an error result")
         
-        # try to JSON-serialize it
+        # MCP results are pydantic models, converted to plain dicts directly
         try:
-            # this will recurse into __dict__ for any object
-            serialized = json.loads(
-                json.dumps(raw_result, default=lambda o: getattr(o, "__dict__", str(o)))
-            )
-            tool_call_result = serialized
+            tool_call_result = json_codec.to_jsonable(raw_result)
         except (TypeError, ValueError):
             # fallback to string
             tool_call_result = str(raw_result)
@@ -1,9 +1,12 @@
 from typing import Dict, Any, Callable, Optional
 
 from src.server_connection import MCPServers
+from src.tool_catalog import get_catalog_tools, refresh_tool_catalog
 from src.client_and_server_config import ServersConfig, ClientsConfig
+from src import tracing
 
 
+@tracing.traced("gateway.validation")
 async def client_and_server_validation(payload: Dict[str, Any], streaming_callback: Optional[Callable] = None):
     try:
         selected_server_credentials = payload.get("selected_server_credentials")
@@ -38,23 +41,12 @@ async def client_and_server_validation(payload: Dict[str, Any], streaming_callba
 
         tools_arr = []
         for server in selected_servers:
-   
-            resource = await MCPServers[server].list_tools()
-            if resource:
-                for tool in resource.tools:
-                    tool_dict = {
-                        "type": "function",
-                        "function": {
-                            "name": tool.name,
-                            "description": getattr(tool, "description", f"Tool for {tool.name}"),
-                            "parameters": getattr(tool, "inputSchema", {
-                                "type": "object",
-                                "properties": {},
-                                "required": []
-                            })
-                        }
-                    }
-                    tools_arr.append(tool_dict)
+            server_tools = get_catalog_tools(server, selected_client)
+            if server_tools is None:
+                # Catalog was invalidated, rebuild it from the server
+                await refresh_tool_catalog(server, MCPServers[server])
+                server_tools = get_catalog_tools(server, selected_client) or []
+            tools_arr.extend(server_tools)
 
         client_details["tools"] = tools_arr
 
@@ -0,0 +1,59 @@
+import time
+from typing import Dict, Any, Optional
+
+from src.client_and_server_config import ExecutionBudgetConfig
+
+BUDGET_LIMITS = ("max_llm_calls", "max_tool_calls", "max_total_tokens", "timeout")
+
+
+class ExecutionBudget:
+    """Per-request limits on LLM calls, tool calls, tokens and wall-clock time.
+
+    Usage is read from the execution result's Data, so the budget only keeps
+    the limits and the deadline. A request can tighten the configured limits
+    through client_details["budget"] but not raise them.
+    """
+
+    def __init__(self, overrides: Optional[Dict[str, Any]] = None):
+        self.limits: Dict[str, Optional[float]] = {}
+        for name in BUDGET_LIMITS:
+            limit = ExecutionBudgetConfig.get(name)
+            override = (overrides or {}).get(name)
+            if isinstance(override, (int, float)) and not isinstance(override, bool) and override > 0:
+                limit = override if limit is None else min(limit, override)
+            self.limits[name] = limit
+
+        self.started_at = time.monotonic()
+        self.deadline = self.started_at + self.limits["timeout"] if self.limits["timeout"] else None
+        self.exhausted: Optional[str] = None
+
+    def remaining_time(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def remaining_tool_calls(self, data: Dict[str, Any]) -> Optional[int]:
+        if self.limits["max_tool_calls"] is None:
+            return None
+        return max(0, int(self.limits["max_tool_calls"]) - len(data["executed_tool_calls"]))
+
+    def check(self, data: Dict[str, Any]) -> Optional[str]:
+        """Name of the first exhausted limit before another LLM call, or None."""
+        if self.limits["max_llm_calls"] is not None and data["total_llm_calls"] >= self.limits["max_llm_calls"]:
+            self.exhausted = "max_llm_calls"
+        elif self.limits["max_total_tokens"] is not None and data["total_tokens"] >= self.limits["max_total_tokens"]:
+            self.exhausted = "max_total_tokens"
+        elif self.remaining_time() == 0:
+            self.exhausted = "timeout"
+        return self.exhausted
+
+    def usage(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Limits, usage and the exhausted limit for the response Data."""
+        return {
+            "limits": dict(self.limits),
+            "llm_calls": data["total_llm_calls"],
+            "tool_calls": len(data["executed_tool_calls"]),
+            "total_tokens": data["total_tokens"],
+            "elapsed": round(time.monotonic() - self.started_at, 3),
+            "exhausted": self.exhausted
+        }
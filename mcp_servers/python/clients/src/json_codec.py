@@ -0,0 +1,51 @@
+import json
+from typing import Any
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+def _default(value: Any) -> Any:
+    """Fallback for values the encoder does not know, e.g. MCP result objects."""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    # Exceptions have an empty __dict__, their message is what callers need
+    if isinstance(value, BaseException):
+        return str(value)
+    return getattr(value, "__dict__", str(value))
+
+
+def dumps(value: Any, sort_keys: bool = False) -> str:
+    """Compact JSON text: orjson when installed, the standard library otherwise."""
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return orjson.dumps(value, default=_default, option=option).decode("utf-8")
+        except TypeError:
+            # e.g. integers above 64 bits, which orjson rejects
+            pass
+    return json.dumps(value, default=_default, sort_keys=sort_keys, separators=(",", ":"), ensure_ascii=False)
+
+
+def loads(data: Any) -> Any:
+    """Parse JSON text or bytes."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def to_jsonable(value: Any) -> Any:
+    """Plain dicts/lists for a value, converting pydantic models (MCP results) directly."""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, dict) and all(isinstance(key, str) for key in value):
+        if all(isinstance(item, (str, int, float, bool)) or item is None for item in value.values()):
+            return value
+    # Anything nested or unknown goes through one encode/decode
+    return loads(dumps(value))
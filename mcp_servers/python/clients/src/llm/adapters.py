@@ -0,0 +1,113 @@
+from typing import Dict, List, Any, Optional, Callable, Awaitable
+
+from src import json_codec
+from src.llm.azureopenai import azure_openai_processor
+from src.llm.openai import openai_processor
+from src.llm.gemini import gemini_processor
+from src.llm.rate_limiter import call_with_rate_limit
+
+
+class ProviderAdapter:
+    """What the execution engine needs to know about one LLM provider.
+
+    The processor builds and sends the request and normalizes usage into the
+    SuccessResponseDataFormat fields; the adapter reads the provider specific
+    final_llm_response and carries the provider's loop quirks.
+    """
+
+    # Role of the tool result messages added to chat_history
+    history_role = "assistant"
+    # Maximum LLM calls in one tool loop, None for no provider limit
+    max_tool_loop_llm_calls: Optional[int] = None
+    # Send the tools only with the first call of a tool loop
+    tools_on_first_call_only = False
+
+    def __init__(self, name: str, processor: Callable[..., Awaitable[Any]]):
+        self.name = name
+        self.processor = processor
+
+    async def call(self, client_details: Dict[str, Any], streaming_callback: Optional[Any] = None, max_retries: Optional[int] = None) -> Any:
+        """Processor call within the endpoint's rate limits, with retries."""
+        return await call_with_rate_limit(self.name, self.processor, client_details, streaming_callback, max_retries)
+
+    def get_text(self, final_llm_response: Optional[Dict[str, Any]]) -> str:
+        raise NotImplementedError
+
+    def get_tool_calls(self, final_llm_response: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Tool calls of a response as [{"id", "name", "arguments"}] with parsed arguments."""
+        raise NotImplementedError
+
+    @staticmethod
+    def get_usage(response_data: Optional[Dict[str, Any]]) -> Dict[str, int]:
+        response_data = response_data or {}
+        return {
+            "total_tokens": response_data.get("total_tokens", 0),
+            "total_input_tokens": response_data.get("total_input_tokens", 0),
+            "total_output_tokens": response_data.get("total_output_tokens", 0)
+        }
+
+
+class ChatCompletionsAdapter(ProviderAdapter):
+    """OpenAI and Azure OpenAI chat completions."""
+
+    @staticmethod
+    def get_message(final_llm_response: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        choices = (final_llm_response or {}).get("choices") or [{}]
+        return choices[0].get("message") or {}
+
+    def get_text(self, final_llm_response: Optional[Dict[str, Any]]) -> str:
+        return self.get_message(final_llm_response).get("content") or ""
+
+    def get_tool_calls(self, final_llm_response: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [{
+            "id": tool.get("id"),
+            "name": tool.get("function", {}).get("name"),
+            "arguments": json_codec.loads(tool.get("function", {}).get("arguments") or "{}"),
+        } for tool in self.get_message(final_llm_response).get("tool_calls") or []]
+
+
+class GeminiAdapter(ProviderAdapter):
+    """Gemini generateContent."""
+
+    history_role = "model"
+    # Gemini tends to keep calling tools, stop after two calls
+    max_tool_loop_llm_calls = 2
+    tools_on_first_call_only = True
+
+    @staticmethod
+    def get_parts(final_llm_response: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        candidates = (final_llm_response or {}).get("candidates") or [{}]
+        first_candidate = candidates[0] if isinstance(candidates[0], dict) else {}
+        content = first_candidate.get("content") or {}
+        return content.get("parts") or [] if isinstance(content, dict) else []
+
+    @staticmethod
+    def parse_function_args(args_raw: Any) -> Dict[str, Any]:
+        """Gemini returns functionCall args as an object, occasionally as a JSON string."""
+        if isinstance(args_raw, str):
+            try:
+                return json_codec.loads(args_raw)
+            except ValueError:
+                return {}
+        return args_raw
+
+    def get_text(self, final_llm_response: Optional[Dict[str, Any]]) -> str:
+        return "".join(part.get("text", "") for part in self.get_parts(final_llm_response))
+
+    def get_tool_calls(self, final_llm_response: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [{
+            "id": part.get("id"),
+            "name": part.get("functionCall", {}).get("name"),
+            "arguments": self.parse_function_args(part.get("functionCall", {}).get("args", {})),
+        } for part in self.get_parts(final_llm_response) if "functionCall" in part]
+
+
+ProviderAdapters: Dict[str, ProviderAdapter] = {
+    "MCP_CLIENT_AZURE_AI": ChatCompletionsAdapter("MCP_CLIENT_AZURE_AI", azure_openai_processor),
+    "MCP_CLIENT_OPENAI": ChatCompletionsAdapter("MCP_CLIENT_OPENAI", openai_processor),
+    "MCP_CLIENT_GEMINI": GeminiAdapter("MCP_CLIENT_GEMINI", gemini_processor)
+}
+
+
+def get_provider_adapter(selected_client: str) -> Optional[ProviderAdapter]:
+    return ProviderAdapters.get(selected_client)
@@ -1,8 +1,11 @@
-import requests
+import httpx
 import json
 from typing import Dict, List, Any, Optional, Union
 from dataclasses import dataclass, field, asdict
 
+from src.llm.http_client import get_http_client, parse_retry_after
+from src.llm.streaming import is_streaming, raise_for_stream_status, collect_chat_completion_stream
+
 @dataclass
 class ChatMessage:
     role: str
@@ -24,6 +27,11 @@ class LlmResponseStruct:
     Data: Optional[Dict[str, Any]]
     Error: Optional[Union[Exception, str, Dict[str, Any]]]
     Status: bool
+    # HTTP status of a failed provider call, and whether it failed in transport
+    StatusCode: Optional[int] = None
+    Transient: bool = False
+    # Seconds the provider asked to wait before retrying
+    RetryAfter: Optional[float] = None
 
 @dataclass
 class AzureAndOpenAiChatCompletionParams:
@@ -44,9 +52,12 @@ class AzureAndOpenAiChatCompletionParams:
     forced_tool_calls: Optional[Any] = None
     tool_choice: str = 'auto'
 
-async def azure_openai_processor(data: Dict[str, Any]) -> LlmResponseStruct:
+async def azure_openai_processor(data: Dict[str, Any], streaming_callback: Optional[Any] = None) -> LlmResponseStruct:
     """ 
     Main Azure OpenAI Processor function
+
+    With is_stream and a streaming callback, tokens and tool call deltas are
+    forwarded as they arrive; the returned Data has the same shape either way.
     """
     try:
         # Parse and validate input parameters
@@ -87,17 +98,22 @@ async def azure_openai_processor(data: Dict[str, Any]) -> LlmResponseStruct:
         messages_arr = [{"role": "system", "content": params.prompt}]
         messages_arr += [{"role": m.role, "content": m.content} for m in params.chat_history]
 
+        stream = params.is_stream and is_streaming(streaming_callback)
+
         # Prepare request payload
         payload = {
             # "model": selected_model,
             "messages": messages_arr,
             "max_tokens": params.max_tokens,
-            "stream": False,
+            "stream": stream,
             "tools": params.tools,
             "tool_choice": params.tool_choice,
             "temperature": params.temperature,
         }
         
+        if stream:
+            payload["stream_options"] = {"include_usage": True}
+
         # print(f"payload: {payload}")
 
         # Send request
@@ -107,9 +123,14 @@ async def azure_openai_processor(data: Dict[str, Any]) -> LlmResponseStruct:
         url = f"{endpoint}/openai/deployments/{deployment_id}/chat/completions?api-version={api_version}"
         headers = {'Content-Type': 'application/json', 'Authorization': f'Bearer {params.api_key}'}
 
-        resp = requests.post(url, headers=headers, json=payload, timeout=60)
-        resp.raise_for_status()
-        response_data = resp.json()
+        if stream:
+            async with get_http_client("MCP_CLIENT_AZURE_AI").stream("POST", url, headers=headers, json=payload) as resp:
+                await raise_for_stream_status(resp)
+                response_data = await collect_chat_completion_stream(resp, streaming_callback)
+        else:
+            resp = await get_http_client("MCP_CLIENT_AZURE_AI").post(url, headers=headers, json=payload)
+            resp.raise_for_status()
+            response_data = resp.json()
 
         # Detect tool calls
         choices = response_data.get('choices', [])
@@ -137,16 +158,16 @@ async def azure_openai_processor(data: Dict[str, Any]) -> LlmResponseStruct:
         # Return as dict to avoid subscript errors
         return LlmResponseStruct(Data=asdict(final_format), Error=None, Status=True)
 
-    except requests.exceptions.RequestException as req_err:
-        err_data = None
-        if hasattr(req_err, 'response') and req_err.response is not None:
-            try:
-                err_data = req_err.response.json()
-            except ValueError:
-                err_data = req_err.response.text
-        else:
-            err_data = str(req_err)
-        return LlmResponseStruct(Data=None, Error=err_data, Status=False)
+    except httpx.HTTPStatusError as req_err:
+        try:
+            err_data = req_err.response.json()
+        except ValueError:
+            err_data = req_err.response.text
+        return LlmResponseStruct(Data=None, Error=err_data, Status=False, StatusCode=req_err.response.status_code,
+                                 RetryAfter=parse_retry_after(req_err.response))
+
+    except httpx.HTTPError as req_err:
+        return LlmResponseStruct(Data=None, Error=str(req_err), Status=False, Transient=True)
 
     except Exception as err:
         return LlmResponseStruct(Data=None, Error=err, Status=False)
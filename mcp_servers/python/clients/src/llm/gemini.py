@@ -1,8 +1,11 @@
-import requests
+import httpx
 import json
 from typing import Dict, List, Any, Optional, Union
 from dataclasses import dataclass, field, asdict
 
+from src.llm.http_client import get_http_client, get_base_url, parse_retry_after
+from src.llm.streaming import is_streaming, raise_for_stream_status, collect_gemini_stream
+
 @dataclass
 class ChatMessage:
     role: str
@@ -24,6 +27,11 @@ class LlmResponseStruct:
     Data: Optional[Dict[str, Any]]
     Error: Optional[Union[Exception, str, Dict[str, Any]]]
     Status: bool
+    # HTTP status of a failed provider call, and whether it failed in transport
+    StatusCode: Optional[int] = None
+    Transient: bool = False
+    # Seconds the provider asked to wait before retrying
+    RetryAfter: Optional[float] = None
 
 @dataclass
 class GeminiChatCompletionParams:
@@ -43,8 +51,40 @@ class GeminiChatCompletionParams:
     forced_tool_calls: Optional[Any] = None
     tool_choice: str = 'auto'
 
-async def gemini_processor(data: Dict[str, Any]) -> LlmResponseStruct:
-    """Gemini LLM Processor"""
+def to_gemini_function_declaration(tool: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert an OpenAI-style function tool into a Gemini function declaration"""
+    func = tool.get("function", {})
+    parameters = func.get("parameters", {})
+    props = parameters.get("properties", {})
+
+    processed_props = {}
+    for key, val in props.items():
+        if val.get("type") == "array":
+            processed_props[key] = {
+                "type": "array",
+                "items": {"type": val.get("items", {}).get("type", "string")},
+                "default": val.get("default", []),
+                "description": val.get("description", "")
+            }
+        else:
+            processed_props[key] = {
+                "type": val.get("type", "string"),
+                "default": val.get("default", ""),
+                "description": val.get("description", "")
+            }
+
+    return {
+        "name": func.get("name"),
+        "description": func.get("description"),
+        "parameters": {
+            "type": parameters.get("type", "object"),
+            "properties": processed_props,
+            "required": parameters.get("required", [])
+        }
+    }
+
+async def gemini_processor(data: Dict[str, Any], streaming_callback: Optional[Any] = None) -> LlmResponseStruct:
+    """Gemini LLM Processor, streaming through streamGenerateContent when is_stream is set"""
     try:
         # Parse parameters
         params = GeminiChatCompletionParams(
@@ -106,47 +146,26 @@ async def gemini_processor(data: Dict[str, Any]) -> LlmResponseStruct:
 
 
         if params.tools:
-            function_declarations = []
-            for tool in params.tools:
-                func = tool.get("function", {})
-                parameters = func.get("parameters", {})
-                props = parameters.get("properties", {})
-
-                processed_props = {}
-                for key, val in props.items():
-                    if val.get("type") == "array":
-                        processed_props[key] = {
-                            "type": "array",
-                            "items": {"type": val.get("items", {}).get("type", "string")},
-                            "default": val.get("default", []),
-                            "description": val.get("description", "")
-                        }
-                    else:
-                        processed_props[key] = {
-                            "type": val.get("type", "string"),
-                            "default": val.get("default", ""),
-                            "description": val.get("description", "")
-                        }
-
-                function_declarations.append({
-                    "name": func.get("name"),
-                    "description": func.get("description"),
-                    "parameters": {
-                        "type": parameters.get("type", "object"),
-                        "properties": processed_props,
-                        "required": parameters.get("required", [])
-                    }
-                })
-
+            # Tools from the tool catalog are already function declarations
+            function_declarations = [
+                to_gemini_function_declaration(tool) if "function" in tool else tool
+                for tool in params.tools
+            ]
             payload["tools"] = [{"functionDeclarations": function_declarations}]
 
         # Send request
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{selected_model}:generateContent?key={params.api_key}"
         headers = {'Content-Type': 'application/json'}
-        response = requests.post(url, headers=headers, json=payload, timeout=60)
-        response.raise_for_status()
+        if params.is_stream and is_streaming(streaming_callback):
+            url = f"{get_base_url('MCP_CLIENT_GEMINI')}/models/{selected_model}:streamGenerateContent?alt=sse&key={params.api_key}"
+            async with get_http_client("MCP_CLIENT_GEMINI").stream("POST", url, headers=headers, json=payload) as response:
+                await raise_for_stream_status(response)
+                response_data = await collect_gemini_stream(response, streaming_callback)
+        else:
+            url = f"{get_base_url('MCP_CLIENT_GEMINI')}/models/{selected_model}:generateContent?key={params.api_key}"
+            response = await get_http_client("MCP_CLIENT_GEMINI").post(url, headers=headers, json=payload)
+            response.raise_for_status()
 
-        response_data = response.json()
+            response_data = response.json()
 
         message_content = response_data.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
         tool_call = response_data.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("functionCall", None)
@@ -167,16 +186,16 @@ async def gemini_processor(data: Dict[str, Any]) -> LlmResponseStruct:
 
         return LlmResponseStruct(Data=asdict(final_format), Error=None, Status=True)
 
-    except requests.exceptions.RequestException as req_err:
-        err_data = None
-        if hasattr(req_err, 'response') and req_err.response is not None:
-            try:
-                err_data = req_err.response.json()
-            except ValueError:
-                err_data = req_err.response.text
-        else:
-            err_data = str(req_err)
-        return LlmResponseStruct(Data=None, Error=err_data, Status=False)
+    except httpx.HTTPStatusError as req_err:
+        try:
+            err_data = req_err.response.json()
+        except ValueError:
+            err_data = req_err.response.text
+        return LlmResponseStruct(Data=None, Error=err_data, Status=False, StatusCode=req_err.response.status_code,
+                                 RetryAfter=parse_retry_after(req_err.response))
+
+    except httpx.HTTPError as req_err:
+        return LlmResponseStruct(Data=None, Error=str(req_err), Status=False, Transient=True)
 
     except Exception as err:
         return LlmResponseStruct(Data=None, Error=err, Status=False)
@@ -0,0 +1,81 @@
+import time
+import httpx
+from typing import Dict, Optional
+from email.utils import parsedate_to_datetime
+
+from src.client_and_server_config import LlmHttpConfig
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 support in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+DEFAULT_HTTP_CONFIG = {
+    "http2": True,
+    "max_connections": 100,
+    "max_keepalive_connections": 20,
+    "keepalive_expiry": 30,
+    "timeout": 60
+}
+
+# One pooled client per provider, created lazily on the serving event loop
+_http_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def get_http_client(provider: str) -> httpx.AsyncClient:
+    """Return the shared keep-alive AsyncClient for an LLM provider."""
+    client = _http_clients.get(provider)
+    if client is not None and not client.is_closed:
+        return client
+
+    config = {**DEFAULT_HTTP_CONFIG, **LlmHttpConfig.get(provider, {})}
+    limits = httpx.Limits(
+        max_connections=config["max_connections"],
+        max_keepalive_connections=config["max_keepalive_connections"],
+        keepalive_expiry=config["keepalive_expiry"]
+    )
+    client = httpx.AsyncClient(
+        http2=bool(config["http2"]) and HTTP2_AVAILABLE,
+        limits=limits,
+        timeout=httpx.Timeout(config["timeout"])
+    )
+    _http_clients[provider] = client
+    return client
+
+
+def get_base_url(provider: str) -> str:
+    """API base URL of a provider, overridable for local stand-ins."""
+    return LlmHttpConfig.get(provider, {}).get("base_url", "").rstrip("/")
+
+
+async def close_http_clients():
+    """Close every pooled provider client (called on gateway shutdown)."""
+    for provider, client in list(_http_clients.items()):
+        try:
+            await client.aclose()
+        except Exception as err:
+            print(f"Error closing {provider} http client =========>>>> {err}")
+    _http_clients.clear()
+
+
+def parse_retry_after(response: httpx.Response) -> Optional[float]:
+    """Seconds to wait from retry-after-ms or Retry-After (seconds or HTTP date)."""
+    retry_after_ms = response.headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return max(0.0, float(retry_after_ms) / 1000)
+        except ValueError:
+            pass
+    retry_after = response.headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
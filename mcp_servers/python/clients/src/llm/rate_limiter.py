@@ -0,0 +1,231 @@
+import time
+import heapq
+import random
+import asyncio
+import hashlib
+import itertools
+from typing import Dict, List, Any, Optional, Tuple, Callable, Awaitable
+
+from src import json_codec
+from src.metrics import observe_llm_call
+from src import tracing
+from src.client_and_server_config import LlmRateLimitConfig
+
+# Waiters with a lower value go first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+
+RETRY_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+DEFAULT_RATE_LIMIT_CONFIG = {
+    "requests_per_minute": None,
+    "tokens_per_minute": None,
+    "max_retries": 3,
+    "backoff_base": 0.5,
+    "backoff_max": 30,
+    "max_retry_after": 60
+}
+
+RateLimitStats: Dict[str, float] = {
+    "retries": 0,
+    "throttled_calls": 0,
+    "throttled_seconds": 0.0
+}
+
+_sequence = itertools.count()
+
+
+class TokenBucket:
+    """Refills capacity per minute continuously; the level may go negative after a correction."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        self.refill()
+        # Requests larger than the bucket wait for a full bucket
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self.refill()
+        self.level -= amount
+
+
+class EndpointLimiter:
+    """Request and token buckets of one (provider, API key, model), with a priority queue of callers."""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.requests = TokenBucket(config["requests_per_minute"]) if config.get("requests_per_minute") else None
+        self.tokens = TokenBucket(config["tokens_per_minute"]) if config.get("tokens_per_minute") else None
+        # Set from Retry-After, holds every caller of the endpoint
+        self.paused_until = 0.0
+        self.waiters: List[Tuple[int, int]] = []
+        self.changed = asyncio.Event()
+
+    def notify(self):
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def delay(self, tokens: int) -> float:
+        delay = self.paused_until - time.monotonic()
+        if self.requests:
+            delay = max(delay, self.requests.wait_time(1))
+        if self.tokens:
+            delay = max(delay, self.tokens.wait_time(tokens))
+        return max(0.0, delay)
+
+    async def acquire(self, tokens: int, priority: int) -> float:
+        """Wait for this caller's turn and capacity; returns the seconds waited."""
+        started_at = time.monotonic()
+        waited = False
+        entry = (priority, next(_sequence))
+        heapq.heappush(self.waiters, entry)
+        try:
+            while True:
+                changed = self.changed
+                delay = self.delay(tokens) if self.waiters[0] == entry else None
+                if delay == 0:
+                    heapq.heappop(self.waiters)
+                    if self.requests:
+                        self.requests.take(1)
+                    if self.tokens:
+                        self.tokens.take(tokens)
+                    return time.monotonic() - started_at if waited else 0.0
+                waited = True
+                try:
+                    await asyncio.wait_for(changed.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if entry in self.waiters:
+                # Cancelled while queued
+                self.waiters.remove(entry)
+                heapq.heapify(self.waiters)
+            self.notify()
+
+    def settle(self, estimated_tokens: int, used_tokens: int):
+        """Replace the token estimate taken up front with the reported usage."""
+        if self.tokens:
+            self.tokens.take(used_tokens - estimated_tokens)
+
+
+_limiters: Dict[Tuple[str, str, str], EndpointLimiter] = {}
+
+
+def get_limiter(provider: str, request: Dict[str, Any], config: Dict[str, Any]) -> EndpointLimiter:
+    key_hash = hashlib.sha256(str(request.get("api_key", "")).encode("utf-8")).hexdigest()[:16]
+    model = request.get("deployment_id") or request.get("chat_model") or ""
+    key = (provider, key_hash, model)
+    limiter = _limiters.get(key)
+    if limiter is None:
+        limiter = EndpointLimiter(config)
+        _limiters[key] = limiter
+    return limiter
+
+
+def estimate_request_tokens(request: Dict[str, Any]) -> int:
+    """Rough prompt size (4 characters per token) plus the completion allowance."""
+    characters = len(request.get("prompt", "")) + len(request.get("input", ""))
+    for message in request.get("chat_history", []):
+        characters += len(str(message.get("content", "")) if isinstance(message, dict) else str(message))
+    if request.get("tools"):
+        characters += len(json_codec.dumps(request["tools"]))
+    return characters // 4 + int(request.get("max_tokens", 1000))
+
+
+def request_priority(request: Dict[str, Any]) -> int:
+    """Streamed requests are interactive unless client_details["priority"] says "batch"."""
+    priority = request.get("priority")
+    if priority == "batch":
+        return PRIORITY_BATCH
+    if priority == "interactive" or request.get("is_stream"):
+        return PRIORITY_INTERACTIVE
+    return PRIORITY_BATCH
+
+
+def is_retryable(response: Any, streamed: bool) -> bool:
+    if getattr(response, "StatusCode", None) in RETRY_STATUS_CODES:
+        return True
+    # A stream that broke off has already sent part of the answer
+    return getattr(response, "Transient", False) and not streamed
+
+
+async def call_with_rate_limit(
+    provider: str,
+    processor: Callable[..., Awaitable[Any]],
+    request: Dict[str, Any],
+    streaming_callback: Optional[Any] = None,
+    max_retries: Optional[int] = None
+) -> Any:
+    """Run a processor call within its endpoint's limits, retrying 429/5xx/transport errors.
+
+    Retries back off exponentially with full jitter, or wait for the
+    provider's Retry-After, which also pauses the other callers of the
+    endpoint.
+    """
+    config = {**DEFAULT_RATE_LIMIT_CONFIG, **LlmRateLimitConfig.get(provider, {})}
+    limiter = get_limiter(provider, request, config)
+    estimated_tokens = estimate_request_tokens(request)
+    priority = request_priority(request)
+    retries = config["max_retries"] if max_retries is None else max_retries
+    streamed = bool(request.get("is_stream") and streaming_callback and streaming_callback.get("is_stream"))
+
+    attempt = 0
+    while True:
+        waited = await limiter.acquire(estimated_tokens, priority)
+        if waited > 0:
+            RateLimitStats["throttled_calls"] += 1
+            RateLimitStats["throttled_seconds"] += waited
+
+        started_at = time.perf_counter()
+        with tracing.span("llm.call", {
+            "llm.provider": provider,
+            "llm.model": request.get("deployment_id") or request.get("chat_model"),
+            "llm.attempt": attempt,
+            "llm.stream": streamed,
+            "llm.throttled_seconds": waited
+        }) as llm_span:
+            response = await processor(request, streaming_callback)
+            usage = (response.Data or {}) if response.Status else {}
+            tracing.set_attributes(llm_span, {
+                "http.status_code": getattr(response, "StatusCode", None),
+                "llm.input_tokens": usage.get("total_input_tokens"),
+                "llm.output_tokens": usage.get("total_output_tokens")
+            })
+            if not response.Status:
+                tracing.set_error(llm_span, response.Error)
+        observe_llm_call(provider, time.perf_counter() - started_at, response)
+        if not response.Status:
+            # Failed calls are not billed
+            limiter.settle(estimated_tokens, 0)
+        elif response.Data and response.Data.get("total_tokens"):
+            limiter.settle(estimated_tokens, response.Data["total_tokens"])
+
+        if response.Status or attempt >= retries or not is_retryable(response, streamed):
+            return response
+
+        retry_after = getattr(response, "RetryAfter", None)
+        if retry_after is not None and retry_after > config["max_retry_after"]:
+            return response
+
+        backoff = random.uniform(0, min(config["backoff_max"], config["backoff_base"] * 2 ** attempt))
+        delay = retry_after + random.uniform(0, config["backoff_base"]) if retry_after is not None else backoff
+        if response.StatusCode == 429:
+            limiter.pause(delay)
+
+        attempt += 1
+        RateLimitStats["retries"] += 1
+        print(f"Retrying {provider} call in {delay:.2f}s ({attempt}/{retries}) =========>>>> {response.StatusCode or response.Error}")
+        await asyncio.sleep(delay)
@@ -0,0 +1,262 @@
+import time
+import asyncio
+from collections import deque
+from typing import Dict, List, Any, Optional, Tuple
+
+from src.client_and_server_config import RoutingConfig
+from src.llm.adapters import ProviderAdapter, GeminiAdapter, get_provider_adapter
+from src.llm.streaming import is_streaming
+
+# Request keys that pick the endpoint, copied from a fallback over client_details
+ENDPOINT_KEYS = ("api_key", "chat_model", "vision_model", "speech_model", "endpoint", "deployment_id", "api_version")
+
+RoutingStats: Dict[str, int] = {
+    "failovers": 0,
+    "hedges": 0,
+    "hedge_wins": 0,
+    "circuit_opens": 0
+}
+
+
+class EndpointState:
+    """Circuit breaker and recent latencies of one provider endpoint."""
+
+    def __init__(self):
+        self.latencies = deque(maxlen=RoutingConfig.get("latency_window", 200))
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        # Set while the single trial call of half_open runs
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.trial_in_flight or time.monotonic() - self.opened_at >= RoutingConfig.get("recovery_time", 30):
+            return "half_open"
+        return "open"
+
+    def accepts_calls(self) -> bool:
+        """Closed, or half_open with its trial call still to be made."""
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self.trial_in_flight)
+
+    def start_call(self) -> bool:
+        """Claim the trial call in half_open; True if this call is it."""
+        if self.state == "half_open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self, latency: float):
+        self.latencies.append(latency)
+        self.consecutive_failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        # A failed trial call in half_open reopens the circuit straight away
+        if self.opened_at is not None or self.consecutive_failures >= RoutingConfig.get("failure_threshold", 5):
+            if self.state != "open":
+                RoutingStats["circuit_opens"] += 1
+            self.opened_at = time.monotonic()
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        if len(self.latencies) < RoutingConfig.get("hedge_min_samples", 20):
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percentile / 100))]
+
+
+_endpoints: Dict[str, EndpointState] = {}
+
+
+def endpoint_key(selected_client: str, request: Dict[str, Any]) -> str:
+    model = request.get("deployment_id") or request.get("chat_model") or ""
+    return f"{selected_client}|{request.get('endpoint', '')}|{model}"
+
+
+def get_endpoint_state(key: str) -> EndpointState:
+    state = _endpoints.get(key)
+    if state is None:
+        state = EndpointState()
+        _endpoints[key] = state
+    return state
+
+
+def is_failover_error(response: Any, streamed: bool = False) -> bool:
+    """Rate limits, server errors and transport failures; not bad requests.
+
+    A streamed call that broke off has already sent part of its answer, so
+    only HTTP status failures, which come before any output, count then.
+    """
+    if getattr(response, "StatusCode", None) in RoutingConfig.get("failover_status_codes", []):
+        return True
+    return getattr(response, "Transient", False) and not streamed
+
+
+def to_chat_completions_tool(tool: Dict[str, Any]) -> Dict[str, Any]:
+    if "function" in tool:
+        return tool
+    return {"type": "function", "function": {
+        "name": tool.get("name"),
+        "description": tool.get("description", ""),
+        "parameters": tool.get("parameters", {"type": "object", "properties": {}, "required": []})
+    }}
+
+
+def endpoint_request(client_details: Dict[str, Any], adapter: ProviderAdapter, endpoint: Dict[str, Any]) -> Dict[str, Any]:
+    """client_details for one endpoint, with history roles and tools in its provider's format."""
+    request = {**client_details, **{key: endpoint[key] for key in ENDPOINT_KEYS if key in endpoint}}
+    if isinstance(adapter, GeminiAdapter):
+        # gemini_processor converts OpenAI tools itself
+        role_map = {"assistant": "model"}
+    else:
+        role_map = {"model": "assistant"}
+        request["tools"] = [to_chat_completions_tool(tool) for tool in request.get("tools", [])]
+    request["chat_history"] = [
+        {**message, "role": role_map.get(message.get("role"), message.get("role"))} if isinstance(message, dict) else message
+        for message in request.get("chat_history", [])
+    ]
+    return request
+
+
+async def call_endpoint(
+    adapter: ProviderAdapter,
+    request: Dict[str, Any],
+    streaming_callback: Optional[Any] = None,
+    max_retries: Optional[int] = None,
+    trial: Optional[bool] = None
+) -> Any:
+    """One provider call, feeding its endpoint's latency window and circuit breaker.
+
+    trial says whether the caller already claimed the half_open trial call;
+    None claims it here if it is free.
+    """
+    state = get_endpoint_state(endpoint_key(adapter.name, request))
+    if trial is None:
+        trial = state.start_call()
+    started_at = time.monotonic()
+    try:
+        response = await adapter.call(request, streaming_callback, max_retries)
+    finally:
+        if trial:
+            state.trial_in_flight = False
+    if response.Status:
+        state.record_success(time.monotonic() - started_at)
+    elif is_failover_error(response):
+        state.record_failure()
+    return response
+
+
+async def call_llm(
+    adapter: ProviderAdapter,
+    client_details: Dict[str, Any],
+    streaming_callback: Optional[Any] = None
+) -> Tuple[Any, ProviderAdapter]:
+    """Call the selected provider, failing over and hedging to client_details["fallbacks"].
+
+    Endpoints with an open circuit are skipped while others are available. A
+    429, 5xx or transport error moves on to the next endpoint. With hedging,
+    the next endpoint is also started once the running one is slower than its
+    latency percentile, and the first good answer wins. Returns the response
+    and the adapter of the provider that produced it.
+    """
+    fallbacks = client_details.get("fallbacks") or []
+    if not fallbacks:
+        return await call_endpoint(adapter, client_details, streaming_callback), adapter
+
+    candidates: List[Tuple[ProviderAdapter, Dict[str, Any]]] = [(adapter, client_details)]
+    for endpoint in fallbacks:
+        endpoint_adapter = get_provider_adapter(endpoint.get("selected_client", adapter.name))
+        if endpoint_adapter is not None:
+            candidates.append((endpoint_adapter, endpoint_request(client_details, endpoint_adapter, endpoint)))
+
+    available = [c for c in candidates if get_endpoint_state(endpoint_key(c[0].name, c[1])).accepts_calls()]
+    all_unavailable = not available
+    candidates = available or candidates
+
+    # Two answers would both be streamed to the client
+    streamed = bool(client_details.get("is_stream") and is_streaming(streaming_callback))
+    hedge = client_details.get("hedge", RoutingConfig.get("hedge", False)) and not streamed
+
+    # Running calls: task -> index into candidates
+    pending: Dict[asyncio.Task, int] = {}
+    next_index = 0
+    hedged = False
+    last_response = None
+    last_adapter = adapter
+
+    def launch():
+        nonlocal next_index
+        while True:
+            endpoint_adapter, request = candidates[next_index]
+            next_index += 1
+            state = get_endpoint_state(endpoint_key(endpoint_adapter.name, request))
+            # Another request may have opened the circuit or taken its trial call meanwhile
+            if all_unavailable or next_index == len(candidates) or state.accepts_calls():
+                break
+        # Claimed here, before any await, so concurrent requests see it
+        trial = state.start_call()
+        # Fail over instead of retrying while another endpoint is left
+        max_retries = 0 if next_index < len(candidates) else None
+        task = asyncio.create_task(call_endpoint(endpoint_adapter, request, streaming_callback, max_retries, trial))
+        pending[task] = next_index - 1
+
+    try:
+        launch()
+        while pending:
+            timeout = None
+            if hedge and not hedged and next_index < len(candidates):
+                running_adapter, running_request = candidates[next_index - 1]
+                timeout = get_endpoint_state(endpoint_key(running_adapter.name, running_request)).latency_percentile(
+                    RoutingConfig.get("hedge_percentile", 95))
+                if timeout is None:
+                    timeout = RoutingConfig.get("hedge_default_delay", 10)
+
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                hedged = True
+                RoutingStats["hedges"] += 1
+                print(f"Hedging slow {candidates[next_index - 1][0].name} call =========>>>> {candidates[next_index][0].name}")
+                launch()
+                continue
+
+            for task in done:
+                index = pending.pop(task)
+                endpoint_adapter = candidates[index][0]
+                response = task.result()
+                if response.Status or not is_failover_error(response, streamed):
+                    if hedged and index > 0:
+                        RoutingStats["hedge_wins"] += 1
+                    return response, endpoint_adapter
+                last_response, last_adapter = response, endpoint_adapter
+
+            if not pending and next_index < len(candidates):
+                RoutingStats["failovers"] += 1
+                print(f"Failing over from {last_adapter.name} =========>>>> {candidates[next_index][0].name}: {last_response.Error}")
+                launch()
+
+        return last_response, last_adapter
+    finally:
+        # The losing hedge, or everything when the request itself is cancelled
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+def get_routing_stats() -> Dict[str, Any]:
+    """Failover/hedge counters and each endpoint's circuit state and latencies."""
+    percentile = RoutingConfig.get("hedge_percentile", 95)
+    return {
+        **RoutingStats,
+        "endpoints": {
+            key: {
+                "state": state.state,
+                "consecutive_failures": state.consecutive_failures,
+                "samples": len(state.latencies),
+                f"p{percentile}": state.latency_percentile(percentile)
+            } for key, state in _endpoints.items()
+        }
+    }
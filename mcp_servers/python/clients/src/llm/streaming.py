@@ -0,0 +1,161 @@
+import httpx
+from typing import Dict, List, Any, Optional, AsyncIterator
+
+from src import json_codec
+
+
+def is_streaming(streaming_callback: Optional[Any]) -> bool:
+    """True if the caller wants incremental events over the stream handler."""
+    return bool(streaming_callback and streaming_callback.get("is_stream") and streaming_callback.get("streamCallbacks"))
+
+
+async def send_stream_event(streaming_callback: Optional[Any], action: str, data: Any):
+    """Forward one IN-PROGRESS event to the stream handler's on_data."""
+    if not is_streaming(streaming_callback):
+        return
+    await streaming_callback["streamCallbacks"].on_data(json_codec.dumps({
+        "Data": data,
+        "Error": None,
+        "Status": True,
+        "StreamingStatus": "IN-PROGRESS",
+        "Action": action
+    }))
+
+
+async def iter_sse_data(resp: httpx.Response) -> AsyncIterator[str]:
+    """Yield the data payload of every server-sent event in a streamed response."""
+    data_lines: List[str] = []
+    async for line in resp.aiter_lines():
+        if line.startswith("data:"):
+            data_lines.append(line[5:].lstrip())
+        elif not line and data_lines:
+            yield "\n".join(data_lines)
+            data_lines = []
+    if data_lines:
+        yield "\n".join(data_lines)
+
+
+async def raise_for_stream_status(resp: httpx.Response):
+    """Read the error body before raising, so error handlers can parse it."""
+    if resp.is_error:
+        await resp.aread()
+        resp.raise_for_status()
+
+
+async def collect_chat_completion_stream(resp: httpx.Response, streaming_callback: Optional[Any] = None) -> Dict[str, Any]:
+    """Forward OpenAI/Azure chat completion chunks and rebuild the non-streamed response.
+
+    Content deltas are sent as MESSAGE-DELTA events and tool call deltas as
+    TOOL-CALL-DELTA events. The returned dict has the same shape as a
+    "stream": false response, so callers can parse it the same way.
+    """
+    response_data: Dict[str, Any] = {}
+    content_parts: List[str] = []
+    tool_calls: Dict[int, Dict[str, Any]] = {}
+    finish_reason = None
+    usage: Dict[str, Any] = {}
+
+    async for data in iter_sse_data(resp):
+        if data == "[DONE]":
+            break
+        chunk = json_codec.loads(data)
+        for key in ("id", "object", "created", "model", "system_fingerprint"):
+            if chunk.get(key) and key not in response_data:
+                response_data[key] = chunk[key]
+        if chunk.get("usage"):
+            usage = chunk["usage"]
+
+        for choice in chunk.get("choices", []):
+            if choice.get("index", 0) != 0:
+                continue
+            finish_reason = choice.get("finish_reason") or finish_reason
+            delta = choice.get("delta") or {}
+
+            if delta.get("content"):
+                content_parts.append(delta["content"])
+                await send_stream_event(streaming_callback, "MESSAGE-DELTA", delta["content"])
+
+            for tool_call_delta in delta.get("tool_calls") or []:
+                index = tool_call_delta.get("index", 0)
+                function_delta = tool_call_delta.get("function") or {}
+                tool_call = tool_calls.setdefault(index, {
+                    "id": None,
+                    "type": "function",
+                    "function": {"name": "", "arguments": ""}
+                })
+                if tool_call_delta.get("id"):
+                    tool_call["id"] = tool_call_delta["id"]
+                tool_call["function"]["name"] += function_delta.get("name") or ""
+                tool_call["function"]["arguments"] += function_delta.get("arguments") or ""
+                await send_stream_event(streaming_callback, "TOOL-CALL-DELTA", {
+                    "index": index,
+                    "id": tool_call["id"],
+                    "name": tool_call["function"]["name"],
+                    "arguments": function_delta.get("arguments") or ""
+                })
+
+    message: Dict[str, Any] = {
+        "role": "assistant",
+        "content": "".join(content_parts) if content_parts or not tool_calls else None
+    }
+    if tool_calls:
+        message["tool_calls"] = [tool_calls[index] for index in sorted(tool_calls)]
+
+    response_data["object"] = "chat.completion"
+    response_data["choices"] = [{"index": 0, "message": message, "finish_reason": finish_reason}]
+    response_data["usage"] = usage
+    return response_data
+
+
+async def collect_gemini_stream(resp: httpx.Response, streaming_callback: Optional[Any] = None) -> Dict[str, Any]:
+    """Forward Gemini streamGenerateContent chunks and rebuild a generateContent response.
+
+    Text is sent as MESSAGE-DELTA events. Gemini sends function calls whole, so
+    each one is a single TOOL-CALL-DELTA event.
+    """
+    parts: List[Dict[str, Any]] = []
+    finish_reason = None
+    usage: Dict[str, Any] = {}
+    model_version = None
+
+    async for data in iter_sse_data(resp):
+        chunk = json_codec.loads(data)
+        usage = chunk.get("usageMetadata") or usage
+        model_version = chunk.get("modelVersion") or model_version
+
+        candidates = chunk.get("candidates") or []
+        if not candidates:
+            continue
+        candidate = candidates[0]
+        finish_reason = candidate.get("finishReason") or finish_reason
+
+        for part in candidate.get("content", {}).get("parts", []):
+            if "text" in part:
+                # Merge consecutive text so parts[0] holds the whole answer
+                if parts and "text" in parts[-1]:
+                    parts[-1]["text"] += part["text"]
+                else:
+                    parts.append(dict(part))
+                await send_stream_event(streaming_callback, "MESSAGE-DELTA", part["text"])
+            elif "functionCall" in part:
+                parts.append(part)
+                await send_stream_event(streaming_callback, "TOOL-CALL-DELTA", {
+                    "index": sum(1 for p in parts if "functionCall" in p) - 1,
+                    "id": None,
+                    "name": part["functionCall"].get("name"),
+                    "arguments": json_codec.dumps(part["functionCall"].get("args", {}))
+                })
+            else:
+                parts.append(part)
+
+    response_data: Dict[str, Any] = {
+        "candidates": [{
+            "content": {"role": "model", "parts": parts},
+            "finishReason": finish_reason,
+            "index": 0
+        }],
+        "usageMetadata": usage
+    }
+    if model_version:
+        response_data["modelVersion"] = model_version
+    return response_data
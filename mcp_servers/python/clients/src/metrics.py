@@ -0,0 +1,144 @@
+import time
+import asyncio
+from typing import Any, Tuple, Optional
+
+from src.client_and_server_config import MetricsConfig
+
+try:
+    from prometheus_client import REGISTRY, Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+TOOL_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+
+def metrics_enabled() -> bool:
+    return PROMETHEUS_AVAILABLE and MetricsConfig.get("enabled", True)
+
+
+class _NoopMetric:
+    """Stands in for every metric without prometheus_client or with metrics disabled."""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount: float = 1):
+        pass
+
+    def dec(self, amount: float = 1):
+        pass
+
+    def observe(self, amount: float):
+        pass
+
+
+if metrics_enabled():
+    HTTP_REQUEST_SECONDS = Histogram("mcp_gateway_http_request_seconds", "Gateway HTTP request latency until the response starts",
+                                     ["method", "route", "status"], buckets=LLM_BUCKETS)
+    HTTP_REQUESTS_IN_FLIGHT = Gauge("mcp_gateway_http_requests_in_flight", "Gateway HTTP requests being handled")
+    SSE_STREAMS_ACTIVE = Gauge("mcp_gateway_sse_streams_active", "Open process_message_stream responses")
+    LLM_CALL_SECONDS = Histogram("mcp_gateway_llm_call_seconds", "Latency of one LLM provider call attempt",
+                                 ["provider", "status"], buckets=LLM_BUCKETS)
+    LLM_TOKENS = Counter("mcp_gateway_llm_tokens", "Tokens reported by LLM providers", ["provider", "direction"])
+    TOOL_CALL_SECONDS = Histogram("mcp_gateway_tool_call_seconds", "Latency of MCP tool calls", ["server", "tool"], buckets=TOOL_BUCKETS)
+    TOOL_CALL_ERRORS = Counter("mcp_gateway_tool_call_errors", "MCP tool calls that raised or returned isError", ["server", "tool"])
+    EVENT_LOOP_LAG_SECONDS = Histogram("mcp_gateway_event_loop_lag_seconds", "How late the event loop ran a timer callback",
+                                       buckets=LOOP_LAG_BUCKETS)
+else:
+    HTTP_REQUEST_SECONDS = HTTP_REQUESTS_IN_FLIGHT = SSE_STREAMS_ACTIVE = _NoopMetric()
+    LLM_CALL_SECONDS = LLM_TOKENS = TOOL_CALL_SECONDS = TOOL_CALL_ERRORS = EVENT_LOOP_LAG_SECONDS = _NoopMetric()
+
+
+def observe_llm_call(provider: str, seconds: float, response: Any):
+    """Record one processor call and, when it succeeded, the tokens it used."""
+    LLM_CALL_SECONDS.labels(provider, "ok" if response.Status else "error").observe(seconds)
+    if response.Status and response.Data:
+        LLM_TOKENS.labels(provider, "input").inc(response.Data.get("total_input_tokens") or 0)
+        LLM_TOKENS.labels(provider, "output").inc(response.Data.get("total_output_tokens") or 0)
+
+
+def observe_tool_call(server: str, tool: str, seconds: float, is_error: bool):
+    TOOL_CALL_SECONDS.labels(server, tool).observe(seconds)
+    if is_error:
+        TOOL_CALL_ERRORS.labels(server, tool).inc()
+
+
+class StatsCollector:
+    """Exposes the router cache, routing and rate limiter counters at scrape time."""
+
+    def describe(self):
+        # Without describe, registering calls collect, whose imports may still be loading
+        return []
+
+    def collect(self):
+        # Imported here, these modules report through src.metrics themselves
+        from src.router_cache import get_router_cache_stats
+        from src.llm.routing import get_routing_stats
+        from src.llm.rate_limiter import RateLimitStats
+
+        cache_stats = get_router_cache_stats()
+        lookups = CounterMetricFamily("mcp_gateway_router_cache_lookups", "Router cache lookups", labels=["result"])
+        lookups.add_metric(["hit"], cache_stats["hits"])
+        lookups.add_metric(["miss"], cache_stats["misses"])
+        yield lookups
+        removals = CounterMetricFamily("mcp_gateway_router_cache_removals", "Router cache entries dropped", labels=["reason"])
+        removals.add_metric(["eviction"], cache_stats["evictions"])
+        removals.add_metric(["expiration"], cache_stats["expirations"])
+        yield removals
+        yield GaugeMetricFamily("mcp_gateway_router_cache_entries", "Router decisions in the cache", value=cache_stats["size"])
+        yield GaugeMetricFamily("mcp_gateway_router_cache_hit_ratio", "Router cache hits per lookup since start", value=cache_stats["hit_ratio"])
+
+        routing_stats = get_routing_stats()
+        for name in ("failovers", "hedges", "hedge_wins", "circuit_opens"):
+            yield CounterMetricFamily(f"mcp_gateway_llm_{name}", f"LLM routing {name.replace('_', ' ')}", value=routing_stats[name])
+        circuit_open = GaugeMetricFamily("mcp_gateway_llm_circuit_open", "1 while an LLM endpoint's circuit is not closed",
+                                         labels=["endpoint"])
+        for endpoint, state in routing_stats["endpoints"].items():
+            circuit_open.add_metric([str(endpoint)], 0 if state["state"] == "closed" else 1)
+        yield circuit_open
+
+        yield CounterMetricFamily("mcp_gateway_llm_retries", "LLM call retries after 429/5xx/transport errors",
+                                  value=RateLimitStats["retries"])
+        yield CounterMetricFamily("mcp_gateway_llm_throttled_calls", "LLM calls that waited for rate limit capacity",
+                                  value=RateLimitStats["throttled_calls"])
+        yield CounterMetricFamily("mcp_gateway_llm_throttled_seconds", "Seconds LLM calls waited for rate limit capacity",
+                                  value=RateLimitStats["throttled_seconds"])
+
+
+if metrics_enabled():
+    REGISTRY.register(StatsCollector())
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Body and content type of the /metrics response."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+_event_loop_monitor: Optional[asyncio.Task] = None
+
+
+async def monitor_event_loop(interval: float):
+    """Sleep for interval and record how much later than that the loop woke us."""
+    while True:
+        started_at = time.perf_counter()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG_SECONDS.observe(max(0.0, time.perf_counter() - started_at - interval))
+
+
+def start_event_loop_monitor():
+    global _event_loop_monitor
+    if metrics_enabled() and _event_loop_monitor is None:
+        interval = MetricsConfig.get("event_loop_lag_interval", 0.5)
+        _event_loop_monitor = asyncio.create_task(monitor_event_loop(interval), name="event-loop-lag-monitor")
+
+
+async def stop_event_loop_monitor():
+    global _event_loop_monitor
+    if _event_loop_monitor is not None:
+        _event_loop_monitor.cancel()
+        await asyncio.gather(_event_loop_monitor, return_exceptions=True)
+        _event_loop_monitor = None
@@ -0,0 +1,92 @@
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+from src import json_codec
+from src.client_and_server_config import RouterCacheConfig
+from src.tool_catalog import get_catalog_version
+
+# Router decisions: cache key -> (expires_at, {"isFunctionCall", "selectedTools"})
+_router_cache: "OrderedDict[str, Any]" = OrderedDict()
+
+RouterCacheStats: Dict[str, int] = {
+    "hits": 0,
+    "misses": 0,
+    "evictions": 0,
+    "expirations": 0
+}
+
+
+def normalize_text(text: Any) -> str:
+    """Case- and whitespace-insensitive form of a message."""
+    return " ".join(str(text or "").lower().split())
+
+
+def router_cache_key(selected_client: str, selected_servers: List[str], client_details: Dict[str, Any], tool_names: List[str]) -> str:
+    """Hash of everything the router decision depends on."""
+    # chat_history already ends with the current input
+    history = client_details.get("chat_history", [])[:-1]
+    history_messages = RouterCacheConfig.get("history_messages", 4)
+    recent_history = history[-history_messages:] if history_messages else []
+    key_data = {
+        "provider": selected_client,
+        "model": client_details.get("chat_model") or client_details.get("deployment_id", ""),
+        "input_type": client_details.get("input_type", "text"),
+        "catalog_version": get_catalog_version(selected_servers),
+        "tools": sorted(tool_names),
+        "input": normalize_text(client_details.get("input", "")),
+        "history": [[m.get("role"), normalize_text(m.get("content"))] for m in recent_history if isinstance(m, dict)]
+    }
+    return hashlib.sha256(json_codec.dumps(key_data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def get_router_decision(key: str) -> Optional[Dict[str, Any]]:
+    """Cached router decision for key, or None on a miss."""
+    if not RouterCacheConfig.get("enabled", True):
+        return None
+
+    entry = _router_cache.get(key)
+    if entry is not None and entry[0] <= time.monotonic():
+        del _router_cache[key]
+        RouterCacheStats["expirations"] += 1
+        entry = None
+
+    if entry is None:
+        RouterCacheStats["misses"] += 1
+        return None
+
+    _router_cache.move_to_end(key)
+    RouterCacheStats["hits"] += 1
+    decision = entry[1]
+    return {"isFunctionCall": decision["isFunctionCall"], "selectedTools": list(decision["selectedTools"])}
+
+
+def set_router_decision(key: str, decision: Dict[str, Any]):
+    """Store a router decision, evicting the least recently used entries."""
+    if not RouterCacheConfig.get("enabled", True):
+        return
+
+    expires_at = time.monotonic() + RouterCacheConfig.get("ttl", 600)
+    _router_cache[key] = (expires_at, {
+        "isFunctionCall": decision["isFunctionCall"],
+        "selectedTools": list(decision["selectedTools"])
+    })
+    _router_cache.move_to_end(key)
+    while len(_router_cache) > RouterCacheConfig.get("max_entries", 1024):
+        _router_cache.popitem(last=False)
+        RouterCacheStats["evictions"] += 1
+
+
+def clear_router_cache():
+    _router_cache.clear()
+
+
+def get_router_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters, hit ratio and current size."""
+    lookups = RouterCacheStats["hits"] + RouterCacheStats["misses"]
+    return {
+        **RouterCacheStats,
+        "size": len(_router_cache),
+        "hit_ratio": RouterCacheStats["hits"] / lookups if lookups else 0.0
+    }
@@ -1,13 +1,18 @@
 import os
+import time
 import asyncio
 import warnings
-from typing import Dict, Any
+from typing import Dict, Any, List, Set, Optional
 
 from contextlib import AsyncExitStack
 from src.client_and_server_config import ServersConfig
 from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
+from mcp.client.stdio import stdio_client, get_default_environment
 from mcp import ClientSession, StdioServerParameters
+from mcp import types
+from src.tool_catalog import ToolCatalog, update_tool_catalog, invalidate_tool_catalog, refresh_tool_catalog
+from src.metrics import observe_tool_call
+from src import tracing
 
 # Suppress warnings about unclosed transports
 warnings.filterwarnings("ignore", category=ResourceWarning, message="unclosed transport .*")
@@ -16,50 +21,304 @@ warnings.filterwarnings("ignore", category=ResourceWarning, message="unclosed tr
 # Suppress specific ResourceWarning related to unclosed transport
 warnings.filterwarnings("ignore", category=ResourceWarning, message="unclosed transport .*")
 
-# Global session store
-MCPServers: Dict[str, ClientSession] = {}
+DEFAULT_STARTUP_TIMEOUT = 60
+DEFAULT_POOL_SIZE = 1
+DEFAULT_HEALTH_CHECK_INTERVAL = 30
+HEALTH_CHECK_TIMEOUT = 10
+SHUTDOWN_TIMEOUT = 10
 
+# Seconds each server took from launch until its tools were listed
+MCPServerStartupTimes: Dict[str, float] = {}
 
-async def initialize_all_mcp(exit_stack):
-    """Initialize all MCP clients based on server configuration"""
-    for server in ServersConfig:
-        try:
-            print(f"\n================= Initializing {server['server_name']} mcp server start ===============")
-            print(f"Server name        : {server['server_name']}")
-            print(f"Server command     : {server['command']}")
-            print(f"Server args        : {server['args']}")
-            print(f"cwd                : {os.getcwd()}")
-
-            # Optional directory existence check
-            if "--directory" in server["args"]:
-                dir_index = server["args"].index("--directory")
-                if dir_index + 1 < len(server["args"]):
-                    relative_path = server["args"][dir_index + 1]
-                    absolute_path = os.path.abspath(relative_path)
-                    print(f"Relative path      : {relative_path}")
-                    print(f"Absolute path      : {absolute_path}")
-                    print(f"Path exists        : {os.path.exists(absolute_path)}")
+# Pools of every configured server, including ones not ready yet
+_server_pools: List["MCPServerPool"] = []
+
+# Pending tool catalog refreshes, referenced so they are not garbage collected
+_refresh_tasks: Set[asyncio.Task] = set()
+
+
+def print_server_details(server: Dict[str, Any]):
+    print(f"\n================= Initializing {server['server_name']} mcp server start ===============")
+    print(f"Server name        : {server['server_name']}")
+    print(f"Server command     : {server['command']}")
+    print(f"Server args        : {server['args']}")
+    print(f"cwd                : {os.getcwd()}")
+
+    # Optional directory existence check
+    if "--directory" in server["args"]:
+        dir_index = server["args"].index("--directory")
+        if dir_index + 1 < len(server["args"]):
+            relative_path = server["args"][dir_index + 1]
+            absolute_path = os.path.abspath(relative_path)
+            print(f"Relative path      : {relative_path}")
+            print(f"Absolute path      : {absolute_path}")
+            print(f"Path exists        : {os.path.exists(absolute_path)}")
+
+
+def tool_list_changed_handler(server_name: str):
+    """Session message handler invalidating the tool catalog on tools/list_changed."""
+    async def handler(message: Any):
+        if isinstance(message, types.ServerNotification) and isinstance(message.root, types.ToolListChangedNotification):
+            print(f"{server_name} mcp server tool list changed, refreshing tool catalog")
+            invalidate_tool_catalog(server_name)
+            pool = MCPServers.get(server_name)
+            if pool:
+                # list_tools needs this receive loop, so refresh outside of it
+                task = asyncio.create_task(refresh_tool_catalog(server_name, pool))
+                _refresh_tasks.add(task)
+                task.add_done_callback(_refresh_tasks.discard)
+    return handler
+
+
+class MCPWorker:
+    """One server process and its client session inside a pool."""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.session: Optional[ClientSession] = None
+        self.in_flight = 0
+        self.stop_event = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def is_alive(self) -> bool:
+        return (
+            self.session is not None
+            and self.task is not None
+            and not self.task.done()
+            and not self.stop_event.is_set()
+        )
+
+
+class MCPServerPool:
+    """Pool of processes/sessions for one ServersConfig entry.
 
+    Calls go to the live worker with the fewest in-flight requests. Idle
+    workers are pinged every health_check_interval seconds, and workers that
+    died or stopped answering are replaced.
+    """
+
+    def __init__(self, server: Dict[str, Any]):
+        self.server = server
+        self.server_name = server["server_name"]
+        self.pool_size = max(1, server.get("pool_size", DEFAULT_POOL_SIZE))
+        self.health_check_interval = server.get("health_check_interval", DEFAULT_HEALTH_CHECK_INTERVAL)
+        self.workers: List[MCPWorker] = []
+        self.ready = asyncio.get_running_loop().create_future()
+        self.started_at = time.perf_counter()
+        self.health_task: Optional[asyncio.Task] = None
+        self.closed = False
+
+    def start(self):
+        for index in range(self.pool_size):
+            self.workers.append(self.spawn_worker(index))
+        self.health_task = asyncio.create_task(self.health_check_loop(), name=f"mcp-health-{self.server_name}")
+
+    def spawn_worker(self, index: int) -> MCPWorker:
+        worker = MCPWorker(index)
+        worker.task = asyncio.create_task(self.run_worker(worker), name=f"mcp-server-{self.server_name}-{index}")
+        return worker
+
+    def live_workers(self) -> List[MCPWorker]:
+        return [worker for worker in self.workers if worker.is_alive]
+
+    async def run_worker(self, worker: MCPWorker):
+        """Own one worker's stdio transport and session until it is stopped.
+
+        The anyio cancel scopes inside stdio_client must be exited by the task
+        that entered them, so every worker lives in its own task instead of
+        the shared exit stack.
+        """
+        started_at = time.perf_counter()
+        try:
             # Start stdio client
-            server_params = StdioServerParameters(command=server["command"], args=server["args"])
-            stdio_transport = await exit_stack.enter_async_context(stdio_client(server_params))
-            stdio, write = stdio_transport
+            server_params = StdioServerParameters(command=self.server["command"], args=self.server["args"], env=self.server_environment())
+            async with stdio_client(server_params) as (stdio, write):
+                async with ClientSession(stdio, write, message_handler=tool_list_changed_handler(self.server_name)) as session:
+                    await session.initialize()
+
+                    # Confirm connection and cache the tool payloads
+                    tools_response = await session.list_tools()
+                    tool_names = [tool.name for tool in tools_response.tools]
+                    update_tool_catalog(self.server_name, tools_response.tools)
+
+                    # Save pool globally once its first worker is up
+                    worker.session = session
+                    MCPServers[self.server_name] = self
+                    print(f"Connected to {self.server_name} worker {worker.index} in {time.perf_counter() - started_at:.2f}s with tools: {tool_names}")
 
-            session = await exit_stack.enter_async_context(ClientSession(stdio, write))
-            await session.initialize()
+                    if not self.ready.done():
+                        MCPServerStartupTimes[self.server_name] = time.perf_counter() - self.started_at
+                        self.ready.set_result(self)
+                    await worker.stop_event.wait()
 
+        except Exception as err:
+            print(f"Error in {self.server_name} mcp server worker {worker.index} =========>>>> {err}")
+            if not self.ready.done() and all(w is worker or w.task.done() for w in self.workers):
+                self.ready.set_exception(err)
 
-            # Save session globally
-            MCPServers[server["server_name"]] = session
+        finally:
+            worker.session = None
+            if not self.live_workers() and MCPServers.get(self.server_name) is self:
+                MCPServers.pop(self.server_name, None)
+                invalidate_tool_catalog(self.server_name)
 
-            # Confirm connection
-            tools_response = await session.list_tools()
-            tool_names = [tool.name for tool in tools_response.tools]
-            print(f"Connected to {server['server_name']} with tools: {tool_names}")
-            print(f"\n================= Initializing {server['server_name']} mcp server end ===============")
+    async def stop_worker(self, worker: MCPWorker):
+        worker.stop_event.set()
+        _, pending = await asyncio.wait([worker.task], timeout=SHUTDOWN_TIMEOUT)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
 
+    async def check_worker(self, worker: MCPWorker) -> bool:
+        """Ping an idle worker; busy workers are trusted until their calls finish."""
+        if worker.task.done():
+            return False
+        if worker.session is None or worker.in_flight > 0:
+            return True
+        try:
+            await asyncio.wait_for(worker.session.send_ping(), HEALTH_CHECK_TIMEOUT)
+            return True
         except Exception as err:
-            print(f"Error initializing {server['server_name']} mcp server =========>>>> {err}")
-            continue
+            print(f"{self.server_name} mcp server worker {worker.index} failed health check =========>>>> {err}")
+            return False
+
+    async def health_check_loop(self):
+        while not self.closed:
+            await asyncio.sleep(self.health_check_interval)
+            for position, worker in enumerate(list(self.workers)):
+                if self.closed:
+                    return
+                if await self.check_worker(worker):
+                    continue
+                print(f"Replacing {self.server_name} mcp server worker {worker.index}")
+                await self.stop_worker(worker)
+                self.workers[position] = self.spawn_worker(worker.index)
+
+    def acquire_worker(self) -> MCPWorker:
+        live_workers = self.live_workers()
+        if not live_workers:
+            raise RuntimeError(f"No live sessions for {self.server_name} mcp server")
+        return min(live_workers, key=lambda worker: worker.in_flight)
+
+    def server_environment(self) -> Optional[Dict[str, str]]:
+        """Environment of a worker process: the MCP defaults, tracing variables and the config's "env"."""
+        extra_env = {**tracing.subprocess_environment(), **self.server.get("env", {})}
+        if not extra_env:
+            return None
+        return {**get_default_environment(), **extra_env}
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None, *args, **kwargs):
+        worker = self.acquire_worker()
+        worker.in_flight += 1
+        started_at = time.perf_counter()
+        is_error = True
+        try:
+            meta = tracing.trace_context_meta()
+            if meta:
+                result = await call_tool_with_meta(worker.session, name, arguments, meta)
+            else:
+                result = await worker.session.call_tool(name, arguments, *args, **kwargs)
+            is_error = bool(getattr(result, "isError", False))
+            return result
+        finally:
+            worker.in_flight -= 1
+            # Names come from the LLM, unknown ones share a label
+            known_tool = name in ToolCatalog.get(self.server_name, {}).get("tool_names", [])
+            observe_tool_call(self.server_name, name if known_tool else "unknown", time.perf_counter() - started_at, is_error)
+
+    async def list_tools(self):
+        worker = self.acquire_worker()
+        worker.in_flight += 1
+        try:
+            return await worker.session.list_tools()
+        finally:
+            worker.in_flight -= 1
+
+    async def close(self):
+        self.closed = True
+        if self.health_task:
+            self.health_task.cancel()
+            await asyncio.gather(self.health_task, return_exceptions=True)
+        await asyncio.gather(*[self.stop_worker(worker) for worker in self.workers])
+
+
+async def call_tool_with_meta(session: ClientSession, name: str, arguments: Optional[Dict[str, Any]], meta: Dict[str, Any]) -> types.CallToolResult:
+    """tools/call with request _meta, e.g. the trace context; ClientSession.call_tool cannot send it."""
+    params = types.CallToolRequestParams(name=name, arguments=arguments, _meta=types.RequestParams.Meta(**meta))
+    result = await session.send_request(
+        types.ClientRequest(types.CallToolRequest(method="tools/call", params=params)),
+        types.CallToolResult
+    )
+    validate_tool_result = getattr(session, "_validate_tool_result", None)
+    if validate_tool_result is not None and not result.isError:
+        # Same output schema check as ClientSession.call_tool
+        await validate_tool_result(name, result)
+    return result
+
+
+# Global server store: server name -> pool of live sessions
+MCPServers: Dict[str, MCPServerPool] = {}
+
+
+def report_late_server(server_name: str):
+    """Log the outcome of a server that missed its startup timeout."""
+    def callback(ready: asyncio.Future):
+        if ready.cancelled():
+            return
+        err = ready.exception()
+        if err:
+            print(f"Error initializing {server_name} mcp server =========>>>> {err}")
+        else:
+            print(f"\n✅ {server_name} mcp server became available after startup timeout")
+    return callback
+
+
+async def start_mcp_server(server: Dict[str, Any]) -> bool:
+    """Launch one server pool and wait for its first worker up to the startup timeout."""
+    server_name = server["server_name"]
+    timeout = server.get("startup_timeout", DEFAULT_STARTUP_TIMEOUT)
+    print_server_details(server)
+
+    pool = MCPServerPool(server)
+    _server_pools.append(pool)
+    pool.start()
+
+    try:
+        # shield so a timeout leaves the server starting in the background
+        await asyncio.wait_for(asyncio.shield(pool.ready), timeout)
+        return True
+
+    except asyncio.TimeoutError:
+        MCPServerStartupTimes[server_name] = time.perf_counter() - pool.started_at
+        print(f"{server_name} mcp server not ready after {timeout}s, continuing without it")
+        pool.ready.add_done_callback(report_late_server(server_name))
+        return False
+
+    except Exception as err:
+        MCPServerStartupTimes[server_name] = time.perf_counter() - pool.started_at
+        print(f"Error initializing {server_name} mcp server =========>>>> {err}")
+        return False
+
+
+async def shutdown_all_mcp():
+    """Close every server pool and its worker processes."""
+    pools = list(_server_pools)
+    _server_pools.clear()
+    await asyncio.gather(*[pool.close() for pool in pools], return_exceptions=True)
+
+
+async def initialize_all_mcp(exit_stack: AsyncExitStack):
+    """Initialize all MCP clients concurrently based on server configuration"""
+    exit_stack.push_async_callback(shutdown_all_mcp)
+
+    started_at = time.perf_counter()
+    results = await asyncio.gather(*[start_mcp_server(server) for server in ServersConfig])
+
+    print(f"\n================= MCP servers startup report ({time.perf_counter() - started_at:.2f}s) ===============")
+    for server, is_ready in zip(ServersConfig, results):
+        server_name = server["server_name"]
+        elapsed = MCPServerStartupTimes.get(server_name, 0.0)
+        print(f"{server_name:<25}: {'ready' if is_ready else 'unavailable'} ({elapsed:.2f}s)")
 
-    return True
\ No newline at end of file
+    return any(results)
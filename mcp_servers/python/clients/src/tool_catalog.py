@@ -0,0 +1,102 @@
+import hashlib
+from typing import Dict, Any, List, Optional, Tuple
+
+from src import json_codec
+from src.client_and_server_config import ClientsConfig
+from src.llm.gemini import to_gemini_function_declaration
+
+# Ready-made tool payloads per server, filled at startup and on reconnect:
+# {server_name: {"version": int, "tool_names": [...], "payloads": {client: [...]}}}
+ToolCatalog: Dict[str, Dict[str, Any]] = {}
+
+_catalog_version = 0
+
+# {server_name: (tool schema fingerprint, version)}, kept across invalidations
+# so a server re-listing the same tools keeps its version and the router cache
+_catalog_fingerprints: Dict[str, Tuple[str, int]] = {}
+
+
+def to_openai_tool(tool: Any) -> Dict[str, Any]:
+    """Convert an MCP tool into the OpenAI/Azure function tool format."""
+    return {
+        "type": "function",
+        "function": {
+            "name": tool.name,
+            "description": getattr(tool, "description", f"Tool for {tool.name}"),
+            "parameters": getattr(tool, "inputSchema", {
+                "type": "object",
+                "properties": {},
+                "required": []
+            })
+        }
+    }
+
+
+def get_tool_name(tool: Dict[str, Any]) -> str:
+    """Name of a catalog tool in either the OpenAI or the Gemini format."""
+    if "function" in tool:
+        return tool.get("function", {}).get("name", "")
+    return tool.get("name", "")
+
+
+def get_tool_description(tool: Dict[str, Any]) -> str:
+    """Description of a catalog tool in either the OpenAI or the Gemini format."""
+    if "function" in tool:
+        return tool.get("function", {}).get("description", "")
+    return tool.get("description", "")
+
+
+def update_tool_catalog(server_name: str, tools: List[Any]):
+    """Build and store every provider payload for a server's tools.
+
+    The version only changes when the tool schemas do, so worker connects
+    and respawns with the same tools leave router cache entries valid.
+    """
+    global _catalog_version
+    openai_tools = [to_openai_tool(tool) for tool in tools]
+    fingerprint = hashlib.sha256(json_codec.dumps(openai_tools, sort_keys=True).encode("utf-8")).hexdigest()
+
+    known = _catalog_fingerprints.get(server_name)
+    if known is not None and known[0] == fingerprint:
+        if server_name in ToolCatalog:
+            return
+        version = known[1]
+    else:
+        _catalog_version += 1
+        version = _catalog_version
+        _catalog_fingerprints[server_name] = (fingerprint, version)
+
+    payloads = {
+        "MCP_CLIENT_AZURE_AI": openai_tools,
+        "MCP_CLIENT_OPENAI": openai_tools,
+        "MCP_CLIENT_GEMINI": [to_gemini_function_declaration(tool) for tool in openai_tools]
+    }
+    ToolCatalog[server_name] = {
+        "version": version,
+        "tool_names": [tool.name for tool in tools],
+        "payloads": {client: payloads.get(client, openai_tools) for client in ClientsConfig}
+    }
+
+
+def invalidate_tool_catalog(server_name: str):
+    """Drop a server's cached tools, e.g. on disconnect or tools/list_changed."""
+    ToolCatalog.pop(server_name, None)
+
+
+async def refresh_tool_catalog(server_name: str, session: Any):
+    """Re-list a server's tools over MCP and rebuild its catalog entry."""
+    tools_response = await session.list_tools()
+    update_tool_catalog(server_name, tools_response.tools if tools_response else [])
+
+
+def get_catalog_tools(server_name: str, selected_client: str) -> Optional[List[Dict[str, Any]]]:
+    """Cached tool payload for a server and client, or None if not cached."""
+    entry = ToolCatalog.get(server_name)
+    if entry is None:
+        return None
+    return entry["payloads"].get(selected_client)
+
+
+def get_catalog_version(server_names: List[str]) -> str:
+    """Version key for the tool set of the given servers."""
+    return ",".join(f"{name}:{ToolCatalog.get(name, {}).get('version', 0)}" for name in server_names)
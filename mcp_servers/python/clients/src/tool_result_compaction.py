@@ -0,0 +1,184 @@
+import ast
+import asyncio
+import threading
+from typing import Dict, Any, List, Tuple, Optional
+
+from src import json_codec
+from src.client_and_server_config import ToolResultCompactionConfig
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# (max_list_items, max_string_chars) tried in order until a result fits its budget
+COMPACTION_LEVELS = [
+    (None, None),
+    (50, 4000),
+    (25, 2000),
+    (10, 1000),
+    (5, 500),
+    (3, 200),
+    (1, 100)
+]
+
+_encoding = None
+_encoding_loaded = False
+# Compaction runs on worker threads for large results, the first of them may load the encoding
+_encoding_lock = threading.Lock()
+
+
+def get_encoding() -> Optional[Any]:
+    """tiktoken encoding, or None when tiktoken or its BPE files are unavailable.
+
+    Loaded by load_encoding at startup; the first call loads it otherwise.
+    """
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        with _encoding_lock:
+            if not _encoding_loaded:
+                if tiktoken is not None:
+                    try:
+                        _encoding = tiktoken.get_encoding("o200k_base")
+                    except Exception as err:
+                        print(f"tiktoken unavailable, estimating tokens from length =========>>>> {err}")
+                _encoding_loaded = True
+    return _encoding
+
+
+async def load_encoding():
+    """Load the encoding off the event loop, reading or downloading its BPE file."""
+    await asyncio.to_thread(get_encoding)
+
+
+def estimate_tokens(text: str) -> int:
+    encoding = get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def parse_tool_text(text: str) -> Any:
+    """Tool text as data: JSON, a Python literal (str() of a dict), or the text itself."""
+    try:
+        return json_codec.loads(text)
+    except (ValueError, TypeError):
+        pass
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return text
+
+
+def extract_tool_payload(tool_result: Any) -> Any:
+    """Drop MCP envelope fields (meta, annotations) and keep the parsed content."""
+    if not isinstance(tool_result, dict) or "content" not in tool_result:
+        return tool_result
+
+    content = []
+    for item in tool_result.get("content") or []:
+        if isinstance(item, dict) and item.get("type") == "text":
+            content.append(parse_tool_text(item.get("text", "")))
+        elif isinstance(item, dict):
+            content.append({key: value for key, value in item.items() if key not in ("annotations", "meta", "_meta")})
+        else:
+            content.append(item)
+
+    payload = content[0] if len(content) == 1 else content
+    if tool_result.get("isError"):
+        return {"isError": True, "content": payload}
+    return payload
+
+
+def project_fields(value: Any, fields: List[str]) -> Any:
+    """Keep only the configured fields of the outermost records that have any of them."""
+    if isinstance(value, dict):
+        if any(field in value for field in fields):
+            return {field: value[field] for field in fields if field in value}
+        return {key: project_fields(item, fields) for key, item in value.items()}
+    if isinstance(value, list):
+        return [project_fields(item, fields) for item in value]
+    return value
+
+
+def trim_tails(value: Any, max_list_items: Optional[int], max_string_chars: Optional[int]) -> Any:
+    """Cut long lists and strings, noting how much was dropped."""
+    if isinstance(value, dict):
+        return {key: trim_tails(item, max_list_items, max_string_chars) for key, item in value.items()}
+    if isinstance(value, list):
+        items = [trim_tails(item, max_list_items, max_string_chars) for item in value[:max_list_items]]
+        if max_list_items is not None and len(value) > max_list_items:
+            items.append(f"... {len(value) - max_list_items} more items")
+        return items
+    if isinstance(value, str) and max_string_chars is not None and len(value) > max_string_chars:
+        return f"{value[:max_string_chars]}... [{len(value) - max_string_chars} more chars]"
+    return value
+
+
+def serialize(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    return json_codec.dumps(value)
+
+
+def compact_tool_result(tool_name: str, tool_result: Any, token_budget: int) -> Tuple[str, int]:
+    """Compact one tool result to at most token_budget tokens; returns (text, tokens)."""
+    payload = extract_tool_payload(tool_result)
+    fields = ToolResultCompactionConfig.get("tool_fields", {}).get(tool_name)
+    if fields:
+        payload = project_fields(payload, fields)
+
+    for max_list_items, max_string_chars in COMPACTION_LEVELS:
+        text = serialize(trim_tails(payload, max_list_items, max_string_chars))
+        tokens = estimate_tokens(text)
+        if tokens <= token_budget:
+            return text, tokens
+
+    # Still too large (e.g. very wide records), cut the text itself
+    text = text[:token_budget * 4]
+    text = f"{text}... [truncated to fit the token budget]"
+    return text, estimate_tokens(text)
+
+
+def compact_tool_results(executed_tool_calls: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], str]]:
+    """Pair every executed tool call with the compacted result text for chat_history.
+
+    The results of one turn share turn_token_budget: smaller results keep what
+    they need and the remainder is split between the larger ones.
+    """
+    if not ToolResultCompactionConfig.get("enabled", True):
+        return [(tool_call, json_codec.dumps(tool_call["result"])) for tool_call in executed_tool_calls]
+
+    remaining = ToolResultCompactionConfig.get("turn_token_budget", 8000)
+    min_tokens = ToolResultCompactionConfig.get("min_tokens_per_result", 500)
+    sizes = [estimate_tokens(serialize(extract_tool_payload(tool_call["result"]))) for tool_call in executed_tool_calls]
+
+    compacted: List[Optional[str]] = [None] * len(executed_tool_calls)
+    order = sorted(range(len(executed_tool_calls)), key=lambda i: sizes[i])
+    for position, index in enumerate(order):
+        share = max(min_tokens, remaining // (len(order) - position))
+        tool_call = executed_tool_calls[index]
+        text, tokens = compact_tool_result(tool_call["name"], tool_call["result"], share)
+        compacted[index] = text
+        remaining = max(0, remaining - tokens)
+
+    return list(zip(executed_tool_calls, compacted))
+
+
+def _result_chars(tool_result: Any) -> int:
+    """Rough size of a raw MCP tool result, from its text content."""
+    if isinstance(tool_result, dict) and isinstance(tool_result.get("content"), list):
+        return sum(len(item.get("text") or "") for item in tool_result["content"] if isinstance(item, dict))
+    return len(tool_result) if isinstance(tool_result, str) else 0
+
+
+async def compact_tool_results_async(executed_tool_calls: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], str]]:
+    """compact_tool_results for the event loop.
+
+    Serializing and token-counting large results takes long enough to stall
+    other streams, so turns above thread_threshold_chars run on a worker thread.
+    """
+    threshold = ToolResultCompactionConfig.get("thread_threshold_chars", 20000)
+    if sum(_result_chars(tool_call["result"]) for tool_call in executed_tool_calls) < threshold:
+        return compact_tool_results(executed_tool_calls)
+    return await asyncio.to_thread(compact_tool_results, executed_tool_calls)
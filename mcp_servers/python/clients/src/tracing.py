@@ -0,0 +1,121 @@
+import os
+import functools
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional
+
+from src.client_and_server_config import TracingConfig
+
+try:
+    from opentelemetry import propagate
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+
+# Passed on to the MCP server processes, which set up their own tracer from them
+TRACING_ENV_PREFIXES = ("MCP_TRACING_", "OTEL_")
+
+_tracer = None
+_provider = None
+
+
+def tracing_enabled() -> bool:
+    return _tracer is not None
+
+
+def create_exporter(exporter: str, file_path: str):
+    if exporter == "file":
+        # One JSON span per line, appended by the gateway and the servers alike
+        out = open(file_path, "a", buffering=1)
+        return ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + "\n")
+    if exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    raise ValueError(f"Unknown tracing exporter: {exporter}")
+
+
+def init_tracing():
+    """Set up the tracer from TracingConfig; tracing stays off for exporter "none"."""
+    global _tracer, _provider
+    exporter = TracingConfig.get("exporter", "none")
+    if exporter == "none" or _tracer is not None:
+        return
+    if not OTEL_AVAILABLE:
+        print(f"Tracing exporter {exporter} needs opentelemetry-sdk, tracing is disabled")
+        return
+
+    try:
+        span_exporter = create_exporter(exporter, TracingConfig.get("file_path", "traces.jsonl"))
+    except Exception as err:
+        print(f"Error setting up tracing =========>>>> {err}")
+        return
+
+    sampler = ParentBased(TraceIdRatioBased(TracingConfig.get("sample_ratio", 0.1)))
+    _provider = TracerProvider(sampler=sampler, resource=Resource.create({"service.name": TracingConfig.get("service_name", "mcp-gateway")}))
+    # Spans are exported from a background thread, off the request path
+    _provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    _tracer = _provider.get_tracer("mcp-gateway")
+    print(f"Tracing enabled with the {exporter} exporter, sample ratio {TracingConfig.get('sample_ratio', 0.1)}")
+
+
+def shutdown_tracing():
+    """Flush the spans still queued for export."""
+    global _tracer, _provider
+    if _provider is not None:
+        _provider.shutdown()
+    _tracer = _provider = None
+
+
+@contextmanager
+def span(name: str, attributes: Optional[Dict[str, Any]] = None, server: bool = False) -> Iterator[Optional[Any]]:
+    """Current span for the block, or None when tracing is off.
+
+    Exceptions raised in the block are recorded on the span.
+    """
+    if _tracer is None:
+        yield None
+        return
+    kind = SpanKind.SERVER if server else SpanKind.INTERNAL
+    attributes = {key: value for key, value in (attributes or {}).items() if value is not None}
+    with _tracer.start_as_current_span(name, kind=kind, attributes=attributes) as current_span:
+        yield current_span
+
+
+def traced(name: str, server: bool = False):
+    """Decorator running a coroutine function inside a span."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(name, server=server):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def set_attributes(current_span: Optional[Any], attributes: Dict[str, Any]):
+    if current_span is not None and current_span.is_recording():
+        current_span.set_attributes({key: value for key, value in attributes.items() if value is not None})
+
+
+def set_error(current_span: Optional[Any], message: Any):
+    """Mark a span failed for errors that are returned rather than raised."""
+    if current_span is not None and current_span.is_recording():
+        current_span.set_status(Status(StatusCode.ERROR, str(message)))
+
+
+def trace_context_meta() -> Dict[str, str]:
+    """W3C traceparent/tracestate of the current span, for an MCP request's _meta."""
+    if _tracer is None:
+        return {}
+    carrier: Dict[str, str] = {}
+    propagate.inject(carrier)
+    return carrier
+
+
+def subprocess_environment() -> Dict[str, str]:
+    """The tracing variables of this process, for the MCP servers it starts."""
+    return {key: value for key, value in os.environ.items() if key.startswith(TRACING_ENV_PREFIXES)}
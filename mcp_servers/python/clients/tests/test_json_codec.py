@@ -0,0 +1,33 @@
+import json
+
+import pytest
+
+from src import json_codec
+
+
+@pytest.fixture(params=[True, False], ids=["orjson", "stdlib"])
+def codec(request, monkeypatch):
+    if request.param and not json_codec.ORJSON_AVAILABLE:
+        pytest.skip("orjson is not installed")
+    monkeypatch.setattr(json_codec, "ORJSON_AVAILABLE", request.param)
+    return json_codec
+
+
+def test_dumps_exception_as_its_message(codec):
+    response = {"Data": None, "Error": Exception("OpenAI API Key is required"), "Status": False}
+
+    assert json.loads(codec.dumps(response)) == {"Data": None, "Error": "OpenAI API Key is required", "Status": False}
+
+
+def test_to_jsonable_converts_nested_exception(codec):
+    value = {"errors": [ValueError("Max tokens must be > 0")]}
+
+    assert codec.to_jsonable(value) == {"errors": ["Max tokens must be > 0"]}
+
+
+def test_dumps_plain_object_by_attributes(codec):
+    class Result:
+        def __init__(self):
+            self.content = "ok"
+
+    assert json.loads(codec.dumps({"result": Result()})) == {"result": {"content": "ok"}}
@@ -0,0 +1,93 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.llm import routing
+
+
+class FakeAdapter:
+    def __init__(self, name, responses, delay=0):
+        self.name = name
+        self.responses = list(responses)
+        self.delay = delay
+        self.calls = 0
+
+    async def call(self, request, streaming_callback=None, max_retries=None):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.responses.pop(0)
+
+
+def response(status, status_code=None, transient=False):
+    return SimpleNamespace(Status=status, Data={} if status else None, Error=None if status else "failed",
+                           StatusCode=status_code, Transient=transient)
+
+
+@pytest.fixture(autouse=True)
+def fresh_endpoints(monkeypatch):
+    monkeypatch.setattr(routing, "_endpoints", {})
+
+
+def route(monkeypatch, primary, fallback, stream):
+    monkeypatch.setattr(routing, "get_provider_adapter", lambda name: fallback)
+    client_details = {"is_stream": stream, "chat_model": "primary", "fallbacks": [{"chat_model": "fallback"}]}
+    callback = {"is_stream": True, "streamCallbacks": object()} if stream else None
+    return asyncio.run(routing.call_llm(primary, client_details, callback))
+
+
+def test_broken_stream_is_not_failed_over(monkeypatch):
+    primary = FakeAdapter("MCP_CLIENT_OPENAI", [response(False, transient=True)])
+    fallback = FakeAdapter("MCP_CLIENT_OPENAI", [response(True)])
+
+    result, used = route(monkeypatch, primary, fallback, stream=True)
+
+    assert result.Transient and used is primary and fallback.calls == 0
+
+
+def test_streamed_status_failure_fails_over(monkeypatch):
+    primary = FakeAdapter("MCP_CLIENT_OPENAI", [response(False, status_code=503)])
+    fallback = FakeAdapter("MCP_CLIENT_OPENAI", [response(True)])
+
+    result, used = route(monkeypatch, primary, fallback, stream=True)
+
+    assert result.Status and used is fallback
+
+
+def test_transport_failure_fails_over_without_stream(monkeypatch):
+    primary = FakeAdapter("MCP_CLIENT_OPENAI", [response(False, transient=True)])
+    fallback = FakeAdapter("MCP_CLIENT_OPENAI", [response(True)])
+
+    result, used = route(monkeypatch, primary, fallback, stream=False)
+
+    assert result.Status and used is fallback
+
+
+def test_half_open_admits_one_trial_call(monkeypatch):
+    monkeypatch.setitem(routing.RoutingConfig, "recovery_time", 0)
+    state = routing.get_endpoint_state(routing.endpoint_key("MCP_CLIENT_OPENAI", {}))
+    state.opened_at = 0.0
+
+    assert state.accepts_calls() and state.start_call()
+    assert not state.accepts_calls() and not state.start_call()
+
+    state.trial_in_flight = False
+    state.record_success(0.1)
+    assert state.state == "closed" and state.accepts_calls()
+
+
+def test_concurrent_requests_skip_an_endpoint_under_trial(monkeypatch):
+    monkeypatch.setitem(routing.RoutingConfig, "recovery_time", 0)
+    primary = FakeAdapter("MCP_CLIENT_OPENAI", [response(True), response(True)], delay=0.05)
+    fallback = FakeAdapter("MCP_CLIENT_OPENAI", [response(True), response(True)])
+    monkeypatch.setattr(routing, "get_provider_adapter", lambda name: fallback)
+    routing.get_endpoint_state(routing.endpoint_key(primary.name, {"chat_model": "primary"})).opened_at = 0.0
+    client_details = {"chat_model": "primary", "fallbacks": [{"chat_model": "fallback"}]}
+
+    async def both():
+        return await asyncio.gather(routing.call_llm(primary, client_details), routing.call_llm(primary, client_details))
+
+    results = asyncio.run(both())
+
+    assert primary.calls == 1 and fallback.calls == 1
+    assert {id(used) for _, used in results} == {id(primary), id(fallback)}
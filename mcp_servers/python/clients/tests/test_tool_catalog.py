@@ -0,0 +1,29 @@
+from types import SimpleNamespace
+
+from src import tool_catalog
+
+
+def make_tool(name, description="A tool"):
+    return SimpleNamespace(name=name, description=description, inputSchema={"type": "object", "properties": {}})
+
+
+def test_same_tools_keep_the_catalog_version():
+    tool_catalog.update_tool_catalog("catalog-test", [make_tool("a"), make_tool("b")])
+    version = tool_catalog.get_catalog_version(["catalog-test"])
+
+    # A second worker connecting, then a respawn after invalidation
+    tool_catalog.update_tool_catalog("catalog-test", [make_tool("a"), make_tool("b")])
+    tool_catalog.invalidate_tool_catalog("catalog-test")
+    tool_catalog.update_tool_catalog("catalog-test", [make_tool("a"), make_tool("b")])
+
+    assert tool_catalog.get_catalog_version(["catalog-test"]) == version
+
+
+def test_changed_tools_bump_the_catalog_version():
+    tool_catalog.update_tool_catalog("catalog-test-changed", [make_tool("a")])
+    version = tool_catalog.get_catalog_version(["catalog-test-changed"])
+
+    tool_catalog.update_tool_catalog("catalog-test-changed", [make_tool("a", description="Changed")])
+
+    assert tool_catalog.get_catalog_version(["catalog-test-changed"]) != version
+    assert tool_catalog.ToolCatalog["catalog-test-changed"]["payloads"]["MCP_CLIENT_OPENAI"][0]["function"]["description"] == "Changed"
@@ -0,0 +1,27 @@
+import asyncio
+
+from src import tool_result_compaction
+
+
+def make_call(name, records):
+    text = tool_result_compaction.json_codec.dumps([{"id": str(i), "snippet": "x" * 50} for i in range(records)])
+    return {"name": name, "result": {"content": [{"type": "text", "text": text}], "isError": False}}
+
+
+def test_large_turns_are_compacted_on_a_worker_thread(monkeypatch):
+    offloaded = []
+    to_thread = asyncio.to_thread
+
+    async def recording_to_thread(func, *args):
+        offloaded.append(func)
+        return await to_thread(func, *args)
+
+    monkeypatch.setattr(tool_result_compaction.asyncio, "to_thread", recording_to_thread)
+    monkeypatch.setitem(tool_result_compaction.ToolResultCompactionConfig, "thread_threshold_chars", 20000)
+    small = [make_call("small_tool", 3)]
+    large = [make_call("large_tool", 1000)]
+
+    assert asyncio.run(tool_result_compaction.compact_tool_results_async(small)) == tool_result_compaction.compact_tool_results(small)
+    assert offloaded == []
+    assert asyncio.run(tool_result_compaction.compact_tool_results_async(large)) == tool_result_compaction.compact_tool_results(large)
+    assert offloaded == [tool_result_compaction.compact_tool_results]
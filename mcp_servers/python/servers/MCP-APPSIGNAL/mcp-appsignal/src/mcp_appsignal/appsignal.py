@@ -1,21 +1,117 @@
+import os
 import requests
 import json
-from typing import Optional, Dict, Any, List
+import hashlib
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Iterator, Callable
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 BASE_URL = "https://appsignal.com/graphql"
 
+# Connection pooling and request concurrency per API token
+POOL_SIZE = int(os.getenv("MCP_APPSIGNAL_POOL_SIZE", "8"))
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MCP_APPSIGNAL_MAX_CONCURRENT_REQUESTS", "4"))
+REQUEST_TIMEOUT = float(os.getenv("MCP_APPSIGNAL_TIMEOUT", "30"))
+
+# Send automatic persisted query hashes instead of the full query text
+PERSISTED_QUERIES = os.getenv("MCP_APPSIGNAL_PERSISTED_QUERIES", "false").lower() in ("1", "true", "yes")
+
+# Page size of incident listings walked by iter_incidents
+INCIDENT_PAGE_SIZE = int(os.getenv("MCP_APPSIGNAL_PAGE_SIZE", "100"))
+
+PERSISTED_QUERY_NOT_FOUND = "PersistedQueryNotFound"
+PERSISTED_QUERY_NOT_SUPPORTED = "PersistedQueryNotSupported"
+
+
+class _TokenClient:
+    """Keep-alive session and concurrency limit shared by all calls with one token."""
+
+    def __init__(self):
+        self.session = requests.Session()
+        retries = Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504], allowed_methods=["POST"])
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=retries))
+        self.session.headers.update({"Content-Type": "application/json"})
+        self.semaphore = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+
+
+_clients: Dict[str, _TokenClient] = {}
+_clients_lock = threading.Lock()
+
+# Base URLs that rejected persisted queries, so they get the full query text
+_persisted_queries_unsupported = set()
+
+# Fetches the next incident page while the current one is consumed
+_prefetch_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="appsignal-prefetch")
+
+INCIDENT_KINDS = {
+    "exception": "exceptionIncidents",
+    "performance": "performanceIncidents",
+}
+
+
+def _get_client(token: str) -> _TokenClient:
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _TokenClient()
+            _clients[key] = client
+        return client
+
+
+@lru_cache(maxsize=64)
+def _query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+def _persisted_query_error(result: Dict[str, Any]) -> Optional[str]:
+    """PersistedQueryNotFound/NotSupported if the server returned that error."""
+    for error in result.get("errors") or []:
+        code = (error.get("extensions") or {}).get("code", "")
+        message = error.get("message", "")
+        if message == PERSISTED_QUERY_NOT_FOUND or code == "PERSISTED_QUERY_NOT_FOUND":
+            return PERSISTED_QUERY_NOT_FOUND
+        if message == PERSISTED_QUERY_NOT_SUPPORTED or code == "PERSISTED_QUERY_NOT_SUPPORTED":
+            return PERSISTED_QUERY_NOT_SUPPORTED
+    return None
+
+
 class AppSignalService:
     def __init__(self, token: str):
         self.token = token
         self.base_url = BASE_URL
+        self.client = _get_client(token)
+
+    def _send(self, body: Dict[str, Any]) -> requests.Response:
+        url = f"{self.base_url}?token={self.token}"
+        with self.client.semaphore:
+            return self.client.session.post(url, json=body, timeout=REQUEST_TIMEOUT)
 
     def _post_graphql(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
         """Make a GraphQL POST request to AppSignal."""
-        url = f"{self.base_url}?token={self.token}"
-        headers = {
-            "Content-Type": "application/json"
-        }
-        response = requests.post(url, headers=headers, json={"query": query, "variables": variables})
+        if PERSISTED_QUERIES and self.base_url not in _persisted_queries_unsupported:
+            extensions = {"persistedQuery": {"version": 1, "sha256Hash": _query_hash(query)}}
+            response = self._send({"variables": variables, "extensions": extensions})
+            try:
+                result = response.json()
+            except ValueError:
+                result = {}
+            error = _persisted_query_error(result) if isinstance(result, dict) else None
+            if response.status_code == 200 and error is None:
+                return result
+            if error == PERSISTED_QUERY_NOT_FOUND:
+                # Register the query under its hash for the next calls
+                response = self._send({"query": query, "variables": variables, "extensions": extensions})
+            elif error == PERSISTED_QUERY_NOT_SUPPORTED or response.status_code == 400:
+                _persisted_queries_unsupported.add(self.base_url)
+                response = self._send({"query": query, "variables": variables})
+        else:
+            response = self._send({"query": query, "variables": variables})
+
         if response.status_code == 200:
             return response.json()
         else:
@@ -257,4 +353,104 @@ class AppSignalService:
             "state": state,
             "order": None
         }
-        return self._post_graphql(query, variables) 
\ No newline at end of file
+        return self._post_graphql(query, variables)
+
+    def _get_incident_page(self, app_id: str, kind: str, limit: int, offset: int, state: Optional[str] = None) -> List[Dict[str, Any]]:
+        if kind == "exception":
+            result = self.get_all_errors(app_id=app_id, limit=limit, offset=offset)
+        else:
+            result = self.get_all_incidents(app_id=app_id, limit=limit, offset=offset, state=state)
+        if result.get("errors"):
+            raise Exception(f"❌ GraphQL errors: {json.dumps(result['errors'])}")
+        app = (result.get("data") or {}).get("app") or {}
+        return app.get(INCIDENT_KINDS[kind]) or []
+
+    def iter_incidents(
+        self,
+        app_id: str,
+        kind: str = "exception",
+        state: Optional[str] = None,
+        page_size: int = INCIDENT_PAGE_SIZE,
+        max_rows: Optional[int] = None,
+        stop_when: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over all exception or performance incidents, page by page.
+
+        The next page is fetched in the background while the current one is
+        consumed. Iteration ends after the last page, after max_rows incidents,
+        or at the first incident for which stop_when returns True.
+
+        Args:
+            app_id (str): App ID.
+            kind (str): "exception" or "performance".
+            state (str, optional): Incident state (performance incidents only).
+            page_size (int): Incidents per request.
+            max_rows (int, optional): Maximum incidents to yield.
+            stop_when (callable, optional): Predicate that stops iteration.
+
+        Yields:
+            dict: One incident.
+        """
+        if kind not in INCIDENT_KINDS:
+            raise ValueError(f"Unknown incident kind: {kind}")
+
+        offset = 0
+        yielded = 0
+        next_page = _prefetch_executor.submit(self._get_incident_page, app_id, kind, page_size, offset, state)
+        try:
+            while next_page is not None:
+                page = next_page.result()
+                offset += page_size
+                next_page = None
+                if len(page) == page_size:
+                    next_page = _prefetch_executor.submit(self._get_incident_page, app_id, kind, page_size, offset, state)
+
+                for incident in page:
+                    if stop_when is not None and stop_when(incident):
+                        return
+                    yield incident
+                    yielded += 1
+                    if max_rows is not None and yielded >= max_rows:
+                        return
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+
+    def get_incident_summary(self, app_id: str, kinds: Optional[List[str]] = None, state: Optional[str] = None, max_rows: int = 1000, top: int = 10) -> Dict[str, Any]:
+        """
+        Summarize incidents across all pages instead of returning raw pages.
+
+        Args:
+            app_id (str): App ID.
+            kinds (list, optional): Incident kinds to include (default: both).
+            state (str, optional): Performance incident state filter.
+            max_rows (int): Maximum incidents read per kind.
+            top (int): Number of incidents listed per kind.
+
+        Returns:
+            dict: Totals by severity and namespace, plus the top incidents per kind.
+        """
+        summary = {}
+        for kind in kinds or list(INCIDENT_KINDS):
+            incidents = list(self.iter_incidents(app_id, kind=kind, state=state, max_rows=max_rows + 1))
+            truncated = len(incidents) > max_rows
+            incidents = incidents[:max_rows]
+
+            if kind == "exception":
+                # Most frequent first
+                ranked = sorted(incidents, key=lambda i: i.get("count") or 0, reverse=True)
+                fields = ["number", "exceptionName", "count", "severity", "namespace", "lastOccurredAt"]
+            else:
+                # Most recent first
+                ranked = sorted(incidents, key=lambda i: i.get("lastOccurredAt") or "", reverse=True)
+                fields = ["number", "description", "severity", "namespace", "lastOccurredAt"]
+
+            summary[INCIDENT_KINDS[kind]] = {
+                "total": len(incidents),
+                "truncated": truncated,
+                "by_severity": dict(Counter(i.get("severity") or "unknown" for i in incidents)),
+                "by_namespace": dict(Counter(i.get("namespace") or "unknown" for i in incidents)),
+                "top": [{field: incident.get(field) for field in fields} for incident in ranked[:top]]
+            }
+        return summary
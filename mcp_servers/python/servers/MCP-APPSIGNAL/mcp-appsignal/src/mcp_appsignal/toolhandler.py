@@ -1,3 +1,4 @@
+import json
 from collections.abc import Sequence
 from mcp.types import (
     Tool,
@@ -12,6 +13,9 @@ CREDENTIALS_ARG = "__credentials__"
 SERVER_CREDENTIALS_ARG = "server_credentials"
 
 class ToolHandler():
+    # Maximum concurrent runs of this tool; None uses the server default
+    max_concurrency: int | None = None
+
     def __init__(self, tool_name: str):
         self.name = tool_name
 
@@ -61,4 +65,9 @@ class ToolHandler():
         raise NotImplementedError()
 
     def run_tool(self, args: dict) -> Sequence[TextContent | ImageContent | EmbeddedResource]:
-        raise NotImplementedError() 
\ No newline at end of file
+        raise NotImplementedError() 
+
+
+def to_json(value) -> str:
+    """Compact JSON for tool results; indentation only costs the model tokens."""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
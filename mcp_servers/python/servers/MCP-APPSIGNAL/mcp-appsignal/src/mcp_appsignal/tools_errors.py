@@ -6,7 +6,6 @@ from mcp.types import (
     EmbeddedResource,
 )
 from . import appsignal
-import json
 from . import toolhandler
 
 class SearchErrorsToolHandler(toolhandler.ToolHandler):
@@ -58,7 +57,7 @@ class SearchErrorsToolHandler(toolhandler.ToolHandler):
         return [
             TextContent(
                 type="text",
-                text=json.dumps(result, indent=2)
+                text=toolhandler.to_json(result)
             )
         ]
 
@@ -112,7 +111,7 @@ class GetAllErrorsToolHandler(toolhandler.ToolHandler):
         return [
             TextContent(
                 type="text",
-                text=json.dumps(result, indent=2)
+                text=toolhandler.to_json(result)
             )
         ]
 
@@ -182,7 +181,7 @@ class GetIncidentDetailsToolHandler(toolhandler.ToolHandler):
         return [
             TextContent(
                 type="text",
-                text=json.dumps(result, indent=2)
+                text=toolhandler.to_json(result)
             )
         ]
 
@@ -242,6 +241,72 @@ class GetAllIncidentsToolHandler(toolhandler.ToolHandler):
         return [
             TextContent(
                 type="text",
-                text=json.dumps(result, indent=2)
+                text=toolhandler.to_json(result)
             )
-        ] 
\ No newline at end of file
+        ]
+
+class GetIncidentSummaryToolHandler(toolhandler.ToolHandler):
+    def __init__(self):
+        super().__init__("get_appsignal_incident_summary")
+
+    def get_tool_description(self) -> Tool:
+        return Tool(
+            name=self.name,
+            description="Get a compact summary of all exception and/or performance incidents in AppSignal: totals by severity and namespace plus the top incidents. Reads every page, so prefer this over paging through get_appsignal_all_errors or get_appsignal_all_incidents.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    toolhandler.CREDENTIALS_ARG: self.get_credentials_arg_schema(),
+                    toolhandler.SERVER_CREDENTIALS_ARG: self.get_credentials_arg_schema(),
+                    toolhandler.TOKEN_ARG: self.get_token_arg_schema(),
+                    "app_id": {
+                        "type": "string",
+                        "description": "AppSignal App ID (if not provided in credentials)"
+                    },
+                    "kind": {
+                        "type": "string",
+                        "enum": ["exception", "performance", "all"],
+                        "description": "Incidents to summarize (default: all)",
+                        "default": "all"
+                    },
+                    "state": {
+                        "type": "string",
+                        "description": "Performance incident state filter (optional)"
+                    },
+                    "max_incidents": {
+                        "type": "integer",
+                        "description": "Maximum incidents read per kind (default: 1000)",
+                        "default": 1000
+                    },
+                    "top": {
+                        "type": "integer",
+                        "description": "Number of incidents listed per kind (default: 10)",
+                        "default": 10
+                    }
+                },
+                "required": []
+            }
+        )
+
+    def run_tool(self, args: dict) -> Sequence[TextContent | ImageContent | EmbeddedResource]:
+        # Extract credentials
+        personal_api, app_id = self.extract_credentials(args)
+
+        appsignal_service = appsignal.AppSignalService(token=personal_api)
+        kind = args.get('kind', 'all')
+        kinds = None if kind == 'all' else [kind]
+
+        result = appsignal_service.get_incident_summary(
+            app_id=app_id,
+            kinds=kinds,
+            state=args.get('state'),
+            max_rows=args.get('max_incidents', 1000),
+            top=args.get('top', 10)
+        )
+
+        return [
+            TextContent(
+                type="text",
+                text=toolhandler.to_json(result)
+            )
+        ]
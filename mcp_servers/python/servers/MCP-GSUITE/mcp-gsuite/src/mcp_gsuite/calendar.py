@@ -1,10 +1,27 @@
-from googleapiclient.discovery import build
-from . import gauth
+from . import service_cache
 import logging
 import traceback
 from datetime import datetime
 import pytz
 
+# Keys each projection returns; the fields= masks sent to the API are built from them
+EVENT_KEYS = {
+    'summary': ['id', 'summary', 'start', 'end', 'status', 'location', 'hangoutLink'],
+    'full': [
+        'id', 'summary', 'description', 'start', 'end', 'status', 'creator', 'organizer',
+        'attendees', 'location', 'hangoutLink', 'conferenceData', 'recurringEventId'
+    ],
+}
+
+# Returned key -> calendarList key
+CALENDAR_KEYS = {
+    'summary': {'id': 'id', 'summary': 'summary', 'primary': 'primary'},
+    'full': {
+        'id': 'id', 'summary': 'summary', 'primary': 'primary', 'time_zone': 'timeZone',
+        'etag': 'etag', 'access_role': 'accessRole'
+    },
+}
+
 class CalendarService():
     def __init__(self, credentials):
         """
@@ -13,31 +30,31 @@ class CalendarService():
         Args:
             credentials: Google OAuth2 credentials object
         """
-        authorized_credentials = gauth.authorize_credentials(credentials)
-        self.service = build('calendar', 'v3', credentials=authorized_credentials)
+        self.service = service_cache.get_service('calendar', 'v3', credentials)
     
-    def list_calendars(self) -> list:
+    def list_calendars(self, projection: str = 'full') -> list:
         """
         Lists all calendars accessible by the user.
         
+        Args:
+            projection (str): 'summary' for id, summary and primary only, 'full' for all metadata
+        
         Returns:
             list: List of calendar objects with their metadata
         """
         try:
-            calendar_list = self.service.calendarList().list().execute()
+            keys = CALENDAR_KEYS[projection]
+            calendar_list = self.service.calendarList().list(
+                fields=f"items(kind,{','.join(keys.values())})"
+            ).execute()
 
             calendars = []
             
             for calendar in calendar_list.get('items', []):
                 if calendar.get('kind') == 'calendar#calendarListEntry':
-                    calendars.append({
-                        'id': calendar.get('id'),
-                        'summary': calendar.get('summary'),
-                        'primary': calendar.get('primary', False),
-                        'time_zone': calendar.get('timeZone'),
-                        'etag': calendar.get('etag'),
-                        'access_role': calendar.get('accessRole')
-                    })
+                    calendar_entry = {key: calendar.get(api_key) for key, api_key in keys.items()}
+                    calendar_entry['primary'] = calendar.get('primary', False)
+                    calendars.append(calendar_entry)
 
             return calendars
                 
@@ -46,7 +63,7 @@ class CalendarService():
             logging.error(traceback.format_exc())
             return []
 
-    def get_events(self, time_min=None, time_max=None, max_results=250, show_deleted=False, calendar_id: str ='primary'):
+    def get_events(self, time_min=None, time_max=None, max_results=250, show_deleted=False, calendar_id: str ='primary', projection: str = 'full'):
         """
         Retrieve calendar events within a specified time range.
         
@@ -55,6 +72,7 @@ class CalendarService():
             time_max (str, optional): End time in RFC3339 format
             max_results (int): Maximum number of events to return (1-2500)
             show_deleted (bool): Whether to include deleted events
+            projection (str): 'summary' or 'full', see EVENT_KEYS
             
         Returns:
             list: List of calendar events
@@ -74,7 +92,8 @@ class CalendarService():
                 'maxResults': max_results,
                 'singleEvents': True,
                 'orderBy': 'startTime',
-                'showDeleted': show_deleted
+                'showDeleted': show_deleted,
+                'fields': f"items({','.join(EVENT_KEYS[projection])})"
             }
             
             # Add optional time_max if specified
@@ -90,21 +109,7 @@ class CalendarService():
             # Process and return the events
             processed_events = []
             for event in events:
-                processed_event = {
-                    'id': event.get('id'),
-                    'summary': event.get('summary'),
-                    'description': event.get('description'),
-                    'start': event.get('start'),
-                    'end': event.get('end'),
-                    'status': event.get('status'),
-                    'creator': event.get('creator'),
-                    'organizer': event.get('organizer'),
-                    'attendees': event.get('attendees'),
-                    'location': event.get('location'),
-                    'hangoutLink': event.get('hangoutLink'),
-                    'conferenceData': event.get('conferenceData'),
-                    'recurringEventId': event.get('recurringEventId')
-                }
+                processed_event = {key: event.get(key) for key in EVENT_KEYS[projection]}
                 processed_events.append(processed_event)
                 
             return processed_events
@@ -210,7 +215,7 @@ class CalendarService():
         """
         try:
             # First check if we can access the calendar
-            calendar_list = self.service.calendarList().list().execute()
+            calendar_list = self.service.calendarList().list(fields='items(id)').execute()
             calendars = calendar_list.get('items', [])
             has_direct_access = any(cal.get('id') == email for cal in calendars)
             
@@ -224,7 +229,7 @@ class CalendarService():
             
             # Make the freebusy query
             try:
-                freebusy = self.service.freebusy().query(body=query).execute()
+                freebusy = self.service.freebusy().query(body=query, fields='calendars').execute()
                 
                 # Process the response
                 calendars = freebusy.get('calendars', {})
@@ -1,10 +1,67 @@
-from googleapiclient.discovery import build 
-from . import gauth
+from . import service_cache
+from . import message_store
 import logging
 import base64
+import sqlite3
 import traceback
 from email.mime.text import MIMEText
 from typing import Tuple
+from googleapiclient.errors import HttpError
+
+# Gmail accepts at most 100 calls in one batch request
+BATCH_SIZE = 100
+
+# Headers _parse_message reads, requested with format=metadata
+METADATA_HEADERS = [
+    'Subject', 'From', 'To', 'Date', 'Cc', 'Bcc',
+    'Message-ID', 'In-Reply-To', 'References', 'Delivered-To',
+]
+
+# Header name -> key _parse_message returns it under
+HEADER_KEYS = {
+    'subject': 'subject', 'from': 'from', 'to': 'to', 'date': 'date', 'cc': 'cc', 'bcc': 'bcc',
+    'message-id': 'message_id', 'in-reply-to': 'in_reply_to', 'references': 'references',
+    'delivered-to': 'delivered_to',
+}
+
+# Message keys and headers each projection returns; the fields= masks are built from them
+MESSAGE_KEYS = {
+    'summary': ['id', 'threadId', 'labelIds', 'snippet'],
+    'full': ['id', 'threadId', 'historyId', 'internalDate', 'sizeEstimate', 'labelIds', 'snippet'],
+}
+MESSAGE_HEADERS = {
+    'summary': ['Subject', 'From', 'To', 'Date'],
+    'full': METADATA_HEADERS,
+}
+
+# Payload parts read by _extract_body and _parse_attachments; nested parts are returned whole
+BODY_PAYLOAD_FIELDS = "payload(mimeType,headers,body/data,parts(partId,filename,mimeType,body(data,attachmentId),parts))"
+# Headers and attachment references only, without any body data
+ATTACHMENT_PAYLOAD_FIELDS = "payload(headers,parts(partId,filename,mimeType,body/attachmentId))"
+
+RETRYABLE_STATUS_CODES = {429, 500, 503}
+
+# Mailbox changes the message store follows with users.history.list
+HISTORY_TYPES = ['messageAdded', 'messageDeleted', 'labelAdded', 'labelRemoved']
+HISTORY_FIELDS = (
+    "history(messagesAdded/message/id,messagesDeleted/message/id,"
+    "labelsAdded/message(id,labelIds),labelsRemoved/message(id,labelIds)),historyId,nextPageToken"
+)
+
+
+def message_fields(projection: str, payload_fields: str = "payload/headers") -> str:
+    """fields= mask for a messages.get of the given projection."""
+    return ','.join(MESSAGE_KEYS[projection] + [payload_fields])
+
+
+def project_message(message: dict, projection: str, with_body: bool = True) -> dict:
+    """A message parsed with the full projection, reduced to the given one."""
+    if projection == 'full':
+        if with_body:
+            return message
+        return {key: value for key, value in message.items() if key not in ('body', 'mimeType')}
+    keys = set(MESSAGE_KEYS[projection]) | {HEADER_KEYS[name.lower()] for name in MESSAGE_HEADERS[projection]}
+    return {key: value for key, value in message.items() if key in keys}
 
 
 class GmailService():
@@ -15,61 +72,180 @@ class GmailService():
         Args:
             credentials: Google OAuth2 credentials object
         """
-        authorized_credentials = gauth.authorize_credentials(credentials)
-        self.service = build('gmail', 'v1', credentials=authorized_credentials)
+        self.credentials = credentials
+        self.service = service_cache.get_service('gmail', 'v1', credentials)
+
+    def _get_store(self) -> message_store.MessageStore | None:
+        """
+        The account's local message store, synced with Gmail first.
+        
+        Returns:
+            MessageStore: The synced store
+            None: If the store is off or could not be synced; callers then use the Gmail API
+        """
+        if not message_store.STORE_ENABLED:
+            return None
+        try:
+            store = message_store.get_store(self.credentials, self._get_email_address)
+            self._sync_store(store)
+            return store
+        except Exception as e:
+            message_store.logger.error(f"Error syncing the message store, using the Gmail API: {str(e)}")
+            message_store.logger.error(traceback.format_exc())
+            return None
+
+    def _get_email_address(self) -> str:
+        return self.service.users().getProfile(userId='me', fields='emailAddress').execute()['emailAddress']
+
+    def _sync_store(self, store: message_store.MessageStore):
+        """
+        Apply the mailbox changes since the store's last historyId, at most
+        once per MCP_GSUITE_MESSAGE_STORE_SYNC_INTERVAL.
+        """
+        with store.sync_lock:
+            if not store.sync_due():
+                return
+            history_id = store.history_id
+            if history_id is not None:
+                try:
+                    self._apply_history(store, history_id)
+                except HttpError as e:
+                    # Gmail keeps about a week of history, older stores are rebuilt
+                    if e.resp.status != 404:
+                        raise
+                    message_store.logger.info("Message store history expired, rebuilding it")
+                    store.clear()
+                    history_id = None
+            if history_id is None:
+                self._seed_store(store)
+            store.mark_synced()
+
+    def _seed_store(self, store: message_store.MessageStore):
+        # Read first, so changes made while seeding are applied by the next sync
+        profile = self.service.users().getProfile(userId='me', fields='historyId').execute()
+        if message_store.SEED_MESSAGES > 0:
+            result = self.service.users().messages().list(
+                userId='me',
+                maxResults=min(message_store.SEED_MESSAGES, 500),
+                fields='messages/id'
+            ).execute()
+            self._get_headers([msg['id'] for msg in result.get('messages', [])], store)
+        store.set_state('history_id', profile['historyId'])
+
+    def _apply_history(self, store: message_store.MessageStore, history_id: str):
+        added, deleted, labels = set(), set(), {}
+        page_token = None
+        while True:
+            result = self.service.users().history().list(
+                userId='me',
+                startHistoryId=history_id,
+                historyTypes=HISTORY_TYPES,
+                pageToken=page_token,
+                fields=HISTORY_FIELDS
+            ).execute()
+            for record in result.get('history', []):
+                for change in record.get('messagesAdded', []):
+                    added.add(change['message']['id'])
+                    deleted.discard(change['message']['id'])
+                for change in record.get('messagesDeleted', []):
+                    deleted.add(change['message']['id'])
+                    added.discard(change['message']['id'])
+                    labels.pop(change['message']['id'], None)
+                for change in record.get('labelsAdded', []) + record.get('labelsRemoved', []):
+                    # The message's labels after the change, not only the changed ones
+                    labels[change['message']['id']] = change['message'].get('labelIds', [])
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                break
+
+        if added or deleted or labels:
+            store.delete_messages(list(deleted))
+            store.set_labels(labels)
+            self._get_headers(list(added), store)
+            # Any query may match differently now
+            store.clear_queries()
+        store.set_state('history_id', result['historyId'])
+
+    def _get_headers(self, message_ids: list[str], store: message_store.MessageStore | None = None) -> dict:
+        """
+        Fetch and parse the full-projection headers of several messages, storing them in store.
+        
+        Returns:
+            dict: Parsed messages keyed by ID; failed IDs are missing
+        """
+        raw_messages = self._batch_get_messages(
+            message_ids,
+            format='metadata',
+            metadata_headers=MESSAGE_HEADERS['full'],
+            fields=message_fields('full')
+        )
+        parsed = {}
+        for message_id, txt in raw_messages.items():
+            parsed_message = self._parse_message(txt=txt, parse_body=False)
+            if parsed_message:
+                parsed[message_id] = parsed_message
+        if store is not None:
+            self._put_in_store(store, [(message, None) for message in parsed.values()])
+        return parsed
+
+    def _put_in_store(self, store: message_store.MessageStore, messages: list[Tuple[dict, dict | None]]):
+        """Store parsed messages; a failed write only costs the next read an API call."""
+        try:
+            store.put_messages(messages)
+        except Exception as e:
+            message_store.logger.error(f"Error writing to the message store: {str(e)}")
+
+    def _get_stored(self, store: message_store.MessageStore | None, message_ids: list[str], complete: bool = False) -> dict:
+        """Stored messages keyed by ID; none when reading fails, so callers use the Gmail API."""
+        if store is None:
+            return {}
+        try:
+            return store.get_messages(message_ids, complete=complete)
+        except Exception as e:
+            message_store.logger.error(f"Error reading the message store, using the Gmail API: {str(e)}")
+            return {}
+
+    def _get_stored_query(self, store: message_store.MessageStore | None, query: str, max_results: int) -> list[str] | None:
+        """A query's stored message IDs; None when unknown or reading fails."""
+        if store is None:
+            return None
+        try:
+            return store.get_query(query, max_results)
+        except Exception as e:
+            message_store.logger.error(f"Error reading the message store, using the Gmail API: {str(e)}")
+            return None
+
+    def _put_query_in_store(self, store: message_store.MessageStore, query: str, max_results: int, message_ids: list[str]):
+        try:
+            store.put_query(query, max_results, message_ids)
+        except Exception as e:
+            message_store.logger.error(f"Error writing to the message store: {str(e)}")
 
-    def _parse_message(self, txt, parse_body=False) -> dict | None:
+    def _parse_message(self, txt, parse_body=False, projection='full') -> dict | None:
         """
         Parse a Gmail message into a structured format.
         
         Args:
             txt (dict): Raw message from Gmail API
             parse_body (bool): Whether to parse and include the message body (default: False)
+            projection (str): 'summary' or 'full', see MESSAGE_KEYS and MESSAGE_HEADERS
         
         Returns:
             dict: Parsed message containing comprehensive metadata
             None: If parsing fails
         """
         try:
-            message_id = txt.get('id')
-            thread_id = txt.get('threadId')
             payload = txt.get('payload', {})
             headers = payload.get('headers', [])
 
-            metadata = {
-                'id': message_id,
-                'threadId': thread_id,
-                'historyId': txt.get('historyId'),
-                'internalDate': txt.get('internalDate'),
-                'sizeEstimate': txt.get('sizeEstimate'),
-                'labelIds': txt.get('labelIds', []),
-                'snippet': txt.get('snippet'),
-            }
+            metadata = {key: txt.get(key) for key in MESSAGE_KEYS[projection]}
+            metadata['labelIds'] = txt.get('labelIds', [])
 
+            header_names = {name.lower() for name in MESSAGE_HEADERS[projection]}
             for header in headers:
                 name = header.get('name', '').lower()
-                value = header.get('value', '')
-                
-                if name == 'subject':
-                    metadata['subject'] = value
-                elif name == 'from':
-                    metadata['from'] = value
-                elif name == 'to':
-                    metadata['to'] = value
-                elif name == 'date':
-                    metadata['date'] = value
-                elif name == 'cc':
-                    metadata['cc'] = value
-                elif name == 'bcc':
-                    metadata['bcc'] = value
-                elif name == 'message-id':
-                    metadata['message_id'] = value
-                elif name == 'in-reply-to':
-                    metadata['in_reply_to'] = value
-                elif name == 'references':
-                    metadata['references'] = value
-                elif name == 'delivered-to':
-                    metadata['delivered_to'] = value
+                if name in header_names:
+                    metadata[HEADER_KEYS[name]] = header.get('value', '')
 
             if parse_body:
                 body = self._extract_body(payload)
@@ -126,7 +302,7 @@ class GmailService():
             logging.error(f"Error extracting body: {str(e)}")
             return None
 
-    def query_emails(self, query=None, max_results=100):
+    def query_emails(self, query=None, max_results=100, projection='full'):
         """
         Query emails from Gmail based on a search query.
         
@@ -134,6 +310,7 @@ class GmailService():
             query (str, optional): Gmail search query (e.g., 'is:unread', 'from:example@gmail.com')
                                 If None, returns all emails
             max_results (int): Maximum number of emails to retrieve (1-500, default: 100)
+            projection (str): 'summary' or 'full', see MESSAGE_KEYS and MESSAGE_HEADERS
         
         Returns:
             list: List of parsed email messages, newest first
@@ -141,24 +318,49 @@ class GmailService():
         try:
             # Ensure max_results is within API limits
             max_results = min(max(1, max_results), 500)
-            
-            # Get the list of messages
-            result = self.service.users().messages().list(
-                userId='me',
-                maxResults=max_results,
-                q=query if query else ''
-            ).execute()
+            query = query if query else ''
 
-            messages = result.get('messages', [])
-            parsed = []
+            # A query repeated while the mailbox is unchanged matches the same messages
+            store = self._get_store()
+            message_ids = self._get_stored_query(store, query, max_results)
 
-            # Fetch full message details for each message
-            for msg in messages:
-                txt = self.service.users().messages().get(
-                    userId='me', 
-                    id=msg['id']
+            if message_ids is None:
+                # Get the list of messages
+                result = self.service.users().messages().list(
+                    userId='me',
+                    maxResults=max_results,
+                    q=query,
+                    fields='messages/id'
                 ).execute()
-                parsed_message = self._parse_message(txt=txt, parse_body=False)
+
+                messages = result.get('messages', [])
+                message_ids = [msg['id'] for msg in messages]
+                if store is not None:
+                    self._put_query_in_store(store, query, max_results, message_ids)
+
+            if store is not None:
+                # Only messages missing from the store are fetched
+                stored = {message_id: message for message_id, (message, _) in self._get_stored(store, message_ids).items()}
+                stored.update(self._get_headers([message_id for message_id in message_ids if message_id not in stored], store))
+                return [
+                    project_message(stored[message_id], projection, with_body=False)
+                    for message_id in message_ids if message_id in stored
+                ]
+
+            # Fetch only the headers we parse, batched instead of one call per message
+            raw_messages = self._batch_get_messages(
+                message_ids,
+                format='metadata',
+                metadata_headers=MESSAGE_HEADERS[projection],
+                fields=message_fields(projection)
+            )
+
+            parsed = []
+            for message_id in message_ids:
+                txt = raw_messages.get(message_id)
+                if txt is None:
+                    continue
+                parsed_message = self._parse_message(txt=txt, parse_body=False, projection=projection)
                 if parsed_message:
                     parsed.append(parsed_message)
                     
@@ -169,44 +371,44 @@ class GmailService():
             logging.error(traceback.format_exc())
             return []
         
-    def get_email_by_id_with_attachments(self, email_id: str) -> Tuple[dict, dict] | Tuple[None, dict]:
+    def get_email_by_id_with_attachments(self, email_id: str, projection: str = 'full') -> Tuple[dict, dict] | Tuple[None, dict]:
         """
         Fetch and parse a complete email message by its ID including attachment IDs.
         
         Args:
             email_id (str): The Gmail message ID to retrieve
+            projection (str): 'full' for the body and all metadata, 'summary' for the key
+                              headers and attachment IDs without downloading the body
         
         Returns:
             Tuple[dict, list]: Complete parsed email message including body and list of attachment IDs
             Tuple[None, list]: If retrieval or parsing fails, returns None for email and empty list for attachment IDs
         """
+        store = self._get_store()
+        if store is not None:
+            stored = self._get_stored(store, [email_id], complete=True).get(email_id)
+            if stored is not None:
+                message, attachments = stored
+                return project_message(message, projection), attachments
+
         try:
-            # Fetch the complete message by ID
+            parse_body = projection == 'full'
+            # Fetch the message by ID, only the parts we parse
             message = self.service.users().messages().get(
                 userId='me',
-                id=email_id
+                id=email_id,
+                fields=message_fields(projection, BODY_PAYLOAD_FIELDS if parse_body else ATTACHMENT_PAYLOAD_FIELDS)
             ).execute()
             
-            # Parse the message with body included
-            parsed_email = self._parse_message(txt=message, parse_body=True)
+            # Parse the message, with the body for the full projection
+            parsed_email = self._parse_message(txt=message, parse_body=parse_body, projection=projection)
 
             if parsed_email is None:
                 return None, []
 
-            attachments = {}
-            for part in message["payload"]["parts"]:
-                if "attachmentId" in part["body"]:
-                    attachment_id = part["body"]["attachmentId"]
-                    part_id = part["partId"]
-                    attachment = {
-                        "filename": part["filename"],
-                        "mimeType": part["mimeType"],
-                        "attachmentId": attachment_id,
-                        "partId": part_id
-                    }
-                    attachments[part_id] = attachment
-
-
+            attachments = self._parse_attachments(message)
+            if store is not None and parse_body:
+                self._put_in_store(store, [(parsed_email, attachments)])
             return parsed_email, attachments
             
         except Exception as e:
@@ -214,6 +416,201 @@ class GmailService():
             logging.error(traceback.format_exc())
             return None, []
         
+    def get_emails_by_ids_with_attachments(self, email_ids: list[str], projection: str = 'full') -> list[Tuple[str, dict | None, dict]]:
+        """
+        Fetch and parse several complete email messages using batch requests.
+        
+        Args:
+            email_ids (list[str]): The Gmail message IDs to retrieve
+            projection (str): 'full' or 'summary', as for get_email_by_id_with_attachments
+        
+        Returns:
+            list[Tuple[str, dict | None, dict]]: For each requested ID, in order, the ID, the parsed
+                email (None if retrieval or parsing failed) and its attachments keyed by part ID
+        """
+        parse_body = projection == 'full'
+        store = self._get_store()
+        stored = self._get_stored(store, email_ids, complete=True)
+        raw_messages = self._batch_get_messages(
+            [email_id for email_id in email_ids if email_id not in stored],
+            format='full',
+            fields=message_fields(projection, BODY_PAYLOAD_FIELDS if parse_body else ATTACHMENT_PAYLOAD_FIELDS)
+        )
+
+        results = []
+        fetched = []
+        for email_id in email_ids:
+            if email_id in stored:
+                stored_email, attachments = stored[email_id]
+                results.append((email_id, project_message(stored_email, projection), attachments))
+                continue
+            message = raw_messages.get(email_id)
+            parsed_email = self._parse_message(txt=message, parse_body=parse_body, projection=projection) if message else None
+            if parsed_email is None:
+                results.append((email_id, None, {}))
+                continue
+            attachments = self._parse_attachments(message)
+            results.append((email_id, parsed_email, attachments))
+            if parse_body:
+                fetched.append((parsed_email, attachments))
+
+        if store is not None and fetched:
+            self._put_in_store(store, fetched)
+        return results
+
+    def search_stored_emails(self, query: str, max_results: int = 100, projection: str = 'full') -> list:
+        """
+        Full-text search of the local message store, without a Gmail query.
+        
+        Args:
+            query (str): SQLite FTS5 query over subject, sender, recipients, snippet and body
+            max_results (int): Maximum number of emails to return
+            projection (str): 'summary' or 'full', see MESSAGE_KEYS and MESSAGE_HEADERS
+        
+        Returns:
+            list: Matching stored messages, newest first; bodies only of messages read in full before
+        
+        Raises:
+            RuntimeError: If the store is off or unavailable, or the query is invalid
+        """
+        if not message_store.STORE_ENABLED:
+            raise RuntimeError("The local message store is off, set MCP_GSUITE_MESSAGE_STORE_DIR to enable it")
+        store = self._get_store()
+        if store is None:
+            raise RuntimeError("The local message store is unavailable, see the server log")
+        try:
+            messages = store.search(query, max_results)
+        except sqlite3.OperationalError as e:
+            raise RuntimeError(f"Invalid search query: {str(e)}")
+        return [project_message(message, projection) for message in messages]
+
+    def _parse_attachments(self, message: dict) -> dict:
+        """
+        Collect the attachment parts of a raw message keyed by part ID.
+        """
+        attachments = {}
+        for part in message.get("payload", {}).get("parts", []):
+            if "attachmentId" in part.get("body", {}):
+                attachment_id = part["body"]["attachmentId"]
+                part_id = part["partId"]
+                attachment = {
+                    "filename": part["filename"],
+                    "mimeType": part["mimeType"],
+                    "attachmentId": attachment_id,
+                    "partId": part_id
+                }
+                attachments[part_id] = attachment
+        return attachments
+
+    def _batch_execute(self, requests: dict) -> dict:
+        """
+        Execute Gmail API requests in batches of up to BATCH_SIZE calls.
+        
+        Sub-requests that fail with a rate limit or server error are retried
+        once in a follow-up batch.
+        
+        Args:
+            requests (dict): Unexecuted API requests keyed by a unique request ID
+        
+        Returns:
+            dict: Responses keyed by request ID; failed requests are missing
+        """
+        responses = {}
+        retry_ids = []
+        pending_retry = set()
+
+        def callback(request_id, response, exception):
+            if exception is None:
+                responses[request_id] = response
+                return
+            status = getattr(getattr(exception, 'resp', None), 'status', None)
+            if status in RETRYABLE_STATUS_CODES and request_id not in pending_retry:
+                retry_ids.append(request_id)
+                return
+            logging.error(f"Error in batch request {request_id}: {str(exception)}")
+
+        request_ids = list(requests.keys())
+        for _ in range(2):
+            for start in range(0, len(request_ids), BATCH_SIZE):
+                batch = self.service.new_batch_http_request(callback=callback)
+                for request_id in request_ids[start:start + BATCH_SIZE]:
+                    batch.add(requests[request_id], request_id=request_id)
+                batch.execute()
+
+            if not retry_ids:
+                break
+            request_ids = list(retry_ids)
+            pending_retry.update(retry_ids)
+            retry_ids.clear()
+
+        return responses
+
+    def _batch_get_messages(self, message_ids: list[str], format: str = 'full', metadata_headers: list[str] | None = None,
+                            fields: str | None = None) -> dict:
+        """
+        Fetch several raw Gmail messages with batch requests.
+        
+        Args:
+            message_ids (list[str]): The Gmail message IDs to retrieve
+            format (str): Gmail message format ('full', 'metadata' or 'minimal')
+            metadata_headers (list[str], optional): Headers to return with format='metadata'
+            fields (str, optional): Partial response mask for each message
+        
+        Returns:
+            dict: Raw messages keyed by message ID; failed IDs are missing
+        """
+        try:
+            requests = {}
+            for message_id in dict.fromkeys(message_ids):
+                params = {'userId': 'me', 'id': message_id, 'format': format}
+                if metadata_headers:
+                    params['metadataHeaders'] = metadata_headers
+                if fields:
+                    params['fields'] = fields
+                requests[message_id] = self.service.users().messages().get(**params)
+            return self._batch_execute(requests)
+
+        except Exception as e:
+            logging.error(f"Error retrieving emails: {str(e)}")
+            logging.error(traceback.format_exc())
+            return {}
+
+    def get_attachments(self, attachment_refs: list[Tuple[str, str]]) -> dict:
+        """
+        Retrieve several Gmail attachments with batch requests.
+        
+        Args:
+            attachment_refs (list[Tuple[str, str]]): (message_id, attachment_id) pairs
+        
+        Returns:
+            dict: Attachment data (size and base64-encoded content) keyed by
+                  (message_id, attachment_id); failed attachments are missing
+        """
+        try:
+            keys = {f"{index}": ref for index, ref in enumerate(dict.fromkeys(attachment_refs))}
+            requests = {
+                request_id: self.service.users().messages().attachments().get(
+                    userId='me',
+                    messageId=message_id,
+                    id=attachment_id,
+                    fields='size,data'
+                )
+                for request_id, (message_id, attachment_id) in keys.items()
+            }
+            responses = self._batch_execute(requests)
+            return {
+                keys[request_id]: {
+                    "size": attachment.get("size"),
+                    "data": attachment.get("data")
+                }
+                for request_id, attachment in responses.items()
+            }
+
+        except Exception as e:
+            logging.error(f"Error retrieving attachments: {str(e)}")
+            logging.error(traceback.format_exc())
+            return {}
+
     def get_email_by_id(self, email_id: str) -> dict | None: 
         """
         Fetch and parse a complete email message by its ID.
@@ -225,15 +622,24 @@ class GmailService():
             dict: Complete parsed email message including body
             None: If retrieval or parsing fails
         """
+        store = self._get_store()
+        if store is not None:
+            stored = self._get_stored(store, [email_id], complete=True).get(email_id)
+            if stored is not None:
+                return stored[0]
+
         try:
-            # Fetch the complete message by ID
+            # Fetch the message by ID, only the parts we parse
             message = self.service.users().messages().get(
                 userId='me',
-                id=email_id
+                id=email_id,
+                fields=message_fields('full', BODY_PAYLOAD_FIELDS)
             ).execute()
             
             # Parse the message with body included
             parsed_email = self._parse_message(txt=message, parse_body=True)
+            if store is not None and parsed_email is not None:
+                self._put_in_store(store, [(parsed_email, self._parse_attachments(message))])
             return parsed_email
             
         except Exception as e:
@@ -405,7 +811,8 @@ class GmailService():
             attachment = self.service.users().messages().attachments().get(
                 userId='me',
                 messageId=message_id, 
-                id=attachment_id
+                id=attachment_id,
+                fields='size,data'
             ).execute()
             return {
                 "size": attachment.get("size"),
@@ -1,10 +1,25 @@
-from googleapiclient.discovery import build
-from . import gauth
+from . import service_cache
 import logging
 import traceback
 from datetime import datetime
 import pytz
 
+# Keys each projection returns; the fields= masks sent to the API are built from them
+MEETING_KEYS = {
+    'summary': ['id', 'summary', 'start', 'end', 'status', 'hangoutLink'],
+    'full': [
+        'id', 'summary', 'description', 'start', 'end', 'status', 'creator', 'organizer',
+        'attendees', 'hangoutLink', 'conferenceData', 'recurringEventId', 'created', 'updated'
+    ],
+}
+
+def meeting_fields(projection: str) -> str:
+    keys = list(MEETING_KEYS[projection])
+    # Meetings are picked out by their conference ID, which the mask has to keep
+    if 'conferenceData' not in keys:
+        keys.append('conferenceData/conferenceId')
+    return f"items({','.join(keys)})"
+
 class MeetService():
     def __init__(self, credentials):
         """
@@ -13,8 +28,7 @@ class MeetService():
         Args:
             credentials: Google OAuth2 credentials object
         """
-        authorized_credentials = gauth.authorize_credentials(credentials)
-        self.service = build('calendar', 'v3', credentials=authorized_credentials)
+        self.service = service_cache.get_service('calendar', 'v3', credentials)
 
     def create_meeting(self, summary: str, start_time: str, end_time: str,
                       description: str | None = None,
@@ -109,24 +123,30 @@ class MeetService():
             dict: Updated meeting data or None if update fails
         """
         try:
-            # First get the existing event
-            event = self.service.events().get(calendarId='primary', eventId=event_id).execute()
+            # First get the existing time zones, the only part of the event we need
+            event = self.service.events().get(
+                calendarId='primary',
+                eventId=event_id,
+                fields='start/timeZone,end/timeZone'
+            ).execute()
             
-            # Update the time fields
-            event['start'] = {
-                'dateTime': new_start_time,
-                'timeZone': timezone or event['start'].get('timeZone', 'UTC'),
-            }
-            event['end'] = {
-                'dateTime': new_end_time,
-                'timeZone': timezone or event['end'].get('timeZone', 'UTC'),
+            # Update only the time fields
+            changes = {
+                'start': {
+                    'dateTime': new_start_time,
+                    'timeZone': timezone or event.get('start', {}).get('timeZone', 'UTC'),
+                },
+                'end': {
+                    'dateTime': new_end_time,
+                    'timeZone': timezone or event.get('end', {}).get('timeZone', 'UTC'),
+                }
             }
             
-            # Update the event
-            updated_event = self.service.events().update(
+            # Patch the event
+            updated_event = self.service.events().patch(
                 calendarId='primary',
                 eventId=event_id,
-                body=event,
+                body=changes,
                 sendNotifications=True
             ).execute()
             
@@ -138,7 +158,7 @@ class MeetService():
             return None 
 
     def get_all_meetings(self, time_min: str | None = None, time_max: str | None = None, 
-                        max_results: int = 100, include_past: bool = False) -> list:
+                        max_results: int = 100, include_past: bool = False, projection: str = 'full') -> list:
         """
         Get all Google Meet meetings from the calendar.
         
@@ -147,6 +167,7 @@ class MeetService():
             time_max (str, optional): End time in RFC3339 format
             max_results (int): Maximum number of meetings to return (default: 100)
             include_past (bool): Whether to include past meetings (default: False)
+            projection (str): 'summary' or 'full', see MEETING_KEYS
             
         Returns:
             list: List of meetings with Google Meet links
@@ -163,7 +184,8 @@ class MeetService():
                 'singleEvents': True,
                 'orderBy': 'startTime',
                 'timeMin': time_min if time_min else None,
-                'timeMax': time_max if time_max else None
+                'timeMax': time_max if time_max else None,
+                'fields': meeting_fields(projection)
             }
             
             # Remove None values
@@ -177,22 +199,7 @@ class MeetService():
             for event in events_result.get('items', []):
                 # Check if event has conferenceData (Meet link)
                 if event.get('conferenceData') and event['conferenceData'].get('conferenceId'):
-                    meeting = {
-                        'id': event.get('id'),
-                        'summary': event.get('summary'),
-                        'description': event.get('description'),
-                        'start': event.get('start'),
-                        'end': event.get('end'),
-                        'status': event.get('status'),
-                        'creator': event.get('creator'),
-                        'organizer': event.get('organizer'),
-                        'attendees': event.get('attendees'),
-                        'hangoutLink': event.get('hangoutLink'),
-                        'conferenceData': event.get('conferenceData'),
-                        'recurringEventId': event.get('recurringEventId'),
-                        'created': event.get('created'),
-                        'updated': event.get('updated')
-                    }
+                    meeting = {key: event.get(key) for key in MEETING_KEYS[projection]}
                     meetings.append(meeting)
             
             return meetings
@@ -0,0 +1,247 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+from . import service_cache
+
+logger = logging.getLogger("mcp-gsuite.message_store")
+
+# Directory of the per-account SQLite message stores; the store is off when unset
+STORE_DIR = os.getenv("MCP_GSUITE_MESSAGE_STORE_DIR", "")
+STORE_ENABLED = bool(STORE_DIR)
+# Seconds between two history syncs of one account
+SYNC_INTERVAL = float(os.getenv("MCP_GSUITE_MESSAGE_STORE_SYNC_INTERVAL", "30"))
+# Newest messages whose headers are stored when an account's store is created
+SEED_MESSAGES = int(os.getenv("MCP_GSUITE_MESSAGE_STORE_SEED_MESSAGES", "200"))
+# Seconds a query's message IDs are reused while the mailbox is unchanged, for queries like newer_than:2d
+QUERY_TTL = float(os.getenv("MCP_GSUITE_MESSAGE_STORE_QUERY_TTL", "300"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id TEXT PRIMARY KEY,
+    internal_date INTEGER,
+    message TEXT NOT NULL,
+    attachments TEXT
+);
+CREATE INDEX IF NOT EXISTS messages_internal_date ON messages (internal_date);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5 (subject, sender, recipients, snippet, body);
+CREATE TABLE IF NOT EXISTS queries (
+    query TEXT NOT NULL,
+    max_results INTEGER NOT NULL,
+    message_ids TEXT NOT NULL,
+    cached_at REAL NOT NULL,
+    PRIMARY KEY (query, max_results)
+);
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class MessageStore():
+    """
+    Local copy of one account's Gmail messages in SQLite, searchable with FTS5.
+
+    Rows hold the parsed message as GmailService returns it. Rows with
+    attachments were fetched in full and include the body; the others only
+    hold headers and snippet. The store is thread-safe; GmailService keeps it
+    current with users.history.list.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        # Held by the thread running a history sync
+        self.sync_lock = threading.Lock()
+        self.last_sync = None
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def get_state(self, key: str) -> str | None:
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_state(self, key: str, value: str):
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)", (key, value))
+
+    @property
+    def history_id(self) -> str | None:
+        return self.get_state("history_id")
+
+    def sync_due(self) -> bool:
+        return self.last_sync is None or time.monotonic() - self.last_sync >= SYNC_INTERVAL
+
+    def mark_synced(self):
+        self.last_sync = time.monotonic()
+
+    def put_messages(self, messages: list[tuple[dict, dict | None]]):
+        """
+        Store parsed messages with their attachments, None for header-only messages.
+
+        A header-only message does not replace the body of a stored complete one.
+        """
+        with self.lock:
+            self.connection.execute("BEGIN")
+            try:
+                for message, attachments in messages:
+                    self._put_message(message, attachments)
+                self.connection.execute("COMMIT")
+            except Exception as e:
+                self.connection.execute("ROLLBACK")
+                logger.error(f"Error writing {len(messages)} messages to {self.path}: {str(e)}")
+                raise
+
+    def _put_message(self, message: dict, attachments: dict | None):
+        row = self.connection.execute("SELECT rowid, message, attachments FROM messages WHERE id = ?", (message['id'],)).fetchone()
+        if row is not None and attachments is None and row[2] is not None:
+            stored = json.loads(row[1])
+            message = {**message, **{key: stored[key] for key in ('body', 'mimeType') if key in stored}}
+            attachments = json.loads(row[2])
+
+        internal_date = int(message['internalDate']) if message.get('internalDate') else None
+        params = (internal_date, json.dumps(message), json.dumps(attachments) if attachments is not None else None)
+        if row is None:
+            rowid = self.connection.execute(
+                "INSERT INTO messages (id, internal_date, message, attachments) VALUES (?, ?, ?, ?)",
+                (message['id'], *params)
+            ).lastrowid
+        else:
+            rowid = row[0]
+            self.connection.execute("UPDATE messages SET internal_date = ?, message = ?, attachments = ? WHERE rowid = ?",
+                                    (*params, rowid))
+            self.connection.execute("DELETE FROM messages_fts WHERE rowid = ?", (rowid,))
+
+        recipients = ' '.join(filter(None, (message.get('to'), message.get('cc'), message.get('bcc'))))
+        self.connection.execute(
+            "INSERT INTO messages_fts (rowid, subject, sender, recipients, snippet, body) VALUES (?, ?, ?, ?, ?, ?)",
+            (rowid, message.get('subject'), message.get('from'), recipients, message.get('snippet'), message.get('body'))
+        )
+
+    def get_messages(self, message_ids: list[str], complete: bool = False) -> dict:
+        """
+        Stored messages keyed by ID as (message, attachments) pairs.
+
+        With complete=True only messages stored with their body are returned.
+        """
+        if not message_ids:
+            return {}
+        found = {}
+        with self.lock:
+            # Stay below SQLite's limit on query parameters
+            for start in range(0, len(message_ids), 500):
+                chunk = message_ids[start:start + 500]
+                rows = self.connection.execute(
+                    f"SELECT id, message, attachments FROM messages WHERE id IN ({','.join('?' * len(chunk))})"
+                    + (" AND attachments IS NOT NULL" if complete else ""),
+                    chunk
+                ).fetchall()
+                for message_id, message, attachments in rows:
+                    found[message_id] = (json.loads(message), json.loads(attachments) if attachments is not None else None)
+        return found
+
+    def delete_messages(self, message_ids: list[str]):
+        with self.lock:
+            for message_id in message_ids:
+                row = self.connection.execute("SELECT rowid FROM messages WHERE id = ?", (message_id,)).fetchone()
+                if row is not None:
+                    self.connection.execute("DELETE FROM messages_fts WHERE rowid = ?", (row[0],))
+                    self.connection.execute("DELETE FROM messages WHERE rowid = ?", (row[0],))
+
+    def set_labels(self, labels: dict[str, list[str]]):
+        """Replace the label IDs of stored messages, keyed by message ID."""
+        with self.lock:
+            for message_id, label_ids in labels.items():
+                row = self.connection.execute("SELECT message FROM messages WHERE id = ?", (message_id,)).fetchone()
+                if row is not None:
+                    message = json.loads(row[0])
+                    message['labelIds'] = label_ids
+                    self.connection.execute("UPDATE messages SET message = ? WHERE id = ?", (json.dumps(message), message_id))
+
+    def search(self, query: str, max_results: int) -> list[dict]:
+        """
+        Messages matching an FTS5 query, newest first.
+
+        Raises:
+            sqlite3.OperationalError: If the query is not valid FTS5 syntax
+        """
+        with self.lock:
+            try:
+                rows = self.connection.execute(
+                    "SELECT messages.message FROM messages_fts JOIN messages ON messages.rowid = messages_fts.rowid "
+                    "WHERE messages_fts MATCH ? ORDER BY messages.internal_date DESC LIMIT ?",
+                    (query, max_results)
+                ).fetchall()
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Rejected search query {query!r}: {str(e)}")
+                raise
+        return [json.loads(row[0]) for row in rows]
+
+    def get_query(self, query: str, max_results: int) -> list[str] | None:
+        """Message IDs of a Gmail query seen since the last mailbox change, None if unknown."""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT message_ids, cached_at FROM queries WHERE query = ? AND max_results = ?",
+                (query, max_results)
+            ).fetchone()
+        if row is None or time.time() - row[1] > QUERY_TTL:
+            return None
+        return json.loads(row[0])
+
+    def put_query(self, query: str, max_results: int, message_ids: list[str]):
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO queries (query, max_results, message_ids, cached_at) VALUES (?, ?, ?, ?)",
+                (query, max_results, json.dumps(message_ids), time.time())
+            )
+
+    def clear_queries(self):
+        with self.lock:
+            self.connection.execute("DELETE FROM queries")
+
+    def clear(self):
+        """Drop every stored message, query and the sync state."""
+        logger.info(f"Clearing message store {self.path}")
+        with self.lock:
+            self.connection.executescript(
+                "DELETE FROM messages; DELETE FROM messages_fts; DELETE FROM queries; DELETE FROM state;"
+            )
+
+
+_stores: dict[str, MessageStore] = {}
+# Credentials key -> email address, so the profile is read once per user
+_accounts: dict[str, str] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(creds_data, get_email_address) -> MessageStore | None:
+    """
+    The message store of the account behind creds_data, None if the store is off.
+
+    Args:
+        creds_data (dict): Authorized user info as passed in the tool arguments
+        get_email_address (callable): Returns the account's email address, called once per user
+    """
+    if not STORE_ENABLED:
+        return None
+    key = service_cache._credentials_key(creds_data)
+    email_address = _accounts.get(key)
+    if email_address is None:
+        email_address = get_email_address()
+
+    with _stores_lock:
+        _accounts[key] = email_address
+        store = _stores.get(email_address)
+        if store is None:
+            os.makedirs(STORE_DIR, exist_ok=True)
+            file_name = re.sub(r"[^A-Za-z0-9@._-]", "_", email_address)
+            store = MessageStore(os.path.join(STORE_DIR, f"gmail-{file_name}.sqlite3"))
+            _stores[email_address] = store
+    return store
@@ -1,4 +1,7 @@
+import os
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from collections.abc import Sequence
 from functools import lru_cache
 import subprocess
@@ -55,6 +58,7 @@ load_dotenv()
 from . import tools_gmail
 from . import tools_calendar
 from . import toolhandler
+from . import tracing
 
 # Load environment variables
 
@@ -107,6 +111,7 @@ def get_tool_handler(name: str) -> toolhandler.ToolHandler | None:
     return tool_handlers[name]
 
 add_tool_handler(tools_gmail.QueryEmailsToolHandler())
+add_tool_handler(tools_gmail.SearchStoredEmailsToolHandler())
 add_tool_handler(tools_gmail.GetEmailByIdToolHandler())
 add_tool_handler(tools_gmail.CreateDraftToolHandler())
 add_tool_handler(tools_gmail.DeleteDraftToolHandler())
@@ -128,6 +133,29 @@ add_tool_handler(tools_meet.CancelMeetingToolHandler())
 add_tool_handler(tools_meet.RescheduleMeetingToolHandler())
 add_tool_handler(tools_meet.GetAllMeetingsToolHandler())
 
+# Blocking tool handlers run in a thread pool so concurrent calls overlap.
+# MCP_TOOL_EXECUTION=inline runs them on the event loop instead.
+TOOL_EXECUTION_MODE = os.getenv("MCP_TOOL_EXECUTION", "thread")
+TOOL_THREADS = int(os.getenv("MCP_TOOL_THREADS", "8"))
+TOOL_CONCURRENCY = int(os.getenv("MCP_TOOL_CONCURRENCY", "4"))
+
+tool_executor = ThreadPoolExecutor(max_workers=TOOL_THREADS, thread_name_prefix="mcp-gsuite-tool")
+tool_semaphores: dict[str, asyncio.Semaphore] = {}
+
+def get_tool_semaphore(tool_handler: toolhandler.ToolHandler) -> asyncio.Semaphore:
+    semaphore = tool_semaphores.get(tool_handler.name)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(tool_handler.max_concurrency or TOOL_CONCURRENCY)
+        tool_semaphores[tool_handler.name] = semaphore
+    return semaphore
+
+async def execute_tool(tool_handler: toolhandler.ToolHandler, arguments: dict) -> Sequence[TextContent | ImageContent | EmbeddedResource]:
+    async with get_tool_semaphore(tool_handler):
+        if TOOL_EXECUTION_MODE == "inline":
+            return tool_handler.run_tool(arguments)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(tool_executor, tool_handler.run_tool, arguments)
+
 @app.list_tools()
 async def list_tools() -> list[Tool]:
     """List available tools."""
@@ -152,7 +180,8 @@ async def call_tool(name: str, arguments: Any) -> Sequence[TextContent | ImageCo
         if not tool_handler:
             raise ValueError(f"Unknown tool: {name}")
 
-        return tool_handler.run_tool(arguments)
+        with tracing.run_tool_span(name, app.request_context.meta):
+            return await execute_tool(tool_handler, arguments)
     except Exception as e:
         logging.error(traceback.format_exc())
         logging.error(f"Error during call_tool: str(e)")
@@ -160,6 +189,7 @@ async def call_tool(name: str, arguments: Any) -> Sequence[TextContent | ImageCo
 
 
 async def main():
+    tracing.init_tracing("mcp-gsuite")
     # # print("Running main2")
     # accounts = gauth.get_account_info()
     # # print("account", accounts)
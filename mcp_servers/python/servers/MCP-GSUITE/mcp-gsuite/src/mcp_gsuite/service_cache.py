@@ -0,0 +1,149 @@
+import os
+import time
+import json
+import hashlib
+import logging
+import threading
+import datetime
+from collections import OrderedDict
+
+import httplib2
+import google_auth_httplib2
+from google.auth.transport.requests import Request
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpRequest
+from . import gauth
+
+
+SERVICE_CACHE_TTL = int(os.getenv("MCP_GSUITE_SERVICE_CACHE_TTL", "3600"))
+SERVICE_CACHE_SIZE = int(os.getenv("MCP_GSUITE_SERVICE_CACHE_SIZE", "128"))
+# Refresh access tokens this many seconds before they expire
+TOKEN_REFRESH_MARGIN = int(os.getenv("MCP_GSUITE_TOKEN_REFRESH_MARGIN", "300"))
+
+
+class _CredentialEntry():
+    """Authorized credentials of one user and the API clients built with them."""
+
+    def __init__(self, credentials):
+        self.credentials = credentials
+        self.services = {}
+        self.expires_at = time.monotonic() + SERVICE_CACHE_TTL
+        self.lock = threading.Lock()
+
+
+_entries: "OrderedDict[str, _CredentialEntry]" = OrderedDict()
+_entries_lock = threading.Lock()
+
+# Transports are reused per thread, httplib2.Http is not thread-safe
+_local = threading.local()
+
+
+def _get_transport() -> httplib2.Http:
+    http = getattr(_local, "http", None)
+    if http is None:
+        http = httplib2.Http()
+        _local.http = http
+    return http
+
+
+def _credentials_key(creds_data) -> str:
+    """Stable cache key for the user behind creds_data, without keeping raw secrets."""
+    if isinstance(creds_data, str):
+        creds_data = json.loads(creds_data)
+    identity = creds_data.get("refresh_token") or creds_data.get("token") or json.dumps(creds_data, sort_keys=True)
+    raw = f"{creds_data.get('client_id', '')}:{identity}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _needs_refresh(credentials) -> bool:
+    if not credentials.token or credentials.expiry is None:
+        return not credentials.valid
+    # google-auth stores expiry as naive UTC
+    remaining = credentials.expiry - datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    return remaining.total_seconds() < TOKEN_REFRESH_MARGIN
+
+
+def _refresh_if_needed(entry: _CredentialEntry):
+    with entry.lock:
+        if _needs_refresh(entry.credentials) and entry.credentials.refresh_token:
+            entry.credentials.refresh(Request())
+
+
+def _get_entry(creds_data) -> _CredentialEntry:
+    key = _credentials_key(creds_data)
+    now = time.monotonic()
+
+    with _entries_lock:
+        entry = _entries.get(key)
+        if entry is not None and entry.expires_at > now:
+            _entries.move_to_end(key)
+            return entry
+        _entries.pop(key, None)
+
+    # Authorize outside the global lock, it may run a token refresh
+    entry = _CredentialEntry(gauth.authorize_credentials(creds_data))
+
+    with _entries_lock:
+        entry = _entries.setdefault(key, entry)
+        _entries.move_to_end(key)
+        while len(_entries) > SERVICE_CACHE_SIZE:
+            _entries.popitem(last=False)
+    return entry
+
+
+def get_service(api: str, version: str, creds_data):
+    """
+    Get a Google API client for the given credentials, reusing cached ones.
+
+    Clients are cached per user and API for MCP_GSUITE_SERVICE_CACHE_TTL seconds,
+    so repeated tool calls skip discovery parsing and OAuth authorization. The
+    access token is refreshed shortly before it expires.
+
+    Args:
+        api (str): API name, e.g. 'gmail'
+        version (str): API version, e.g. 'v1'
+        creds_data (dict): Authorized user info as passed in the tool arguments
+
+    Returns:
+        Resource: The Google API client
+    """
+    entry = _get_entry(creds_data)
+    try:
+        _refresh_if_needed(entry)
+    except Exception as e:
+        logging.error(f"Error refreshing credentials: {e}")
+        invalidate(creds_data)
+        raise
+
+    with entry.lock:
+        service = entry.services.get((api, version))
+        if service is None:
+            credentials = entry.credentials
+
+            def build_request(http, *args, **kwargs):
+                # Each request gets the current thread's transport, so a cached
+                # client can be shared by the tool threads
+                authorized_http = google_auth_httplib2.AuthorizedHttp(credentials, http=_get_transport())
+                return HttpRequest(authorized_http, *args, **kwargs)
+
+            service = build(
+                api,
+                version,
+                http=google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http()),
+                requestBuilder=build_request,
+                cache_discovery=False
+            )
+            entry.services[(api, version)] = service
+    return service
+
+
+def invalidate(creds_data):
+    """Drop the cached credentials and clients of one user."""
+    with _entries_lock:
+        _entries.pop(_credentials_key(creds_data), None)
+
+
+def clear():
+    """Drop every cached credential and client."""
+    with _entries_lock:
+        _entries.clear()
@@ -1,3 +1,4 @@
+import json
 from collections.abc import Sequence
 from mcp.types import (
     Tool,
@@ -12,6 +13,9 @@ USER_ID_ARG = "__user_id__"
 CREDENTIALS_ARG = "__credentials__"
 
 class ToolHandler():
+    # Maximum concurrent runs of this tool; None uses the server default
+    max_concurrency: int | None = None
+
     def __init__(self, tool_name: str):
         self.name = tool_name
 
@@ -34,4 +38,28 @@ class ToolHandler():
         raise NotImplementedError()
 
     def run_tool(self, args: dict) -> Sequence[TextContent | ImageContent | EmbeddedResource]:
-        raise NotImplementedError()
\ No newline at end of file
+        raise NotImplementedError()
+
+
+def to_json(value) -> str:
+    """Compact JSON for tool results; indentation only costs the model tokens."""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+PROJECTION_ARG = "projection"
+PROJECTIONS = ("summary", "full")
+
+def get_projection_arg_schema() -> dict:
+    return {
+        "type": "string",
+        "enum": list(PROJECTIONS),
+        "description": """How much of each item to return: "summary" for the key fields only, which is
+                          faster and smaller on large calendars and inboxes, or "full" for all fields.""",
+        "default": "full"
+    }
+
+def get_projection(args: dict) -> str:
+    projection = args.get(PROJECTION_ARG) or "full"
+    if projection not in PROJECTIONS:
+        raise RuntimeError(f"Invalid {PROJECTION_ARG}: {projection}. Use one of: {', '.join(PROJECTIONS)}")
+    return projection
@@ -8,7 +8,6 @@ from mcp.types import (
 )
 from . import gauth
 from . import calendar
-import json
 from . import toolhandler
 
 CALENDAR_ID_ARG="__calendar_id__"
@@ -35,7 +34,7 @@ class ListCalendarsToolHandler(toolhandler.ToolHandler):
             inputSchema={
                 "type": "object",
                 "properties": {
-
+                    "projection": toolhandler.get_projection_arg_schema()
                 },
                
             }
@@ -51,12 +50,12 @@ class ListCalendarsToolHandler(toolhandler.ToolHandler):
             raise RuntimeError(f"Missing required argument: {toolhandler.CREDENTIALS_ARG}")
 
         calendar_service = calendar.CalendarService(credentials=credentials)
-        calendars = calendar_service.list_calendars()
+        calendars = calendar_service.list_calendars(projection=toolhandler.get_projection(args))
 
         return [
             TextContent(
                 type="text",
-                text=json.dumps(calendars, indent=2)
+                text=toolhandler.to_json(calendars)
             )
         ]
 
@@ -92,7 +91,8 @@ class GetCalendarEventsToolHandler(toolhandler.ToolHandler):
                         "type": "boolean",
                         "description": "Whether to include deleted events",
                         "default": False
-                    }
+                    },
+                    "projection": toolhandler.get_projection_arg_schema()
                 },
             }
         )
@@ -113,12 +113,13 @@ class GetCalendarEventsToolHandler(toolhandler.ToolHandler):
             max_results=args.get('max_results', 250),
             show_deleted=args.get('show_deleted', False),
             calendar_id=args.get(CALENDAR_ID_ARG, 'primary'),
+            projection=toolhandler.get_projection(args),
         )
 
         return [
             TextContent(
                 type="text",
-                text=json.dumps(events, indent=2)
+                text=toolhandler.to_json(events)
             )
         ]
 
@@ -205,7 +206,7 @@ class CreateCalendarEventToolHandler(toolhandler.ToolHandler):
         return [
             TextContent(
                 type="text",
-                text=json.dumps(event, indent=2)
+                text=toolhandler.to_json(event)
             )
         ]
     
@@ -258,10 +259,10 @@ class DeleteCalendarEventToolHandler(toolhandler.ToolHandler):
         return [
             TextContent(
                 type="text",
-                text=json.dumps({
+                text=toolhandler.to_json({
                     "success": success,
                     "message": "Event successfully deleted" if success else "Failed to delete event"
-                }, indent=2)
+                })
             )
         ]
 
@@ -321,6 +322,6 @@ class CheckAvailabilityToolHandler(toolhandler.ToolHandler):
         return [
             TextContent(
                 type="text",
-                text=json.dumps(availability, indent=2)
+                text=toolhandler.to_json(availability)
             )
         ]
\ No newline at end of file
@@ -7,7 +7,6 @@ from mcp.types import (
     LoggingLevel,
 )
 from . import gmail
-import json
 from . import toolhandler
 import base64
 
@@ -49,7 +48,8 @@ class QueryEmailsToolHandler(toolhandler.ToolHandler):
                         "minimum": 1,
                         "maximum": 500,
                         "default": 100
-                    }
+                    },
+                    "projection": toolhandler.get_projection_arg_schema()
                 },
             }
         )
@@ -67,12 +67,71 @@ class QueryEmailsToolHandler(toolhandler.ToolHandler):
         gmail_service = gmail.GmailService(credentials=credentials)
         query = args.get('query')
         max_results = args.get('max_results', 100)
-        emails = gmail_service.query_emails(query=query, max_results=max_results)
+        emails = gmail_service.query_emails(query=query, max_results=max_results, projection=toolhandler.get_projection(args))
 
         return [
             TextContent(
                 type="text",
-                text=json.dumps(emails, indent=2)
+                text=toolhandler.to_json(emails)
+            )
+        ]
+
+class SearchStoredEmailsToolHandler(toolhandler.ToolHandler):
+    def __init__(self):
+        super().__init__("search_local_gmail_emails")
+
+    def get_tool_description(self) -> Tool:
+        return Tool(
+            name=self.name,
+            description="""Full-text search of the emails kept in the server's local message store, without querying Gmail.
+            The store holds recent emails and every email retrieved before; it is synced with Gmail before searching.
+            Returns matching emails newest first. Bodies are included only for emails retrieved in full before.
+            Only available when the server runs with a local message store; use query_gmail_emails otherwise.
+            """,
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": """SQLite FTS5 query over subject, sender, recipients, snippet and body. Examples:
+                            - 'invoice' for emails containing the word invoice
+                            - 'invoice AND march' for emails containing both words
+                            - '"quarterly report"' for the exact phrase
+                            - 'sender:alice' to match the sender only (columns: subject, sender, recipients, snippet, body)
+                            - 'budg*' for words starting with budg"""
+                    },
+                    "max_results": {
+                        "type": "integer",
+                        "description": "Maximum number of emails to return",
+                        "minimum": 1,
+                        "maximum": 500,
+                        "default": 100
+                    },
+                    "projection": toolhandler.get_projection_arg_schema()
+                },
+                "required": ["query"]
+            }
+        )
+
+    def run_tool(self, args: dict) -> Sequence[TextContent | ImageContent | EmbeddedResource]:
+        if "query" not in args:
+            raise RuntimeError("Missing required argument: query")
+
+        credentials = args.get(toolhandler.CREDENTIALS_ARG)
+        if not credentials:
+            raise RuntimeError(f"Missing required argument: {toolhandler.CREDENTIALS_ARG}")
+
+        gmail_service = gmail.GmailService(credentials=credentials)
+        emails = gmail_service.search_stored_emails(
+            query=args["query"],
+            max_results=min(max(1, args.get('max_results', 100)), 500),
+            projection=toolhandler.get_projection(args)
+        )
+
+        return [
+            TextContent(
+                type="text",
+                text=toolhandler.to_json(emails)
             )
         ]
 
@@ -90,7 +149,8 @@ class GetEmailByIdToolHandler(toolhandler.ToolHandler):
                     "email_id": {
                         "type": "string",
                         "description": "The ID of the Gmail message to retrieve"
-                    }
+                    },
+                    "projection": toolhandler.get_projection_arg_schema()
                 },
                 "required": ["email_id"]
             }
@@ -109,7 +169,7 @@ class GetEmailByIdToolHandler(toolhandler.ToolHandler):
             raise RuntimeError(f"Missing required argument: {toolhandler.CREDENTIALS_ARG}")
 
         gmail_service = gmail.GmailService(credentials=credentials)
-        email, attachments = gmail_service.get_email_by_id_with_attachments(args["email_id"])
+        email, attachments = gmail_service.get_email_by_id_with_attachments(args["email_id"], projection=toolhandler.get_projection(args))
 
         if email is None:
             return [
@@ -124,7 +184,7 @@ class GetEmailByIdToolHandler(toolhandler.ToolHandler):
         return [
             TextContent(
                 type="text",
-                text=json.dumps(email, indent=2)
+                text=toolhandler.to_json(email)
             )
         ]
 
@@ -145,7 +205,8 @@ class BulkGetEmailsByIdsToolHandler(toolhandler.ToolHandler):
                             "type": "string"
                         },
                         "description": "List of Gmail message IDs to retrieve"
-                    }
+                    },
+                    "projection": toolhandler.get_projection_arg_schema()
                 },
                 "required": ["email_ids"]
             }
@@ -166,8 +227,7 @@ class BulkGetEmailsByIdsToolHandler(toolhandler.ToolHandler):
         gmail_service = gmail.GmailService(credentials=credentials)
         
         results = []
-        for email_id in args["email_ids"]:
-            email, attachments = gmail_service.get_email_by_id_with_attachments(email_id)
+        for _, email, attachments in gmail_service.get_emails_by_ids_with_attachments(args["email_ids"], projection=toolhandler.get_projection(args)):
             if email is not None:
                 email["attachments"] = attachments
                 results.append(email)
@@ -183,7 +243,7 @@ class BulkGetEmailsByIdsToolHandler(toolhandler.ToolHandler):
         return [
             TextContent(
                 type="text",
-                text=json.dumps(results, indent=2)
+                text=toolhandler.to_json(results)
             )
         ]
 
@@ -259,7 +319,7 @@ class CreateDraftToolHandler(toolhandler.ToolHandler):
         return [
             TextContent(
                 type="text",
-                text=json.dumps(draft, indent=2)
+                text=toolhandler.to_json(draft)
             )
         ]
 
@@ -390,7 +450,7 @@ class ReplyEmailToolHandler(toolhandler.ToolHandler):
         return [
             TextContent(
                 type="text",
-                text=json.dumps(result, indent=2)
+                text=toolhandler.to_json(result)
             )
         ]
 
@@ -536,11 +596,21 @@ class BulkSaveAttachmentsToolHandler(toolhandler.ToolHandler):
         gmail_service = gmail.GmailService(credentials=credentials)
         results = []
 
+        # Fetch every referenced message, then every attachment, in batches
+        message_ids = [attachment_info["message_id"] for attachment_info in args["attachments"]]
+        messages = {
+            message_id: (message, attachments)
+            for message_id, message, attachments in gmail_service.get_emails_by_ids_with_attachments(message_ids, projection="summary")
+        }
+        attachment_refs = []
         for attachment_info in args["attachments"]:
-            # get attachment data from message_id and part_id
-            message, attachments = gmail_service.get_email_by_id_with_attachments(
-                attachment_info["message_id"]
-            )
+            message, attachments = messages.get(attachment_info["message_id"], (None, {}))
+            if message is not None and attachment_info["part_id"] in attachments:
+                attachment_refs.append((attachment_info["message_id"], attachments[attachment_info["part_id"]]["attachmentId"]))
+        attachments_data = gmail_service.get_attachments(attachment_refs)
+
+        for attachment_info in args["attachments"]:
+            message, attachments = messages.get(attachment_info["message_id"], (None, {}))
             if message is None:
                 results.append(
                     TextContent(
@@ -549,12 +619,17 @@ class BulkSaveAttachmentsToolHandler(toolhandler.ToolHandler):
                     )
                 )
                 continue
+            if attachment_info["part_id"] not in attachments:
+                results.append(
+                    TextContent(
+                        type="text",
+                        text=f"No attachment with part ID: {attachment_info['part_id']} in message: {attachment_info['message_id']}"
+                    )
+                )
+                continue
             # get attachment_id from part_id
             attachment_id = attachments[attachment_info["part_id"]]["attachmentId"]
-            attachment_data = gmail_service.get_attachment(
-                attachment_info["message_id"], 
-                attachment_id
-            )
+            attachment_data = attachments_data.get((attachment_info["message_id"], attachment_id))
             if attachment_data is None:
                 results.append(
                     TextContent(
@@ -664,7 +739,7 @@ class SendEmailToolHandler(toolhandler.ToolHandler):
             return [
                 TextContent(
                     type="text",
-                    text=f"Email successfully sent with ID: {sent_message.get('id', 'unknown')}\n\n{json.dumps(sent_message, indent=2)}"
+                    text=f"Email successfully sent with ID: {sent_message.get('id', 'unknown')}\n\n{toolhandler.to_json(sent_message)}"
                 )
             ]
         
@@ -7,7 +7,6 @@ from mcp.types import (
 )
 from . import toolhandler
 from . import meet
-import json
 
 class CreateMeetingToolHandler(toolhandler.ToolHandler):
     def __init__(self):
@@ -78,7 +77,7 @@ class CreateMeetingToolHandler(toolhandler.ToolHandler):
         return [
             TextContent(
                 type="text",
-                text=json.dumps(meeting, indent=2)
+                text=toolhandler.to_json(meeting)
             )
         ]
 
@@ -121,7 +120,7 @@ class CancelMeetingToolHandler(toolhandler.ToolHandler):
         return [
             TextContent(
                 type="text",
-                text=json.dumps({"success": success}, indent=2)
+                text=toolhandler.to_json({"success": success})
             )
         ]
 
@@ -183,7 +182,7 @@ class RescheduleMeetingToolHandler(toolhandler.ToolHandler):
         return [
             TextContent(
                 type="text",
-                text=json.dumps(updated_meeting, indent=2)
+                text=toolhandler.to_json(updated_meeting)
             )
         ]
 
@@ -217,7 +216,8 @@ class GetAllMeetingsToolHandler(toolhandler.ToolHandler):
                         "description": "Whether to include past meetings",
                         "default": False
                     
-                    }
+                    },
+                    "projection": toolhandler.get_projection_arg_schema()
                 },
             }
         )
@@ -236,15 +236,16 @@ class GetAllMeetingsToolHandler(toolhandler.ToolHandler):
             time_min=args.get("time_min"),
             time_max=args.get("time_max"),
             max_results=args.get("max_results", 100),
-            include_past=args.get("include_past", False)
+            include_past=args.get("include_past", False),
+            projection=toolhandler.get_projection(args)
         )
 
         return [
             TextContent(
                 type="text",
-                text=json.dumps({
+                text=toolhandler.to_json({
                     "total_meetings": len(meetings),
                     "meetings": meetings
-                }, indent=2)
+                })
             )
         ]
\ No newline at end of file
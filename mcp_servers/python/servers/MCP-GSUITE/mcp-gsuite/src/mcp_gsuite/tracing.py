@@ -0,0 +1,59 @@
+import os
+import logging
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+try:
+    from opentelemetry import propagate
+    from opentelemetry.trace import SpanKind
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+
+# Set by the gateway, which starts this server with its own MCP_TRACING_* and OTEL_* variables
+TRACING_EXPORTER = os.getenv("MCP_TRACING_EXPORTER", "none")
+TRACING_FILE = os.getenv("MCP_TRACING_FILE", "traces.jsonl")
+TRACING_SAMPLE_RATIO = float(os.getenv("MCP_TRACING_SAMPLE_RATIO", "0.1"))
+
+_tracer = None
+
+
+def init_tracing(service_name: str):
+    """Set up the tracer; a no-op without opentelemetry-sdk or with exporter "none"."""
+    global _tracer
+    if TRACING_EXPORTER == "none" or not OTEL_AVAILABLE or _tracer is not None:
+        return
+    try:
+        if TRACING_EXPORTER == "file":
+            out = open(TRACING_FILE, "a", buffering=1)
+            exporter = ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + "\n")
+        elif TRACING_EXPORTER == "otlp":
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            exporter = OTLPSpanExporter()
+        else:
+            raise ValueError(f"Unknown tracing exporter: {TRACING_EXPORTER}")
+    except Exception as e:
+        logging.error(f"Error setting up tracing: {str(e)}")
+        return
+
+    # Calls follow the gateway's sampling decision, sent in the request _meta
+    provider = TracerProvider(sampler=ParentBased(TraceIdRatioBased(TRACING_SAMPLE_RATIO)),
+                              resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    _tracer = provider.get_tracer(service_name)
+
+
+@contextmanager
+def run_tool_span(tool_name: str, meta: Optional[Any]) -> Iterator[None]:
+    """Span around one tool run, a child of the gateway span whose traceparent is in meta."""
+    if _tracer is None:
+        yield
+        return
+    carrier = meta.model_dump() if hasattr(meta, "model_dump") else dict(meta or {})
+    with _tracer.start_as_current_span("mcp.run_tool", context=propagate.extract(carrier), kind=SpanKind.SERVER,
+                                       attributes={"mcp.tool": tool_name}):
+        yield
@@ -0,0 +1,102 @@
+"""Technical indicators over 2-D price matrices.
+
+Every function takes float arrays shaped (T, N) - T bars in time order for N
+symbols - and computes all symbols at once. Missing bars are NaN; windows with
+missing bars produce NaN instead of failing.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def _rolling(values: np.ndarray, window: int, reducer) -> np.ndarray:
+    out = np.full(values.shape, np.nan)
+    if values.shape[0] < window:
+        return out
+    # (T - window + 1, N, window) view, no copy
+    windows = sliding_window_view(values, window, axis=0)
+    with np.errstate(invalid="ignore"):
+        out[window - 1:] = reducer(windows, axis=-1)
+    return out
+
+
+def sma(values: np.ndarray, window: int) -> np.ndarray:
+    return _rolling(values, window, np.mean)
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    return _rolling(values, window, np.std)
+
+
+def ewm(values: np.ndarray, alpha: float) -> np.ndarray:
+    """Exponentially weighted mean, seeded at each column's first valid value.
+
+    The recursion runs over time only; each step updates all symbols at once.
+    NaN bars carry the previous average forward.
+    """
+    out = np.full(values.shape, np.nan)
+    current = np.full(values.shape[1], np.nan)
+    for t in range(values.shape[0]):
+        row = values[t]
+        valid = ~np.isnan(row)
+        seed = valid & np.isnan(current)
+        current = np.where(seed, row, current)
+        update = valid & ~seed
+        current = np.where(update, current + alpha * (row - current), current)
+        out[t] = current
+    return out
+
+
+def ema(values: np.ndarray, span: int) -> np.ndarray:
+    return ewm(values, 2.0 / (span + 1))
+
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Wilder's relative strength index (0-100)."""
+    delta = np.diff(close, axis=0, prepend=np.nan)
+    gains = np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0))
+    losses = np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0))
+    avg_gain = ewm(gains, 1.0 / period)
+    avg_loss = ewm(losses, 1.0 / period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        out = 100.0 - 100.0 / (1.0 + rs)
+    out = np.where((avg_loss == 0) & (avg_gain > 0), 100.0, out)
+    # Not enough history for a meaningful value yet
+    out[:period] = np.nan
+    return out
+
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9):
+    """MACD line, signal line and histogram."""
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(line, signal)
+    return line, signal_line, line - signal_line
+
+
+def bollinger(close: np.ndarray, window: int = 20, num_std: float = 2.0):
+    """Middle, upper and lower bands and %B (position of close within the bands)."""
+    middle = sma(close, window)
+    deviation = rolling_std(close, window)
+    upper = middle + num_std * deviation
+    lower = middle - num_std * deviation
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percent_b = (close - lower) / (upper - lower)
+    return middle, upper, lower, percent_b
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Wilder's average true range."""
+    previous_close = np.vstack([np.full((1, close.shape[1]), np.nan), close[:-1]])
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - previous_close), np.abs(low - previous_close)))
+    out = ewm(true_range, 1.0 / period)
+    out[:period - 1] = np.nan
+    return out
+
+
+def vwap(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray, window: int = 20) -> np.ndarray:
+    """Rolling volume-weighted average of the typical price over window bars."""
+    typical = (high + low + close) / 3.0
+    price_volume = _rolling(typical * volume, window, np.sum)
+    total_volume = _rolling(volume, window, np.sum)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(total_volume > 0, price_volume / total_volume, np.nan)
@@ -0,0 +1,245 @@
+import os
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import pandas as pd
+import yfinance as yf
+
+try:
+    import pyarrow  # noqa: F401  (needed by DataFrame.to_parquet/read_parquet)
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+logger = logging.getLogger("mcp-stockanalyzer")
+
+# Seconds each kind of market data is reused before it is fetched again
+INFO_TTL = int(os.getenv("MCP_STOCK_INFO_TTL", "300"))
+HISTORY_TTL = int(os.getenv("MCP_STOCK_HISTORY_TTL", "900"))
+NEWS_TTL = int(os.getenv("MCP_STOCK_NEWS_TTL", "1800"))
+CACHE_SIZE = int(os.getenv("MCP_STOCK_CACHE_SIZE", "512"))
+
+# Directory for the on-disk daily bar store, disabled when unset
+CACHE_DIR = os.getenv("MCP_STOCK_CACHE_DIR")
+# Relative close difference on a stored bar that means the adjustments changed
+ADJUSTMENT_TOLERANCE = 1e-4
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a per-entry TTL."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+_cache = TTLCache(CACHE_SIZE)
+
+# One lock per key being loaded, so concurrent tool calls for a symbol download it once:
+# {key: [lock, number of callers holding or waiting for it]}
+_key_locks: dict = {}
+_key_locks_lock = threading.Lock()
+
+
+@contextmanager
+def _key_lock(key):
+    """Hold key's lock; it is dropped once no caller holds or waits for it."""
+    with _key_locks_lock:
+        entry = _key_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _key_locks_lock:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _key_locks[key]
+
+
+def cached(key, ttl: float, fetch):
+    """Return the cached value for key, calling fetch() at most once on a miss."""
+    value = _cache.get(key)
+    if value is not None:
+        return value
+    with _key_lock(key):
+        value = _cache.get(key)
+        if value is None:
+            value = fetch()
+            _cache.set(key, value, ttl)
+        return value
+
+
+def get_info(symbol: str) -> dict:
+    """Quote and company info (yfinance Ticker.info)."""
+    return cached(("info", symbol), INFO_TTL, lambda: yf.Ticker(symbol).info)
+
+
+def get_news(symbol: str, months: int, max_articles: int, fetch) -> list:
+    """News articles for a symbol; fetch() performs the NewsAPI request."""
+    return cached(("news", symbol, months, max_articles), NEWS_TTL, fetch)
+
+
+def _period_start(period: str, end: pd.Timestamp) -> pd.Timestamp | None:
+    """First date covered by a yfinance period string, None for 'max'."""
+    if period == "max":
+        return None
+    if period == "ytd":
+        return end.normalize().replace(month=1, day=1)
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if not match:
+        raise ValueError(f"Unsupported history period: {period}")
+    amount, unit = int(match.group(1)), match.group(2)
+    offsets = {
+        "d": pd.DateOffset(days=amount),
+        "wk": pd.DateOffset(weeks=amount),
+        "mo": pd.DateOffset(months=amount),
+        "y": pd.DateOffset(years=amount),
+    }
+    return end.normalize() - offsets[unit]
+
+
+def _store_path(symbol: str) -> str | None:
+    if not CACHE_DIR or not PARQUET_AVAILABLE:
+        return None
+    return os.path.join(CACHE_DIR, "daily", f"{symbol}.parquet")
+
+
+def _load_bars(symbol: str) -> pd.DataFrame | None:
+    path = _store_path(symbol)
+    if path is None or not os.path.exists(path):
+        return None
+    try:
+        return pd.read_parquet(path)
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable bar store {path}: {e}")
+        return None
+
+
+def _save_bars(symbol: str, bars: pd.DataFrame):
+    path = _store_path(symbol)
+    if path is None:
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        bars.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.warning(f"Could not write bar store {path}: {e}")
+
+
+def _same_adjustments(stored: pd.DataFrame, new_bars: pd.DataFrame) -> bool:
+    """
+    Whether new_bars are on the stored bars' price basis.
+
+    yfinance adjusts all history for splits and dividends as of the download,
+    so after one the stored closes no longer match a fresh download.
+    """
+    anchor = stored.index[-2]
+    if anchor not in new_bars.index:
+        return False
+    stored_close, new_close = stored.at[anchor, "Close"], new_bars.at[anchor, "Close"]
+    if abs(new_close - stored_close) > ADJUSTMENT_TOLERANCE * abs(stored_close):
+        return False
+    later = new_bars[new_bars.index > anchor]
+    return not any((later[column] != 0).any() for column in ("Stock Splits", "Dividends") if column in later)
+
+
+def _fetch_daily_bars(symbol: str, period: str) -> pd.DataFrame:
+    """Daily OHLCV covering period, downloading only bars newer than the stored ones."""
+    ticker = yf.Ticker(symbol)
+    stored = _load_bars(symbol)
+    if stored is not None and len(stored) >= 2:
+        start = _period_start(period, pd.Timestamp.now(tz=stored.index.tz))
+        if start is not None and stored.index[0] <= start + pd.Timedelta(days=7):
+            # Refetch the last stored bar too, it may have been a partial day, and
+            # the complete one before it to check the price basis against
+            new_bars = ticker.history(start=stored.index[-2].strftime("%Y-%m-%d"), interval="1d")
+            if new_bars.empty:
+                return stored
+            new_bars = new_bars.tz_convert(stored.index.tz) if stored.index.tz else new_bars
+            if _same_adjustments(stored, new_bars):
+                bars = pd.concat([stored, new_bars])
+                bars = bars[~bars.index.duplicated(keep="last")].sort_index()
+                _save_bars(symbol, bars)
+                return bars
+            logger.info(f"Price adjustments of {symbol} changed, downloading its whole history again")
+
+    bars = ticker.history(period=period, interval="1d")
+    if not bars.empty:
+        _save_bars(symbol, bars)
+    return bars
+
+
+def get_history(symbol: str, period: str = "6mo") -> pd.DataFrame:
+    """Daily OHLCV bars for a yfinance period; callers get their own copy."""
+    bars = cached(("history", symbol, period), HISTORY_TTL, lambda: _fetch_daily_bars(symbol, period))
+    if not bars.empty:
+        start = _period_start(period, bars.index[-1])
+        if start is not None:
+            bars = bars[bars.index >= start]
+    return bars.copy()
+
+
+def _download_daily_bars(symbols: list[str], period: str) -> dict[str, pd.DataFrame]:
+    """One batched yf.download; returns each OHLCV field as a (date x symbol) frame."""
+    data = yf.download(
+        symbols,
+        period=period,
+        interval="1d",
+        group_by="column",
+        auto_adjust=True,
+        threads=True,
+        progress=False
+    )
+    fields = {}
+    for field in ("Open", "High", "Low", "Close", "Volume"):
+        if isinstance(data.columns, pd.MultiIndex):
+            frame = data[field] if field in data.columns.get_level_values(0) else pd.DataFrame(index=data.index)
+        else:
+            # Older yfinance returns flat columns for a single ticker
+            frame = data[[field]].set_axis(symbols[:1], axis=1) if field in data.columns else pd.DataFrame(index=data.index)
+        fields[field] = frame.reindex(columns=symbols)
+    return fields
+
+
+def get_batch_history(symbols: list[str], period: str = "6mo") -> dict[str, pd.DataFrame]:
+    """Daily OHLCV for many symbols from a single download, as (date x symbol) frames."""
+    symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+    fields = cached(("batch_history", tuple(sorted(symbols)), period), HISTORY_TTL,
+                    lambda: _download_daily_bars(sorted(symbols), period))
+    return {field: frame.reindex(columns=symbols).copy() for field, frame in fields.items()}
+
+
+def clear():
+    """Drop everything cached in memory (the on-disk store is kept)."""
+    _cache.clear()
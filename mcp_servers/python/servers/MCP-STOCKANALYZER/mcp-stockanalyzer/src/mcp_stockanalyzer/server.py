@@ -1,8 +1,12 @@
+import os
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from mcp.server import Server
 from mcp.types import Tool, TextContent, ImageContent, EmbeddedResource
 from . import tools_stock
 from . import toolhandler
+from . import tracing
 from collections.abc import Sequence
 import traceback
 
@@ -25,6 +29,30 @@ add_tool_handler(tools_stock.StockDetailsToolHandler())
 add_tool_handler(tools_stock.StockNewsToolHandler())
 add_tool_handler(tools_stock.SimilarStocksToolHandler())
 add_tool_handler(tools_stock.StockAnalysisToolHandler())
+add_tool_handler(tools_stock.MultiStockAnalysisToolHandler())
+
+# Blocking tool handlers run in a thread pool so concurrent calls overlap.
+# MCP_TOOL_EXECUTION=inline runs them on the event loop instead.
+TOOL_EXECUTION_MODE = os.getenv("MCP_TOOL_EXECUTION", "thread")
+TOOL_THREADS = int(os.getenv("MCP_TOOL_THREADS", "8"))
+TOOL_CONCURRENCY = int(os.getenv("MCP_TOOL_CONCURRENCY", "4"))
+
+tool_executor = ThreadPoolExecutor(max_workers=TOOL_THREADS, thread_name_prefix="mcp-stockanalyzer-tool")
+tool_semaphores: dict[str, asyncio.Semaphore] = {}
+
+def get_tool_semaphore(tool_handler: toolhandler.ToolHandler) -> asyncio.Semaphore:
+    semaphore = tool_semaphores.get(tool_handler.name)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(tool_handler.max_concurrency or TOOL_CONCURRENCY)
+        tool_semaphores[tool_handler.name] = semaphore
+    return semaphore
+
+async def execute_tool(tool_handler: toolhandler.ToolHandler, arguments: dict) -> Sequence[TextContent | ImageContent | EmbeddedResource]:
+    async with get_tool_semaphore(tool_handler):
+        if TOOL_EXECUTION_MODE == "inline":
+            return tool_handler.run_tool(arguments)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(tool_executor, tool_handler.run_tool, arguments)
 
 @app.list_tools()
 async def list_tools() -> list[Tool]:
@@ -37,13 +65,15 @@ async def call_tool(name: str, arguments: dict) -> Sequence[TextContent | ImageC
         tool_handler = get_tool_handler(name)
         if not tool_handler:
             raise ValueError(f"Unknown tool: {name}")
-        return tool_handler.run_tool(arguments)
+        with tracing.run_tool_span(name, app.request_context.meta):
+            return await execute_tool(tool_handler, arguments)
     except Exception as e:
         logger.error(traceback.format_exc())
         logger.error(f"Error during call_tool: {str(e)}")
         raise RuntimeError(f"Caught Exception. Error: {str(e)}")
 
 async def main():
+    tracing.init_tracing("mcp-stockanalyzer")
     from mcp.server.stdio import stdio_server
     async with stdio_server() as (read_stream, write_stream):
         await app.run(
@@ -1,16 +1,16 @@
-import yfinance as yf
 from newsapi import NewsApiClient
 from datetime import datetime, timedelta
 import numpy as np
+from . import market_cache
+from . import indicators
 
 class StockAnalyzer:
     def __init__(self, symbol: str, news_api_key: str):
         self.symbol = symbol.upper()
-        self.stock = yf.Ticker(self.symbol)
         self.newsapi = NewsApiClient(api_key=news_api_key)
 
     def get_stock_details(self):
-        info = self.stock.info
+        info = market_cache.get_info(self.symbol)
         details = {
             'symbol': self.symbol,
             'name': info.get('longName'),
@@ -25,6 +25,12 @@ class StockAnalyzer:
         return details
 
     def get_stock_news(self, months=1, max_articles=10):
+        return market_cache.get_news(
+            self.symbol, months, max_articles,
+            lambda: self._fetch_stock_news(months, max_articles)
+        )
+
+    def _fetch_stock_news(self, months, max_articles):
         query = self.symbol
         to_date = datetime.now()
         from_date = to_date - timedelta(days=30 * months)
@@ -45,7 +51,7 @@ class StockAnalyzer:
         return news
 
     def get_similar_stocks(self):
-        info = self.stock.info
+        info = market_cache.get_info(self.symbol)
         sector = info.get("sector")
         industry = info.get("industry")
         if not sector or not industry:
@@ -61,7 +67,7 @@ class StockAnalyzer:
         return peers
 
     def get_detailed_analysis(self):
-        hist = self.stock.history(period="6mo")
+        hist = market_cache.get_history(self.symbol, period="6mo")
         if hist.empty:
             return {"error": "No historical data available"}
         hist['SMA20'] = hist['Close'].rolling(window=20).mean()
@@ -85,4 +91,70 @@ class StockAnalyzer:
             'recommendation': recommendation,
             'rationale': rationale
         }
-        return analysis 
\ No newline at end of file
+        return analysis
+
+
+def _latest(values: np.ndarray) -> list:
+    """Last row of a (T, N) indicator as JSON-friendly floats (None for NaN)."""
+    if values.shape[0] == 0:
+        return [None] * values.shape[1]
+    return [None if np.isnan(v) else round(float(v), 4) for v in values[-1]]
+
+
+def analyze_symbols(symbols: list[str], period: str = "6mo") -> dict:
+    """Indicators and a BUY/SELL/HOLD signal for many symbols from one batched download."""
+    fields = market_cache.get_batch_history(symbols, period=period)
+    close_frame = fields["Close"].ffill()
+    symbols = list(close_frame.columns)
+
+    close = close_frame.to_numpy(dtype=float)
+    high = fields["High"].to_numpy(dtype=float)
+    low = fields["Low"].to_numpy(dtype=float)
+    volume = fields["Volume"].to_numpy(dtype=float)
+
+    ema20 = indicators.ema(close, 20)
+    ema50 = indicators.ema(close, 50)
+    rsi14 = indicators.rsi(close, 14)
+    macd_line, macd_signal, macd_hist = indicators.macd(close)
+    _, bb_upper, bb_lower, bb_percent = indicators.bollinger(close, 20, 2.0)
+    atr14 = indicators.atr(high, low, close, 14)
+    vwap20 = indicators.vwap(high, low, close, volume, 20)
+
+    latest = {
+        "price": _latest(close),
+        "EMA20": _latest(ema20),
+        "EMA50": _latest(ema50),
+        "RSI14": _latest(rsi14),
+        "MACD": _latest(macd_line),
+        "MACD_signal": _latest(macd_signal),
+        "MACD_hist": _latest(macd_hist),
+        "BB_upper": _latest(bb_upper),
+        "BB_lower": _latest(bb_lower),
+        "BB_percent_b": _latest(bb_percent),
+        "ATR14": _latest(atr14),
+        "VWAP20": _latest(vwap20),
+    }
+
+    results = {}
+    missing = []
+    for i, symbol in enumerate(symbols):
+        row = {name: values[i] for name, values in latest.items()}
+        if row["price"] is None:
+            missing.append(symbol)
+            continue
+        price, fast, slow, rsi_value = row["price"], row["EMA20"], row["EMA50"], row["RSI14"]
+        recommendation = "HOLD"
+        if fast is not None and slow is not None:
+            if price > fast > slow and (rsi_value is None or rsi_value < 70):
+                recommendation = "BUY"
+            elif price < fast < slow and (rsi_value is None or rsi_value > 30):
+                recommendation = "SELL"
+        row["recommendation"] = recommendation
+        results[symbol] = row
+
+    return {
+        "period": period,
+        "bars": int(close.shape[0]),
+        "analysis": results,
+        "missing_symbols": missing
+    }
@@ -10,6 +10,9 @@ USER_ID_ARG = "__user_id__"
 CREDENTIALS_ARG = "__credentials__"
 
 class ToolHandler():
+    # Maximum concurrent runs of this tool; None uses the server default
+    max_concurrency: int | None = None
+
     def __init__(self, tool_name: str):
         self.name = tool_name
 
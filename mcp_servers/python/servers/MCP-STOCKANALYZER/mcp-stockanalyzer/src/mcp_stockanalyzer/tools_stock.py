@@ -5,9 +5,11 @@ from mcp.types import (
     ImageContent,
     EmbeddedResource,
 )
-from .stock import StockAnalyzer
+from .stock import StockAnalyzer, analyze_symbols
 from .toolhandler import ToolHandler, CREDENTIALS_ARG
 
+MAX_ANALYSIS_SYMBOLS = 500
+
 class StockDetailsToolHandler(ToolHandler):
     def __init__(self):
         super().__init__("get_stock_details")
@@ -126,4 +128,44 @@ class StockAnalysisToolHandler(ToolHandler):
             raise RuntimeError(f"Missing required argument: {CREDENTIALS_ARG}")
         analyzer = StockAnalyzer(symbol, news_api_key)
         analysis = analyzer.get_detailed_analysis()
-        return [TextContent(type="text", text=str(analysis))] 
\ No newline at end of file
+        return [TextContent(type="text", text=str(analysis))]
+
+class MultiStockAnalysisToolHandler(ToolHandler):
+    # One batched download per call, heavier than the single-symbol tools
+    max_concurrency = 2
+
+    def __init__(self):
+        super().__init__("get_multi_stock_analysis")
+
+    def get_tool_description(self) -> Tool:
+        return Tool(
+            name=self.name,
+            description="Screen many stock symbols at once: EMA20/50, RSI14, MACD, Bollinger Bands, ATR14 and VWAP20 with a BUY/SELL/HOLD signal per symbol. Use this instead of calling get_stock_analysis once per symbol.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "symbols": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Stock symbols (e.g., [\"AAPL\", \"MSFT\", \"TSLA\"])"
+                    },
+                    "period": {
+                        "type": "string",
+                        "description": "History period to analyze (e.g., 3mo, 6mo, 1y)",
+                        "default": "6mo"
+                    }
+                },
+                "required": ["symbols"]
+            }
+        )
+
+    def run_tool(self, args: dict) -> Sequence[TextContent | ImageContent | EmbeddedResource]:
+        symbols = args.get("symbols")
+        if isinstance(symbols, str):
+            symbols = [s.strip() for s in symbols.split(",")]
+        if not symbols:
+            raise RuntimeError("Missing required argument: symbols")
+        if len(symbols) > MAX_ANALYSIS_SYMBOLS:
+            raise RuntimeError(f"At most {MAX_ANALYSIS_SYMBOLS} symbols can be analyzed per call")
+        analysis = analyze_symbols([s for s in symbols if s], period=args.get("period", "6mo"))
+        return [TextContent(type="text", text=str(analysis))]